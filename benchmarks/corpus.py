@@ -0,0 +1,127 @@
+"""Synthetic DPX corpora for benchmarks.
+
+Files are written with `tests.conftest.TestFileFactory`. Each kind of file
+is created once as a template and copied to the corpus, so that even corpora
+of a million files are generated quickly.
+"""
+
+from __future__ import annotations
+import json
+import os
+import random
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from tests.conftest import TestFileFactory
+
+# Parameters of `TestFileFactory.create_file` for each kind of invalid file
+INVALID_KINDS = {
+    "version": {"version": b"V3.0\0   "},
+    "filesize": {"file_size": 1000},
+    "encrypted": {"encrypt": True},
+    "image_offset": {"image_offset": 1 << 30},
+}
+# Size of the sparse large files, such as 4K frames
+SPARSE_FILE_SIZE = 50 * 1024 * 1024
+# Number of files in a directory, such as a reel of frames
+FILES_PER_DIRECTORY = 1000
+# Description of the corpus written to its root directory
+CORPUS_FILE = "corpus.json"
+
+
+def _templates(
+    factory: TestFileFactory, sparse: bool
+) -> dict[tuple[str, str], bytes]:
+    """Create a file of each byte order and kind with the factory.
+
+    :returns: Dict of file contents by ``(byte order, kind)``
+    """
+    templates = {}
+    kinds = {"valid": {}, **INVALID_KINDS}
+    for magic_number in (b"SDPX", b"XPDS"):
+        for kind, parameters in kinds.items():
+            if sparse and kind == "valid":
+                parameters = {"file_size": SPARSE_FILE_SIZE}
+            parameters = {"image_offset": 8192, **parameters}
+            path = factory.create_file(
+                file_name="template", magic_number=magic_number,
+                **parameters
+            )
+            templates[(magic_number.decode(), kind)] = path.read_bytes()
+    return templates
+
+
+def generate_corpus(
+    root: str | os.PathLike,
+    files: int = 10_000,
+    little_endian: float = 0.5,
+    invalid: float = 0.1,
+    sparse: float = 0.0,
+    seed: int = 0
+) -> dict:
+    """Write a corpus of DPX files into a directory.
+
+    Files are named like frames of a sequence and split into directories of
+    `FILES_PER_DIRECTORY` files. Sparse files are valid files whose image
+    data is a hole of `SPARSE_FILE_SIZE` bytes in total, so they take no
+    space but are as large as real frames.
+
+    :param root: Directory to write the corpus into, created if missing
+    :param files: Number of files
+    :param little_endian: Fraction of little endian files
+    :param invalid: Fraction of invalid files, evenly split between the
+        kinds in `INVALID_KINDS`
+    :param sparse: Fraction of sparse large files among the valid files
+    :param seed: Seed of the random choices, the same seed produces the
+        same corpus
+    :returns: Description of the corpus, also written to `CORPUS_FILE`
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    generator = random.Random(seed)
+    counts: dict[str, int] = {}
+
+    with TemporaryDirectory() as template_directory:
+        factory = TestFileFactory(Path(template_directory))
+        templates = _templates(factory, sparse=False)
+        sparse_templates = _templates(factory, sparse=True)
+
+    invalid_kinds = sorted(INVALID_KINDS)
+    for index in range(files):
+        byte_order = "XPDS" if generator.random() < little_endian else "SDPX"
+        kind = "valid"
+        if generator.random() < invalid:
+            kind = generator.choice(invalid_kinds)
+        is_sparse = kind == "valid" and generator.random() < sparse
+
+        directory = root / ("reel_%04d" % (index // FILES_PER_DIRECTORY))
+        if index % FILES_PER_DIRECTORY == 0:
+            directory.mkdir(exist_ok=True)
+        path = directory / ("frame_%07d.dpx" % index)
+
+        if is_sparse:
+            path.write_bytes(sparse_templates[(byte_order, kind)])
+            os.truncate(path, SPARSE_FILE_SIZE)
+            kind = "sparse"
+        else:
+            path.write_bytes(templates[(byte_order, kind)])
+
+        counts[kind] = counts.get(kind, 0) + 1
+
+    description = {
+        "files": files,
+        "little_endian": little_endian,
+        "invalid": invalid,
+        "sparse": sparse,
+        "seed": seed,
+        "kinds": counts,
+    }
+    (root / CORPUS_FILE).write_text(json.dumps(description, indent=2))
+    return description
+
+
+def corpus_paths(root: str | os.PathLike) -> list[str]:
+    """Paths of the DPX files of a corpus in sorted order."""
+    return sorted(
+        str(path) for path in Path(root).glob("reel_*/frame_*.dpx")
+    )
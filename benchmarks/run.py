@@ -0,0 +1,252 @@
+"""Run benchmarks of dpx-validator on a synthetic corpus.
+
+Each benchmark is measured in a fresh Python process, so that its peak
+resident set size is not affected by the other benchmarks. Read and write
+system calls are counted from ``/proc/self/io`` where available. Results are
+written as JSON and can be compared with the results of another version::
+
+    python -m benchmarks.run --files 100000 --output new.json
+    python -m benchmarks.run --files 100000 --compare old.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from tempfile import TemporaryDirectory
+
+from benchmarks.corpus import CORPUS_FILE, corpus_paths, generate_corpus
+from dpx_validator import __version__
+from dpx_validator.api import validate_file
+from dpx_validator.dpx_validator import DpxValidator
+from dpx_validator.main import main
+
+
+def _bench_validate_file(root: str, paths: list[str], jobs: int) -> None:
+    """Validate each file with `validate_file`."""
+    for path in paths:
+        validate_file(path)
+
+
+def _bench_run_basic_procedures(
+    root: str, paths: list[str], jobs: int
+) -> None:
+    """Run the basic procedures of `DpxValidator` for each file."""
+    for path in paths:
+        with open(path, "rb") as file_handle:
+            DpxValidator(file_handle, path).run_basic_procedures()
+
+
+def _bench_cli(root: str, paths: list[str], jobs: int) -> None:
+    """Validate the corpus directory with the command line interface."""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), \
+            redirect_stderr(devnull):
+        main(["--jobs", str(jobs), "--recursive", root])
+
+
+BENCHMARKS = {
+    "validate_file": _bench_validate_file,
+    "run_basic_procedures": _bench_run_basic_procedures,
+    "cli": _bench_cli,
+}
+
+
+def _syscalls() -> int | None:
+    """Number of read and write system calls made by the process, or None
+    if they are not available."""
+    try:
+        with open("/proc/self/io") as io_file:
+            counters = dict(
+                line.split(":", 1) for line in io_file.read().splitlines()
+            )
+    except OSError:
+        return None
+    return int(counters["syscr"]) + int(counters["syscw"])
+
+
+def measure(name: str, root: str, jobs: int = 1) -> dict:
+    """Run a benchmark in the current process.
+
+    :param name: Name of the benchmark in `BENCHMARKS`
+    :param root: Directory of the corpus
+    :param jobs: Number of worker processes in the CLI benchmark
+    :returns: Dict of the measurements
+    """
+    paths = corpus_paths(root)
+    syscalls = _syscalls()
+    start = time.perf_counter()
+    BENCHMARKS[name](root, paths, jobs)
+    seconds = time.perf_counter() - start
+    if syscalls is not None:
+        syscalls = _syscalls() - syscalls
+
+    files = len(paths)
+    return {
+        "files": files,
+        "seconds": seconds,
+        "files_per_second": files / seconds if seconds else None,
+        "syscalls_per_file":
+            syscalls / files if syscalls is not None and files else None,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_children_rss_kib":
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def run_benchmarks(
+    root: str, names: list[str], jobs: int = 1, repeat: int = 3
+) -> dict:
+    """Measure benchmarks, each in a separate process.
+
+    :param root: Directory of the corpus
+    :param names: Names of the benchmarks
+    :param jobs: Number of worker processes in the CLI benchmark
+    :param repeat: Number of runs of each benchmark. The fastest run is
+        reported.
+    :returns: Dict of measurements by benchmark name
+    """
+    results = {}
+    for name in names:
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--measure", name,
+                 "--corpus", root, "--jobs", str(jobs)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            runs.append(json.loads(output))
+        results[name] = min(runs, key=lambda run: run["seconds"])
+    return results
+
+
+def compare(baseline: dict, results: dict) -> list[str]:
+    """Compare the throughput of benchmarks with a baseline.
+
+    :param baseline: Results of an earlier run
+    :param results: Results of this run
+    :returns: Line of text for each benchmark found in both results
+    """
+    lines = []
+    for name, result in results["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if not old or not old["files_per_second"]:
+            continue
+        change = result["files_per_second"] / old["files_per_second"] - 1
+        lines.append(
+            "%s: %.0f -> %.0f files/s (%+.1f%%)" % (
+                name, old["files_per_second"], result["files_per_second"],
+                change * 100
+            )
+        )
+    return lines
+
+
+def parse_arguments(arguments):
+    """Parse command line arguments.
+
+    :param arguments: List of command line arguments without the program name
+    :returns: `argparse.Namespace` of the parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark dpx-validator on a synthetic DPX corpus."
+    )
+    parser.add_argument(
+        "--corpus", metavar="DIR",
+        help="Directory of the corpus. An existing corpus is reused, "
+             "otherwise a corpus is generated into it. Defaults to a "
+             "temporary directory."
+    )
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument(
+        "--little-endian", type=float, default=0.5, metavar="FRACTION")
+    parser.add_argument(
+        "--invalid", type=float, default=0.1, metavar="FRACTION")
+    parser.add_argument(
+        "--sparse", type=float, default=0.0, metavar="FRACTION",
+        help="Fraction of valid files which are sparse large files"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--benchmark", action="append", choices=sorted(BENCHMARKS),
+        help="Benchmark to run, can be given multiple times. Defaults to "
+             "all benchmarks."
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of worker processes in the CLI benchmark"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", metavar="PATH",
+        help="Write the results into a JSON file instead of standard output"
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH",
+        help="Compare the throughput with results from an earlier run"
+    )
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+
+    return parser.parse_args(arguments)
+
+
+def run(args, root: str) -> dict:
+    """Generate or reuse the corpus and run the benchmarks."""
+    corpus_file = os.path.join(root, CORPUS_FILE)
+    if os.path.exists(corpus_file):
+        with open(corpus_file) as description:
+            corpus = json.load(description)
+    else:
+        corpus = generate_corpus(
+            root, files=args.files, little_endian=args.little_endian,
+            invalid=args.invalid, sparse=args.sparse, seed=args.seed
+        )
+
+    return {
+        "dpx_validator": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "corpus": corpus,
+        "jobs": args.jobs,
+        "benchmarks": run_benchmarks(
+            root, args.benchmark or list(BENCHMARKS), args.jobs, args.repeat
+        ),
+    }
+
+
+def benchmark_main(arguments=None):
+    """Run the benchmarks from the command line."""
+    args = parse_arguments(
+        sys.argv[1:] if arguments is None else arguments)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.corpus, args.jobs)))
+        return
+
+    if args.corpus:
+        results = run(args, args.corpus)
+    else:
+        with TemporaryDirectory() as root:
+            results = run(args, root)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            for line in compare(json.load(baseline), results):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    benchmark_main()
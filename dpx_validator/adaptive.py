@@ -0,0 +1,112 @@
+"""Adaptive concurrency for storage of unknown latency.
+
+`AdaptiveConcurrency` chooses the number of files validated at once with
+additive increase and multiplicative decrease (AIMD). The latency of each
+file, from opening it to the last header read and stat call in
+`dpx_validator.api.validate_file`, is recorded as files complete. After each
+window of files, the throughput of the window is compared with the previous
+window:
+
+- If throughput improved, one more file is allowed in flight.
+- If throughput did not improve and the mean latency has grown to
+  `LATENCY_TOLERANCE` times the lowest latency seen, the limit is cut by
+  `DECREASE_FACTOR`.
+- Otherwise the limit is kept.
+
+The lowest latency seen drifts slowly upward, so that the controller adapts
+when the files move to slower storage.
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections.abc import Callable
+
+# Initial number of files in flight
+INITIAL_LIMIT = 4
+# Hard cap of files in flight by default
+DEFAULT_MAX_LIMIT = 64
+# Minimum number of files in a window
+MIN_WINDOW = 16
+# Relative throughput gain which counts as an improvement
+THROUGHPUT_GAIN = 0.05
+# Mean latency, relative to the lowest latency seen, which counts as a spike
+LATENCY_TOLERANCE = 2.0
+# Factor the limit is multiplied with when latency spikes
+DECREASE_FACTOR = 0.7
+# Relative growth of the lowest latency seen per window
+BASELINE_DRIFT = 0.02
+
+
+class AdaptiveConcurrency:
+    """AIMD controller of the number of files in flight. The controller can
+    be shared between threads."""
+
+    def __init__(
+        self,
+        initial: int = INITIAL_LIMIT,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_LIMIT,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        :param initial: Initial limit
+        :param minimum: Lowest limit
+        :param maximum: Hard cap of the limit, to avoid overloading shared
+            storage
+        :param clock: Function returning the current time in seconds
+        """
+        if not 1 <= minimum <= maximum:
+            raise ValueError("Limits must satisfy 1 <= minimum <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.baseline: float | None = None
+        self.throughput: float | None = None
+        self._window_start = clock()
+        self._window_files = 0
+        self._window_latency = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Number of files allowed in flight."""
+        return int(self._limit)
+
+    def record(self, latency: float, files: int = 1) -> None:
+        """Record completed files.
+
+        :param latency: Total latency of the files in seconds
+        :param files: Number of files
+        """
+        with self._lock:
+            self._window_files += files
+            self._window_latency += latency
+            if self._window_files >= max(MIN_WINDOW, 2 * self.limit):
+                self._adjust()
+
+    def _adjust(self) -> None:
+        """Change the limit after a window. Called with the lock held."""
+        now = self._clock()
+        elapsed = max(now - self._window_start, 1e-9)
+        throughput = self._window_files / elapsed
+        latency = self._window_latency / self._window_files
+
+        if self.baseline is None:
+            self.baseline = latency
+        else:
+            self.baseline = min(latency, self.baseline * (1 + BASELINE_DRIFT))
+
+        improved = self.throughput is None or \
+            throughput > self.throughput * (1 + THROUGHPUT_GAIN)
+        if improved:
+            self._limit = min(self.maximum, self._limit + 1)
+        elif latency > self.baseline * LATENCY_TOLERANCE:
+            self._limit = max(self.minimum, self._limit * DECREASE_FACTOR)
+
+        self.throughput = throughput
+        self._window_start = now
+        self._window_files = 0
+        self._window_latency = 0.0
@@ -0,0 +1,229 @@
+"""Asyncio API for validating DPX files without blocking the event loop.
+
+Files are validated with `dpx_validator.api.validate_file` in a bounded pool
+of threads owned by an `AsyncValidator`. A semaphore limits the number of
+calls in flight, so that the files read at once are bounded regardless of
+the number of coroutines requesting validation. `validate_many` can send
+several files to a thread at once to reduce the cost of switching between
+the event loop and the threads::
+
+    async for path, valid, output, logs in validate_many(paths):
+        ...
+"""
+
+from __future__ import annotations
+import asyncio
+import weakref
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import PathLike
+from typing import Any
+
+from dpx_validator import api
+from dpx_validator.result import ValidationResult
+
+# Number of validation calls in flight, and threads, by default
+DEFAULT_CONCURRENCY = 64
+
+# Default validators of the running event loops
+_default_validators: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, AsyncValidator
+] = weakref.WeakKeyDictionary()
+
+
+async def _iterate(
+    paths: Iterable[str | PathLike] | AsyncIterable[str | PathLike]
+) -> AsyncIterator[str | PathLike]:
+    """Iterate paths from a synchronous or asynchronous iterable."""
+    if isinstance(paths, AsyncIterable):
+        async for path in paths:
+            yield path
+    else:
+        for path in paths:
+            yield path
+
+
+async def _chunks(
+    paths: AsyncIterator[str | PathLike], size: int
+) -> AsyncIterator[list[str | PathLike]]:
+    """Split paths into lists of at most `size` paths."""
+    chunk = []
+    async for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validate_chunk(
+    paths: list[str | PathLike], options: dict[str, Any]
+) -> list[tuple]:
+    """Validate a list of files in a thread."""
+    return [(path, *api.validate_file(path, **options)) for path in paths]
+
+
+class AsyncValidator:
+    """
+    Validator of files in a bounded pool of threads.
+
+    The validator is used as an async context manager, or closed with
+    `close`. The methods must be called from the same event loop.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        executor: ThreadPoolExecutor | None = None
+    ) -> None:
+        """
+        :param concurrency: Number of calls validating files at once
+        :param executor: Executor to validate files in, defaults to a pool
+            of `concurrency` threads owned by the validator
+        """
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                concurrency, thread_name_prefix="dpx-validator")
+        self.executor = executor
+
+    async def _run(self, function, *args) -> Any:
+        """Run a function in the executor when the semaphore allows."""
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, function, *args)
+
+    async def validate_file(
+        self, path: str | PathLike, **options
+    ) -> tuple[bool, dict, list] | ValidationResult:
+        """Validate a file.
+
+        :param path: Path to a DPX file
+        :param options: Keyword arguments to
+            `dpx_validator.api.validate_file`
+        :returns: Result as returned by `dpx_validator.api.validate_file`
+        """
+        return await self._run(partial(api.validate_file, path, **options))
+
+    async def validate_many(
+        self,
+        paths: Iterable[str | PathLike] | AsyncIterable[str | PathLike],
+        chunksize: int = 1,
+        ordered: bool = False,
+        **options
+    ) -> AsyncIterator[tuple[str | PathLike, bool, dict, list]]:
+        """Validate files concurrently.
+
+        Paths are taken from `paths` only as results are yielded, and at
+        most ``2 * concurrency`` chunks of files are pending at once.
+
+        :param paths: Iterable or async iterable of paths to DPX files
+        :param chunksize: Number of files validated in a thread at once
+        :param ordered: Yield results in the order of `paths`. If False,
+            results are yielded as soon as they are ready.
+        :param options: Keyword arguments to
+            `dpx_validator.api.validate_file`
+        :returns: Async iterator of ``(path, valid, output, logs)`` tuples
+        """
+        pending: deque[asyncio.Task] = deque()
+
+        def completed() -> list[asyncio.Task]:
+            """Tasks whose results can be yielded, in order."""
+            if ordered:
+                done = []
+                while pending and pending[0].done():
+                    done.append(pending.popleft())
+                return done
+            done = [task for task in pending if task.done()]
+            for task in done:
+                pending.remove(task)
+            return done
+
+        async def wait() -> None:
+            """Wait until a result can be yielded."""
+            if ordered:
+                await asyncio.wait([pending[0]])
+            else:
+                await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+
+        try:
+            async for chunk in _chunks(_iterate(paths), chunksize):
+                pending.append(asyncio.ensure_future(
+                    self._run(_validate_chunk, chunk, options)))
+                if len(pending) >= 2 * self.concurrency:
+                    await wait()
+                for task in completed():
+                    for result in task.result():
+                        yield result
+
+            while pending:
+                await wait()
+                for task in completed():
+                    for result in task.result():
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self) -> None:
+        """Shut down the executor if it is owned by the validator. Calls
+        running in threads are finished first."""
+        if self._own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> AsyncValidator:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _default_validator() -> AsyncValidator:
+    """Validator shared by the calls of `validate_file` in the running
+    event loop."""
+    loop = asyncio.get_running_loop()
+    validator = _default_validators.get(loop)
+    if validator is None:
+        validator = _default_validators[loop] = AsyncValidator()
+    return validator
+
+
+async def validate_file(
+    path: str | PathLike, **options
+) -> tuple[bool, dict, list] | ValidationResult:
+    """Validate a file in the default validator of the event loop, which
+    runs at most `DEFAULT_CONCURRENCY` validations at once.
+
+    :param path: Path to a DPX file
+    :param options: Keyword arguments to `dpx_validator.api.validate_file`
+    :returns: Result as returned by `dpx_validator.api.validate_file`
+    """
+    return await _default_validator().validate_file(path, **options)
+
+
+async def validate_many(
+    paths: Iterable[str | PathLike] | AsyncIterable[str | PathLike],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    chunksize: int = 1,
+    ordered: bool = False,
+    **options
+) -> AsyncIterator[tuple[str | PathLike, bool, dict, list]]:
+    """Validate files concurrently in a new `AsyncValidator`.
+
+    :param paths: Iterable or async iterable of paths to DPX files
+    :param concurrency: Number of calls validating files at once
+    :param chunksize: Number of files validated in a thread at once
+    :param ordered: Yield results in the order of `paths`
+    :param options: Keyword arguments to `dpx_validator.api.validate_file`
+    :returns: Async iterator of ``(path, valid, output, logs)`` tuples
+    """
+    async with AsyncValidator(concurrency) as validator:
+        async for result in validator.validate_many(
+                paths, chunksize, ordered, **options):
+            yield result
@@ -1,13 +1,61 @@
 """API functions for dpx-validator."""
 
 from __future__ import annotations
-from os import PathLike
+import tarfile
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait)
+from io import BufferedReader
+from itertools import islice
+from operator import itemgetter
+from mmap import mmap
+from os import PathLike, cpu_count, fsdecode, scandir, stat, stat_result
+from os.path import join
+from time import perf_counter
+from typing import BinaryIO
 
-from dpx_validator.messages import MessageType
-from dpx_validator.dpx_validator import DpxValidator
+from dpx_validator.adaptive import AdaptiveConcurrency
+from dpx_validator.batch import failing_files
+from dpx_validator.cache import ResultCache
+from dpx_validator.file_header_reader import HEADER_BLOCK_SIZE
+from dpx_validator.fixity import HashingReader, Manifest
+from dpx_validator.header_layout import MAGIC_NUMBERS
+from dpx_validator.iopolicy import IOPolicy
+from dpx_validator.messages import MessageCode, message
+from dpx_validator.dpx_validator import DpxValidator, HeaderMemo
+from dpx_validator.result import ValidationResult
+from dpx_validator.scheduling import Scheduler
+from dpx_validator.stats import CountingReader, IOCounter, ValidationObserver
+from dpx_validator.streams import BufferReader, ForwardReader
 
+# File name extensions of DPX files when scanning directories
+DPX_EXTENSIONS = (".dpx",)
 
-def validate_file(path: str | PathLike) -> tuple[bool, dict, list]:
+# Caches opened and memos used in a worker process, by their settings
+_worker_caches: dict[str, ResultCache] = {}
+_worker_memos: dict[int, HeaderMemo] = {}
+# Manifests sent to a worker process when it starts, by their keys
+_worker_manifests: dict[int, Manifest] = {}
+
+
+def validate_file(
+    path: str | PathLike,
+    file_stat: stat_result | None = None,
+    cache: ResultCache | None = None,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    manifest: Manifest | None = None,
+    observer: ValidationObserver | None = None,
+    io_policy: IOPolicy | None = None,
+    compact: bool = False
+) -> tuple[bool, dict, list] | ValidationResult:
     """
     validate file handles the validation of the dpx file. Each validation
     procedure can be found from `dpx_validator.dpx_validator.DpxValidator`
@@ -23,31 +71,885 @@ def validate_file(path: str | PathLike) -> tuple[bool, dict, list]:
     `MessageType.ERROR` messages.
 
     :param path: Path to a DPX file
-    :return: a tuple with ``(bool, dict, list)`` values where first bool is for
-        validity and dict includes keys for "magic_number", "size" and
-        "version" of the file. the list includes logs with tuples with a type
-        and a message: ``(dpx_validator.messages.MessageType, string)``
+    :param file_stat: Stat result of the file, for example from
+        `os.DirEntry.stat`. The file is stat'ed only once if not given.
+    :param cache: `dpx_validator.cache.ResultCache` for results of unchanged
+        files. New results are added to the cache but not flushed.
+    :param memo: `dpx_validator.dpx_validator.HeaderMemo` to reuse outcomes
+        of frame independent procedures between frames of a sequence
+    :param deep: Read through the image data of a file with a valid header
+        and collect statistics of the samples
+    :param algorithms: Names of `hashlib` algorithms, such as "md5" and
+        "sha256", to compute digests of the file with in the same pass
+    :param manifest: `dpx_validator.fixity.Manifest` to verify the digest
+        of the file against. The algorithm of the manifest is added to
+        `algorithms`.
+    :param observer: `dpx_validator.stats.ValidationObserver` to receive the
+        time and I/O of each procedure and the totals of the file
+    :param io_policy: `dpx_validator.iopolicy.IOPolicy` giving page cache
+        hints on the file
+    :param compact: Return a `dpx_validator.result.ValidationResult`, which
+        keeps the messages as codes and raw values and unpacks to a tuple
+        with a list of `dpx_validator.messages.Message` logs
+    :return: a tuple with ``(bool, dict, list)`` values where first bool is
+        for validity and dict includes keys for "magic_number", "size",
+        "version", "image_statistics" and "digests" of the file. Image
+        statistics are collected only in deep validation and digests only
+        when algorithms are given. the list includes logs with tuples
+        with a type and a message:
+        ``(dpx_validator.messages.MessageType, string)``
 
     """
+    result = _validate_path(
+        path, file_stat, cache, memo, deep, algorithms, manifest, observer,
+        io_policy
+    )
+    if compact:
+        return result
+    return result.as_tuple()
+
+
+def _validate_path(
+    path: str | PathLike,
+    file_stat: stat_result | None = None,
+    cache: ResultCache | None = None,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    manifest: Manifest | None = None,
+    observer: ValidationObserver | None = None,
+    io_policy: IOPolicy | None = None
+) -> ValidationResult:
+    """Validate a file into a compact result. See `validate_file`."""
+
+    if observer is not None:
+        started = perf_counter()
+    stat_seconds = None
+    if file_stat is None:
+        file_stat = stat(path)
+        if observer is not None:
+            stat_seconds = perf_counter() - started
+
+    algorithms = set(algorithms)
+    if manifest is not None:
+        algorithms |= manifest.algorithms
+    algorithms = tuple(sorted(algorithms))
+
+    counter = IOCounter() if observer is not None else None
+    result = None
+    if cache is not None:
+        profile = "deep" if deep else "basic"
+        if algorithms:
+            profile += "+" + ",".join(algorithms)
+        result = cache.get(file_stat, profile)
+    cached = result is not None
+    if result is None:
+        result = _validate_file(
+            path, file_stat, memo, deep, algorithms, observer, counter,
+            io_policy)
+        if cache is not None:
+            cache.put(file_stat, result, profile)
+
+    if manifest is not None:
+        # The manifest is checked after the cache, since it may have
+        # changed even if the file has not
+        result.add_messages(manifest.verify(path, result.digests))
 
-    valid = True
-    output = {
-        "magic_number": None,
-        "size": None,
-        "version": None
-    }
-    logs = []
+    if observer is not None:
+        observer.file(
+            path, perf_counter() - started, stat_seconds,
+            counter.bytes_read, counter.calls, result.valid, cached
+        )
 
-    if DpxValidator.check_truncated(path):
-        logs.append((MessageType.ERROR, "Truncated file"))
-        return (False, output, logs)
+    return result
+
+
+def _validate_file(
+    path: str | PathLike,
+    file_stat: stat_result,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: tuple[str, ...] = (),
+    observer: ValidationObserver | None = None,
+    counter: IOCounter | None = None,
+    io_policy: IOPolicy | None = None
+) -> ValidationResult:
+    """Validate a file without the cache. See `validate_file`.
+
+    :param counter: `dpx_validator.stats.IOCounter` to count all I/O on the
+        file with
+    """
+
+    if DpxValidator.check_truncated(path, file_stat=file_stat) and \
+            not algorithms:
+        return _validate_handle(
+            None, path, file_stat.st_size, observer=observer)
 
     with open(path, "rb") as file_handle:
+        if io_policy is not None:
+            io_policy.opened(file_handle, bulk=deep or bool(algorithms))
+        try:
+            return _validate_handle(
+                file_handle, path, file_stat.st_size, file_stat, memo, deep,
+                algorithms, observer, counter
+            )
+        finally:
+            if io_policy is not None:
+                io_policy.release(file_handle)
+
+
+def _validate_handle(
+    file_handle: BufferedReader | None,
+    path: str | PathLike,
+    file_size: int,
+    file_stat: stat_result | None = None,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: tuple[str, ...] = (),
+    observer: ValidationObserver | None = None,
+    counter: IOCounter | None = None
+) -> ValidationResult:
+    """Validate an opened file or stream of a known size.
+
+    :param file_handle: File-like object at the beginning of the data, or
+        None for a truncated file which is not digested
+    :param path: Path or name of the file for the observer
+    :param file_size: Size of the file in bytes
+    :param file_stat: Stat result of the file, if it is a file
+    :param counter: `dpx_validator.stats.IOCounter` to count all I/O on the
+        file with
+
+    See `validate_file` for the other parameters.
+    """
+
+    result = ValidationResult()
+    truncated = DpxValidator.check_truncated(path, file_size=file_size)
+    if truncated:
+        result.add_messages([message(MessageCode.TRUNCATED_FILE)])
+        if observer is not None:
+            observer.procedure(
+                path, "check_truncated", 0.0, 0, 0, result.messages[0]
+            )
+        if not algorithms:
+            return result
+
+    if counter is not None:
+        file_handle = CountingReader(file_handle, counter)
+
+    # Digests are computed from the bytes read by the validator, and the rest
+    # of the file is read only after validation
+    reader = file_handle
+    if algorithms:
+        reader = HashingReader(file_handle, algorithms)
+
+    if not truncated:
+        validator = DpxValidator(
+            reader, path, file_stat, observer, file_size=file_size)
+        _, messages = validator.run_basic_procedures(memo=memo)
+        result.add_messages(messages)
+        result.magic_number = validator.magic_number
+        result.size = validator.file_size_in_bytes
+        result.version = validator.file_version
+
+        if deep and result.valid:
+            _, messages = validator.run_deep_procedures()
+            result.add_messages(messages)
+            result.image_statistics = validator.image_statistics
+
+    if algorithms:
+        if observer is not None:
+            started = perf_counter()
+            bytes_read, calls = counter.bytes_read, counter.calls
+        result.digests = reader.hexdigests()
+        if observer is not None:
+            observer.procedure(
+                path, "hexdigests", perf_counter() - started,
+                counter.bytes_read - bytes_read, counter.calls - calls,
+                None
+            )
+        result.add_messages([
+            message(MessageCode.DIGEST, name.upper(), digest)
+            for name, digest in result.digests.items()
+        ])
+
+    return result
+
+
+def _validate_data(
+    file_handle: BinaryIO,
+    name: str,
+    size: int,
+    deep: bool,
+    algorithms: Iterable[str],
+    observer: ValidationObserver | None,
+    memo: HeaderMemo | None = None
+) -> ValidationResult:
+    """Validate data which is not in a file and report it to the
+    observer."""
+    if observer is not None:
+        started = perf_counter()
+    counter = IOCounter() if observer is not None else None
+    result = _validate_handle(
+        file_handle, name, size, memo=memo, deep=deep,
+        algorithms=tuple(sorted(set(algorithms))), observer=observer,
+        counter=counter
+    )
+    if observer is not None:
+        observer.file(
+            name, perf_counter() - started, None, counter.bytes_read,
+            counter.calls, result.valid
+        )
+    return result
+
+
+def validate_buffer(
+    buffer: bytes | bytearray | memoryview | mmap,
+    total_size: int | None = None,
+    name: str = "<buffer>",
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    observer: ValidationObserver | None = None,
+    compact: bool = False
+) -> tuple[bool, dict, list] | ValidationResult:
+    """
+    Validate DPX data in memory without writing it to a file. The header is
+    decoded directly from the buffer.
+
+    The buffer may contain only the beginning of the file, such as the
+    header of a frame still being received, in which case the size of the
+    whole file is given as `total_size` for the truncation and size checks.
+
+    :param buffer: Bytes-like object with the data, such as `bytes`,
+        `memoryview` or `mmap.mmap`
+    :param total_size: Size of the whole file, defaults to the size of the
+        buffer
+    :param name: Name of the data for the observer
+    :param deep: Read through the image data, see `validate_file`
+    :param algorithms: Names of `hashlib` algorithms to compute digests of
+        the data with
+    :param observer: `dpx_validator.stats.ValidationObserver` to receive the
+        time and I/O of each procedure and the totals
+    :raises ValueError: Buffer does not contain the header, or it contains
+        only a part of the file and deep validation or digests are requested
+    :param compact: Return a `dpx_validator.result.ValidationResult`, see
+        `validate_file`
+    :returns: ``(valid, output, logs)`` tuple as in `validate_file`
+    """
+    reader = BufferReader(buffer)
+    length = len(reader.view)
+    if total_size is None:
+        total_size = length
+    if length < min(total_size, HEADER_BLOCK_SIZE):
+        raise ValueError(
+            "Buffer of %s bytes does not contain the header" % length)
+    if length < total_size and (deep or algorithms):
+        raise ValueError(
+            "Deep validation and digests need the whole file in the buffer")
+
+    result = _validate_data(
+        reader, name, total_size, deep, algorithms, observer)
+    return result if compact else result.as_tuple()
+
+
+def validate_stream(
+    fileobj: BinaryIO,
+    size: int,
+    name: str = "<stream>",
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    observer: ValidationObserver | None = None,
+    compact: bool = False
+) -> tuple[bool, dict, list] | ValidationResult:
+    """
+    Validate DPX data read from a binary file object of a known size, such
+    as an upload stream or a member of an archive.
+
+    Seekable file objects are read from their beginning. Other streams are
+    read forward from their current position and the skipped data is read
+    and discarded, so image elements must be stored in the order of their
+    numbers for deep validation.
+
+    :param fileobj: Readable binary file object
+    :param size: Size of the data in bytes
+    :param name: Name of the data for the observer
+    :param deep: Read through the image data, see `validate_file`
+    :param algorithms: Names of `hashlib` algorithms to compute digests of
+        the data with
+    :param observer: `dpx_validator.stats.ValidationObserver` to receive the
+        time and I/O of each procedure and the totals
+    :param compact: Return a `dpx_validator.result.ValidationResult`, see
+        `validate_file`
+    :returns: ``(valid, output, logs)`` tuple as in `validate_file`
+    """
+    seekable = getattr(fileobj, "seekable", None)
+    if seekable is None or not seekable():
+        fileobj = ForwardReader(fileobj)
+
+    result = _validate_data(fileobj, name, size, deep, algorithms, observer)
+    return result if compact else result.as_tuple()
+
+
+def validate_batch(
+    paths: Sequence[str | PathLike],
+    file_stats: Sequence[stat_result | None] | None = None,
+    compact: bool = False
+) -> list[tuple[str | PathLike, bool, dict, list]]:
+    """Validate the headers of a batch of files and return the results of
+    the invalid files.
+
+    The headers are checked together with
+    `dpx_validator.batch.failing_files`, and only the files failing a check
+    are validated one by one to produce their messages. The batch is read
+    into one buffer, so batches should be of a moderate size.
+
+    :param paths: Paths to DPX files
+    :param file_stats: Stat results of the files, see `validate_file`
+    :param compact: Return logs as `dpx_validator.messages.Message`
+        objects, see `validate_file`
+    :return: List of ``(path, valid, output, logs)`` tuples of the invalid
+        files in the order of `paths`, where ``valid``, ``output`` and
+        ``logs`` are as returned by `validate_file`
+    """
+    results = []
+    for index in sorted(failing_files(paths, file_stats)):
+        file_stat = file_stats[index] if file_stats is not None else None
+        try:
+            result = _validate_path(paths[index], file_stat)
+        except OSError as error:
+            result = ValidationResult.from_error(error)
+        if not result.valid:
+            results.append(
+                (paths[index], *(result if compact else result.as_tuple()))
+            )
+    return results
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable lazily into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _set_worker_manifest(key: int, manifest: Manifest) -> None:
+    """Keep the manifest of a pool in a worker process, so that chunks
+    refer to it by its key instead of carrying a copy of it."""
+    _worker_manifests[key] = manifest
+
+
+def _validate_chunk(
+    entries: list,
+    worker: bool = False,
+    options: dict | None = None
+) -> tuple[list[ValidationResult], ValidationObserver | None]:
+    """Validate a chunk of files.
+
+    :param entries: List of ``(path, file_stat)`` tuples where `file_stat`
+        may be None
+    :param worker: Chunk is validated in a worker process. The results are
+        pickled compactly as message codes and values.
+    :param options: Keyword arguments to `validate_file`. The result cache
+        is flushed after the chunk. In a worker process, the manifest is
+        given by its key in `_worker_manifests`.
+    :return: List of results and, in a worker process, the observer of the
+        chunk. With the ``invalid_only`` option, results of valid files are
+        None.
+    """
+    options = dict(options or {})
+    invalid_only = options.pop("invalid_only", False)
+    cache = options.get("cache")
+    memo = options.get("memo")
+    manifest = options.get("manifest")
+    observer = options.get("observer")
+    if worker:
+        # Keep one connection to the database and one memo in each worker
+        # process
+        if cache is not None:
+            cache = _worker_caches.setdefault(cache.path, cache)
+        if memo is not None:
+            memo = _worker_memos.setdefault(memo.maxsize, memo)
+        if manifest is not None:
+            manifest = _worker_manifests[manifest]
+        # Measurements of the chunk are sent back with the results
+        if observer is not None:
+            observer = observer.spawn()
+        options.update(
+            cache=cache, memo=memo, manifest=manifest, observer=observer)
+
+    failing = None
+    if invalid_only and _header_only(options):
+        failing = failing_files(
+            [path for path, _ in entries],
+            [file_stat for _, file_stat in entries]
+        )
+
+    results = []
+    for index, (path, file_stat) in enumerate(entries):
+        if failing is not None and index not in failing:
+            # Valid by the batch check
+            results.append(None)
+            continue
+        try:
+            result = _validate_path(path, file_stat, **options)
+        except OSError as error:
+            # A missing or unreadable file does not end the run
+            result = ValidationResult.from_error(error)
+        results.append(None if invalid_only and result.valid else result)
+
+    if cache is not None:
+        cache.flush()
 
-        validator = DpxValidator(file_handle, path)
-        valid, log_out = validator.run_basic_procedures()
-        output["magic_number"] = validator.magic_number
-        output["size"] = validator.file_size_in_bytes
-        output["version"] = validator.file_version
-        logs.extend(log_out)
-        return (valid, output, logs)
+    return (results, observer if worker else None)
+
+
+def _header_only(options: dict) -> bool:
+    """Check that the options of `validate_file` only validate the header
+    and report nothing but the result, so that a batch check of the headers
+    gives the same verdicts."""
+    return not (
+        options.get("deep") or options.get("algorithms") or
+        options.get("manifest") is not None or
+        options.get("cache") is not None or
+        options.get("observer") is not None
+    )
+
+
+def _validate_timed_chunk(
+    entries: list,
+    worker: bool = False,
+    options: dict | None = None
+) -> tuple[list[ValidationResult], ValidationObserver | None, float]:
+    """Validate a chunk of files with `_validate_chunk` and measure the
+    wall time of the chunk in the worker."""
+    started = perf_counter()
+    results, observer = _validate_chunk(entries, worker, options)
+    return (results, observer, perf_counter() - started)
+
+
+def validate_files(
+    paths: Iterable[str | PathLike],
+    workers: int | None = None,
+    ordered: bool = True,
+    processes: bool = False,
+    chunksize: int = 1,
+    cache: ResultCache | None = None,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    manifest: Manifest | None = None,
+    observer: ValidationObserver | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    schedule: str | None = None,
+    io_policy: IOPolicy | None = None,
+    compact: bool = False,
+    invalid_only: bool = False
+) -> Iterator[tuple[str | PathLike, bool, dict, list]]:
+    """
+    Validate multiple DPX files with a pool of threads or processes.
+
+    Header validation spends most of its time waiting for the filesystem, so
+    files are validated concurrently. Paths are consumed from the iterable
+    only as results are yielded, and at most ``2 * workers`` chunks of files
+    are pending at any time.
+
+    :param paths: Iterable of paths to DPX files
+    :param workers: Number of threads or processes, defaults to the number
+        of CPUs plus four (at most 32) for threads and to the number of CPUs
+        for processes
+    :param ordered: Yield results in the order of `paths`. If False, results
+        are yielded as soon as they are ready.
+    :param processes: Use a pool of processes instead of threads for
+        CPU-bound validation
+    :param chunksize: Number of files sent to a worker at once
+    :param cache: `dpx_validator.cache.ResultCache` for results of unchanged
+        files
+    :param memo: `dpx_validator.dpx_validator.HeaderMemo` to reuse outcomes
+        of frame independent procedures between frames of a sequence
+    :param deep: Read through the image data of files with a valid header
+    :param algorithms: Names of `hashlib` algorithms to compute digests of
+        the files with
+    :param manifest: `dpx_validator.fixity.Manifest` to verify the digests
+        of the files against
+    :param observer: `dpx_validator.stats.ValidationObserver` to receive
+        measurements of the validation. With processes, measurements are
+        collected in the workers by observers from its `spawn` method and
+        combined with `merge`.
+    :param concurrency: `dpx_validator.adaptive.AdaptiveConcurrency` to
+        choose the number of chunks in flight from the measured latency and
+        throughput, instead of keeping ``2 * workers`` chunks pending.
+        `workers` defaults to the maximum of the controller.
+    :param schedule: Validate windows of pending files in the order of
+        their location on the storage, "inode" or "extent", instead of the
+        order of `paths`. See `dpx_validator.scheduling`. The files are
+        stat'ed when they are scheduled, and results are still yielded in
+        the order of `paths` if `ordered` is True.
+    :param io_policy: `dpx_validator.iopolicy.IOPolicy` giving page cache
+        hints on the files. Header blocks are prefetched as the files are
+        queued for the workers.
+    :param compact: Yield logs as `dpx_validator.messages.Message` objects,
+        see `validate_file`
+    :param invalid_only: Yield the results of invalid files only. Unless
+        `deep`, `algorithms`, `manifest`, `cache` or `observer` is given,
+        the headers of each chunk are checked together with
+        `dpx_validator.batch.failing_files`, and only the files failing a
+        check are validated one by one. Use a `chunksize` of tens or
+        hundreds of files to benefit from it.
+    :return: Iterator of ``(path, valid, output, logs)`` tuples where
+        ``valid``, ``output`` and ``logs`` are as returned by
+        `validate_file`
+    """
+    return _validate_entries(
+        ((path, None) for path in paths),
+        workers=workers,
+        ordered=ordered,
+        processes=processes,
+        chunksize=chunksize,
+        cache=cache,
+        memo=memo,
+        deep=deep,
+        algorithms=algorithms,
+        manifest=manifest,
+        observer=observer,
+        concurrency=concurrency,
+        schedule=schedule,
+        io_policy=io_policy,
+        compact=compact,
+        invalid_only=invalid_only
+    )
+
+
+def _validate_entries(
+    entries: Iterable[tuple[str | PathLike, stat_result | None]],
+    workers: int | None = None,
+    ordered: bool = True,
+    processes: bool = False,
+    chunksize: int = 1,
+    concurrency: AdaptiveConcurrency | None = None,
+    schedule: str | None = None,
+    **options
+) -> Iterator[tuple[str | PathLike, bool, dict, list]]:
+    """Validate ``(path, file_stat)`` entries concurrently. See
+    `validate_files` for the parameters, `options` are passed on to
+    `validate_file`."""
+    if schedule is not None:
+        scheduler = Scheduler(schedule, restore_order=ordered)
+        results = _validate_pool(
+            scheduler.entries(entries), workers, ordered, processes,
+            chunksize, concurrency, **options
+        )
+        if ordered:
+            results = scheduler.restore(results)
+    else:
+        results = _validate_pool(
+            entries, workers, ordered, processes, chunksize, concurrency,
+            **options
+        )
+    if options.get("invalid_only"):
+        # Valid files are yielded without a result by the pool
+        results = (item for item in results if len(item) > 2)
+    return results
+
+
+def _validate_pool(
+    entries: Iterable[tuple[str | PathLike, stat_result | None]],
+    workers: int | None = None,
+    ordered: bool = True,
+    processes: bool = False,
+    chunksize: int = 1,
+    concurrency: AdaptiveConcurrency | None = None,
+    **options
+) -> Iterator[tuple[str | PathLike, bool, dict, list]]:
+    """Validate ``(path, file_stat)`` entries concurrently in the order
+    they are given."""
+    if workers is None and concurrency is not None:
+        workers = concurrency.maximum
+    if workers is None:
+        workers = cpu_count() or 1
+        if not processes:
+            workers = min(32, workers + 4)
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1")
+    if chunksize < 1:
+        raise ValueError("Chunk size must be at least 1")
+
+    manifest = options.get("manifest")
+    if processes and manifest is not None:
+        # The manifest may list a digest for each of millions of files, so
+        # it is sent to each worker process once when it starts
+        key = id(manifest)
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_set_worker_manifest,
+            initargs=(key, manifest)
+        )
+        options["manifest"] = key
+    elif processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    compact = options.pop("compact", False)
+    io_policy = options.get("io_policy")
+    if io_policy is not None:
+        entries = io_policy.lookahead(entries, key=itemgetter(0))
+
+    observer = options.get("observer")
+    if processes and observer is not None:
+        # Send an empty observer to the workers instead of the measurements
+        # collected so far
+        options["observer"] = observer.spawn()
+
+    max_pending = 2 * workers
+    pending: deque[Future] = deque()
+    chunk_paths: dict[Future, list] = {}
+
+    def completed() -> Iterator[tuple]:
+        """Remove the next completed chunks from pending and return their
+        results."""
+        if ordered:
+            done = [pending.popleft()]
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+
+        for future in done:
+            chunk = chunk_paths.pop(future)
+            if concurrency is None:
+                results, chunk_observer = future.result()
+            else:
+                results, chunk_observer, seconds = future.result()
+                concurrency.record(seconds, len(chunk))
+            if chunk_observer is not None:
+                observer.merge(chunk_observer)
+            for (path, _), result in zip(chunk, results):
+                if result is None:
+                    # Keeps the place of a valid file for the scheduler
+                    yield (path, None)
+                else:
+                    yield (path, *(result if compact else result.as_tuple()))
+
+    function = _validate_chunk
+    if concurrency is not None:
+        function = _validate_timed_chunk
+
+    try:
+        for chunk in _chunks(entries, chunksize):
+            future = executor.submit(function, chunk, processes, options)
+            chunk_paths[future] = chunk
+            pending.append(future)
+            if concurrency is not None:
+                max_pending = concurrency.limit
+            while len(pending) >= max_pending:
+                yield from completed()
+
+        while pending:
+            yield from completed()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _has_magic_number(path: str) -> bool:
+    """Check that a file begins with a DPX magic number. Files which cannot
+    be read are selected, so that validation reports the error."""
+    try:
+        with open(path, "rb") as file_handle:
+            return file_handle.read(4) in MAGIC_NUMBERS
+    except OSError:
+        return True
+
+
+def _is_dpx_member(
+    name: str, member: BinaryIO, extensions: tuple[str, ...] | None
+) -> bool:
+    """Check that an archive member is a DPX file by its name or by its
+    magic number. The member is left at its beginning."""
+    if extensions is not None:
+        return name.lower().endswith(extensions)
+    magic_number = member.read(4)
+    member.seek(0)
+    return magic_number in MAGIC_NUMBERS
+
+
+def scan_tree(
+    root: str | PathLike,
+    extensions: tuple[str, ...] | None = DPX_EXTENSIONS,
+    select: Callable[[str], bool] | None = None
+) -> Iterator[tuple[str, stat_result | None]]:
+    """
+    Find DPX files recursively from a directory.
+
+    Directories are walked with `os.scandir` in sorted order. Each file is
+    stat'ed once and the stat result is returned with the path so that it
+    can be passed on to `validate_file`. Symbolic links to directories are
+    not followed.
+
+    :param root: Directory to scan
+    :param extensions: Case insensitive file name extensions of DPX files.
+        If None, files are selected by their magic number instead, which
+        costs an extra read for each file.
+    :param select: Function returning False for the paths of files to skip
+        before they are stat'ed, such as files already validated
+    :return: Iterator of ``(path, file_stat)`` tuples. Files which cannot
+        be read or stat'ed are included, with a None stat result if the
+        stat failed, so that their errors are reported by validation.
+    """
+    directories = [root]
+    while directories:
+        with scandir(directories.pop()) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+                continue
+            if not entry.is_file():
+                continue
+            if extensions is not None:
+                if not entry.name.lower().endswith(extensions):
+                    continue
+            elif not _has_magic_number(entry.path):
+                continue
+            if select is not None and not select(entry.path):
+                continue
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                # File was removed during the walk, validation reports it
+                file_stat = None
+            yield (entry.path, file_stat)
+
+        # Walk subdirectories in sorted order
+        directories.extend(reversed(subdirectories))
+
+
+def validate_tree(
+    root: str | PathLike,
+    extensions: tuple[str, ...] | None = DPX_EXTENSIONS,
+    workers: int | None = None,
+    ordered: bool = True,
+    processes: bool = False,
+    chunksize: int = 1,
+    cache: ResultCache | None = None,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    manifest: Manifest | None = None,
+    observer: ValidationObserver | None = None,
+    select: Callable[[str], bool] | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    schedule: str | None = None,
+    io_policy: IOPolicy | None = None,
+    compact: bool = False,
+    invalid_only: bool = False
+) -> Iterator[tuple[str, bool, dict, list]]:
+    """
+    Validate DPX files found recursively from a directory.
+
+    Files are found with `scan_tree` and validated as in `validate_files`.
+    The stat result from the directory scan is reused in validation, so each
+    file is stat'ed only once.
+
+    :param root: Directory to scan
+    :param extensions: File name extensions of DPX files, see `scan_tree`
+    :param select: Function returning False for the paths of files to skip,
+        see `scan_tree`
+    :return: Iterator of ``(path, valid, output, logs)`` tuples
+
+    Other parameters are as in `validate_files`.
+    """
+    return _validate_entries(
+        scan_tree(root, extensions, select),
+        workers=workers,
+        ordered=ordered,
+        processes=processes,
+        chunksize=chunksize,
+        cache=cache,
+        memo=memo,
+        deep=deep,
+        algorithms=algorithms,
+        manifest=manifest,
+        observer=observer,
+        concurrency=concurrency,
+        schedule=schedule,
+        io_policy=io_policy,
+        compact=compact,
+        invalid_only=invalid_only
+    )
+
+
+def scan_archive(
+    path: str | PathLike,
+    extensions: tuple[str, ...] | None = DPX_EXTENSIONS
+) -> Iterator[tuple[str, int, BinaryIO]]:
+    """
+    Find DPX files in a tar or zip archive without extracting it.
+
+    Members are found in the order they are stored. In an uncompressed tar
+    archive, the headers of the members are read by seeking over the data of
+    the members. Members of zip archives are found from the central
+    directory, and only stored members can be read without decompressing
+    the data before the part read.
+
+    :param path: Path to a tar archive, possibly compressed, or a zip
+        archive
+    :param extensions: File name extensions of DPX files, see `scan_tree`
+    :raises tarfile.ReadError: File is not a tar or zip archive
+    :return: Iterator of ``(name, size, member)`` tuples, where `member` is
+        a seekable file object of the member, open until the next tuple is
+        taken
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    if _is_dpx_member(info.filename, member, extensions):
+                        yield (info.filename, info.file_size, member)
+        return
+
+    with tarfile.open(path) as archive:
+        # Members are iterated as their headers are read
+        for info in archive:
+            if not info.isreg():
+                continue
+            with archive.extractfile(info) as member:
+                if _is_dpx_member(info.name, member, extensions):
+                    yield (info.name, info.size, member)
+
+
+def validate_archive(
+    path: str | PathLike,
+    extensions: tuple[str, ...] | None = DPX_EXTENSIONS,
+    memo: HeaderMemo | None = None,
+    deep: bool = False,
+    algorithms: Iterable[str] = (),
+    observer: ValidationObserver | None = None,
+    compact: bool = False
+) -> Iterator[tuple[str, bool, dict, list]]:
+    """
+    Validate DPX files in a tar or zip archive without extracting it.
+
+    Members are found with `scan_archive` and validated with
+    `validate_stream`. Without `deep` and `algorithms` only the header block
+    of each member is read, and the file size in the header is compared with
+    the size of the member.
+
+    :param path: Path to the archive
+    :param extensions: File name extensions of DPX files, see `scan_tree`
+    :param memo: `dpx_validator.dpx_validator.HeaderMemo` to reuse outcomes
+        of frame independent procedures between members
+    :param compact: Yield logs as `dpx_validator.messages.Message` objects,
+        see `validate_file`
+    :return: Iterator of ``(path, valid, output, logs)`` tuples in the order
+        of the members, where path is the name of the member joined to the
+        path of the archive
+
+    Other parameters are as in `validate_file`.
+    """
+    for name, size, member in scan_archive(path, extensions):
+        member_path = join(fsdecode(path), name)
+        result = _validate_data(
+            member, member_path, size, deep, algorithms, observer, memo)
+        yield (member_path, *(result if compact else result.as_tuple()))
@@ -0,0 +1,258 @@
+"""Batch checking of DPX headers.
+
+The headers of many files are read into one buffer of fixed size records and
+decoded with a single `struct.Struct` compiled from the header layout, into
+a column for each field. `failing_files` evaluates the checks of
+`DpxValidator.run_basic_procedures` column by column over the whole batch,
+so that only the files which fail a check need to be validated one by one
+to produce their messages. `read_header_columns` is used by
+`dpx_validator.sequence` to compare the headers of the frames of a sequence.
+"""
+
+from __future__ import annotations
+import os
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+
+from dpx_validator.dpx_validator import (
+    IMAGE_ELEMENT_VALUES,
+    INTERLACE_VALUES,
+    DpxValidator)
+from dpx_validator.file_header_reader import (
+    BIGENDIAN_BYTEORDER,
+    LITTLEENDIAN_BYTEORDER)
+from dpx_validator.header_layout import (
+    GENERIC_LAYOUT,
+    HEADER_LAYOUT,
+    IMAGE_ELEMENT_LAYOUT,
+    IMAGE_ELEMENTS,
+    MAGIC_NUMBERS,
+    UNDEFINED_U32,
+    CompiledLayout)
+
+# Number of headers read into the buffer at once
+HEADER_BLOCK_FILES = 4096
+
+VALID_VERSIONS = (b"V2.0", b"V1.0")
+
+
+@lru_cache(maxsize=None)
+def compile_record(byte_order: str) -> CompiledLayout:
+    """Compile the generic and industry specific header into a single
+    record.
+
+    :param byte_order: Either `BIGENDIAN_BYTEORDER` or
+        `LITTLEENDIAN_BYTEORDER`
+    :returns: Compiled layout of the record
+    """
+    return CompiledLayout(HEADER_LAYOUT, byte_order)
+
+
+def _columns(records: list[tuple], names: tuple[str, ...]) -> dict:
+    """Transpose unpacked records into a column for each field."""
+    return dict(zip(names, zip(*records)))
+
+
+def _failing_indices(columns: dict, sizes: list[int]) -> set[int]:
+    """Evaluate the checks of `DpxValidator.run_basic_procedures` for each
+    column and return the indices of records failing any of them."""
+    failing = set()
+
+    def fail_where(name, predicate):
+        failing.update(
+            index for index, value in enumerate(columns[name])
+            if predicate(index, value)
+        )
+
+    fail_where("image", lambda index, offset: offset > sizes[index])
+    fail_where(
+        "version",
+        lambda _, version: version.rsplit(b"\0", 4)[0] not in VALID_VERSIONS
+    )
+    fail_where(
+        "filesize",
+        lambda index, filesize: filesize != sizes[index] and not
+        DpxValidator.check_funny_filesize(filesize, sizes[index])
+    )
+    fail_where("encryption_key", lambda _, key: "fffffff" not in hex(key))
+
+    # Image information
+    elements = columns["number_of_elements"]
+    fail_where("orientation", lambda _, orientation: orientation > 7)
+    fail_where(
+        "number_of_elements",
+        lambda _, number: not 1 <= number <= IMAGE_ELEMENTS
+    )
+    for name in ("pixels_per_line", "lines_per_element"):
+        fail_where(name, lambda _, value: value in (0, UNDEFINED_U32))
+
+    for element in range(1, IMAGE_ELEMENTS + 1):
+        for name, values in IMAGE_ELEMENT_VALUES.items():
+            fail_where(
+                f"element_{element}_{name}",
+                lambda index, value, element=element, values=values:
+                elements[index] >= element and value not in values
+            )
+
+    # Image data of each element should fit in the file
+    element_names = [name for name, _ in IMAGE_ELEMENT_LAYOUT]
+    for element in range(1, IMAGE_ELEMENTS + 1):
+        element_columns = [
+            columns[f"element_{element}_{name}"] for name in element_names
+        ]
+        for index, values in enumerate(zip(*element_columns)):
+            if elements[index] < element:
+                continue
+            fields = dict(zip(element_names, values))
+            data_size = DpxValidator.image_data_size(
+                fields,
+                columns["pixels_per_line"][index],
+                columns["lines_per_element"][index]
+            )
+            offset = fields["data_offset"]
+            if offset == UNDEFINED_U32 and element == 1:
+                offset = columns["image"][index]
+            if data_size is not None and offset != UNDEFINED_U32 and \
+                    offset + data_size > sizes[index]:
+                failing.add(index)
+
+    # Industry specific header
+    industry = columns["industry_header_size"]
+    fail_where(
+        "timecode",
+        lambda index, timecode: industry[index] not in (0, UNDEFINED_U32)
+        and not DpxValidator.check_timecode(timecode)
+    )
+    fail_where(
+        "interlace",
+        lambda index, interlace: industry[index] not in (0, UNDEFINED_U32)
+        and interlace not in INTERLACE_VALUES
+    )
+
+    return failing
+
+
+def failing_files(
+    paths: Sequence[str | os.PathLike],
+    file_stats: Sequence[os.stat_result | None] | None = None
+) -> set[int]:
+    """Check the headers of a batch of files field by field.
+
+    The batch is read into one buffer, so batches should be of a moderate
+    size, such as the chunks of `dpx_validator.api.validate_files`.
+
+    :param paths: Paths to DPX files
+    :param file_stats: Stat results of the files. Files are stat'ed if the
+        stat results are not given or are None.
+    :returns: Indices of the files which fail any check of
+        `DpxValidator.run_basic_procedures` or cannot be read. These are
+        validated one by one to produce their messages, the other files
+        are valid.
+    """
+    if not paths:
+        return set()
+    if file_stats is None:
+        file_stats = [None] * len(paths)
+
+    record = compile_record(BIGENDIAN_BYTEORDER)
+    generic_size = CompiledLayout(GENERIC_LAYOUT, BIGENDIAN_BYTEORDER).size
+    buffer = bytearray(record.size * len(paths))
+    view = memoryview(buffer)
+    sizes = []
+
+    # Files without a complete generic header are left as zeros in the
+    # buffer and validated separately
+    failing = set()
+    for index, (path, file_stat) in enumerate(zip(paths, file_stats)):
+        try:
+            if file_stat is None:
+                file_stat = os.stat(path)
+            sizes.append(file_stat.st_size)
+            if file_stat.st_size < generic_size:
+                failing.add(index)
+                continue
+            with open(path, "rb") as file_handle:
+                file_handle.readinto(
+                    view[index * record.size:(index + 1) * record.size])
+        except OSError:
+            # Validation reports the error
+            if len(sizes) == index:
+                sizes.append(0)
+            failing.add(index)
+
+    records = list(record.struct.iter_unpack(buffer))
+    magic_numbers = [fields[0] for fields in records]
+    failing.update(
+        index for index, magic_number in enumerate(magic_numbers)
+        if magic_number not in MAGIC_NUMBERS
+    )
+
+    # Records of little endian files are unpacked again
+    little_record = compile_record(LITTLEENDIAN_BYTEORDER)
+    for index, magic_number in enumerate(magic_numbers):
+        if magic_number == b"XPDS":
+            records[index] = little_record.struct.unpack_from(
+                buffer, index * record.size)
+
+    failing.update(
+        _failing_indices(_columns(records, record.names), sizes))
+    return failing
+
+
+def read_header_columns(
+    paths: Sequence[str | os.PathLike], names: Iterable[str]
+) -> dict[str, list]:
+    """Read header fields of files into a column per field.
+
+    The headers are read in blocks of `HEADER_BLOCK_FILES` files into one
+    buffer of a fixed size. Only the requested fields are kept, so memory
+    use grows with the number of files by one value per field and file.
+
+    :param paths: Paths of DPX files
+    :param names: Names of header fields from
+        `dpx_validator.header_layout.HEADER_LAYOUT`
+    :returns: Dict of lists of field values by name. Values of files which
+        cannot be read or do not begin with a magic number are None, as are
+        the industry specific fields of files which are shorter than the
+        industry header.
+    """
+    names = tuple(names)
+    big_record = compile_record(BIGENDIAN_BYTEORDER)
+    little_record = compile_record(LITTLEENDIAN_BYTEORDER)
+    generic_layout = CompiledLayout(GENERIC_LAYOUT, BIGENDIAN_BYTEORDER)
+    generic_size = generic_layout.size
+    indices = [big_record.names.index(name) for name in names]
+    generic = [index < len(generic_layout.names) for index in indices]
+
+    size = big_record.size
+    buffer = bytearray(size * min(HEADER_BLOCK_FILES, len(paths)))
+    view = memoryview(buffer)
+    columns = {name: [] for name in names}
+    lists = [columns[name] for name in names]
+    undefined = (None,) * len(names)
+    for start in range(0, len(paths), HEADER_BLOCK_FILES):
+        block = paths[start:start + HEADER_BLOCK_FILES]
+        lengths = []
+        for index, path in enumerate(block):
+            record_view = view[index * size:(index + 1) * size]
+            try:
+                with open(path, "rb") as file_handle:
+                    lengths.append(file_handle.readinto(record_view))
+            except OSError:
+                lengths.append(0)
+
+        for index, length in enumerate(lengths):
+            magic_number = bytes(view[index * size:index * size + 4])
+            row = undefined
+            if length >= generic_size and magic_number in MAGIC_NUMBERS:
+                record = big_record if magic_number == b"SDPX" \
+                    else little_record
+                values = record.struct.unpack_from(buffer, index * size)
+                row = tuple(
+                    values[field] if length >= size or in_generic else None
+                    for field, in_generic in zip(indices, generic)
+                )
+            for column, value in zip(lists, row):
+                column.append(value)
+
+    return columns
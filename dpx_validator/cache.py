@@ -0,0 +1,204 @@
+"""Persistent cache for validation results.
+
+Validation results are stored in an SQLite database and identified by the
+device and inode numbers of a file. A cached result is used only if the
+size and modification time of the file, the version of the validator and
+the kind of validation are the same as when the file was validated.
+Unchanged files can then be skipped with a stat call only.
+"""
+
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from os import stat_result
+
+from dpx_validator import __version__
+from dpx_validator.messages import MessageType
+from dpx_validator.result import ValidationResult
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "dpx-validator",
+    "results.sqlite"
+)
+# Defaults for evicting entries from the cache
+DEFAULT_MAX_ENTRIES = 10_000_000
+DEFAULT_MAX_AGE = 90 * 24 * 60 * 60
+# Number of pending results written to the database at once
+FLUSH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    checked REAL NOT NULL,
+    valid INTEGER NOT NULL,
+    output TEXT NOT NULL,
+    logs TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+CREATE INDEX IF NOT EXISTS results_checked ON results (checked);
+"""
+
+
+class ResultCache:
+    """
+    Validation results stored in an SQLite database.
+
+    The cache can be shared between threads. When the cache is passed to a
+    worker process, the process opens its own connection to the database.
+    Results are written in batches of `FLUSH_SIZE`, and `flush` or `close`
+    must be called to write the remaining results.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_age: float = DEFAULT_MAX_AGE
+    ) -> None:
+        """
+        :param path: Path to the database file, created if missing
+        :param max_entries: Number of entries kept in the cache by `prune`
+        :param max_age: Age in seconds after which `prune` removes entries
+        """
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending: list[tuple] = []
+
+    def __getstate__(self) -> dict:
+        """Pickle only the settings, the connection is opened again."""
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "max_age": self.max_age
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use. Must be called with the lock
+        held."""
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            connection = sqlite3.connect(
+                self.path, timeout=60, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+
+        return self._connection
+
+    def get(
+        self, file_stat: stat_result, profile: str = "basic"
+    ) -> ValidationResult | None:
+        """Get the cached result of an unchanged file.
+
+        :param file_stat: Stat result of the file
+        :param profile: Kind of validation the result is from, such as
+            "basic" or "deep"
+        :returns: Result as returned by `dpx_validator.api.validate_file`,
+            or None if the file is not in the cache or has changed
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT valid, output, logs FROM results "
+                "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? "
+                "AND version = ?",
+                (file_stat.st_dev, file_stat.st_ino, file_stat.st_size,
+                 file_stat.st_mtime_ns, f"{__version__}/{profile}")
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        valid, output, logs = row
+        return ValidationResult.from_tuple(
+            bool(valid),
+            json.loads(output),
+            [
+                (MessageType(msg_type), msg)
+                for msg_type, msg in json.loads(logs)
+            ]
+        )
+
+    def put(
+        self,
+        file_stat: stat_result,
+        result: ValidationResult,
+        profile: str = "basic"
+    ) -> None:
+        """Add the result of a file to be written to the cache.
+
+        :param file_stat: Stat result of the file
+        :param result: Result as returned by
+            `dpx_validator.api.validate_file`
+        :param profile: Kind of validation the result is from
+        """
+        valid, output, logs = result
+        with self._lock:
+            self._pending.append((
+                file_stat.st_dev, file_stat.st_ino, file_stat.st_size,
+                file_stat.st_mtime_ns, f"{__version__}/{profile}",
+                time.time(), valid,
+                json.dumps(output),
+                json.dumps([(msg_type.value, msg) for msg_type, msg in logs])
+            ))
+            full = len(self._pending) >= FLUSH_SIZE
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending results to the database in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO results VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._pending
+                )
+            self._pending = []
+
+    def prune(self) -> None:
+        """Remove entries older than `max_age` and the oldest entries in
+        excess of `max_entries`."""
+        self.flush()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "DELETE FROM results WHERE checked < ?",
+                (time.time() - self.max_age,)
+            )
+            connection.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                "SELECT rowid FROM results "
+                "ORDER BY checked DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def close(self) -> None:
+        """Write pending results and close the database."""
+        self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,102 @@
+"""Thin client of the validation server in `dpx_validator.server`.
+
+The client imports only the standard library modules it needs, so that
+starting it costs little more than starting the interpreter::
+
+    dpx-validator-client --socket /run/dpx-validator.sock frame.0001.dpx
+
+The JSON result of each file is written to standard output on its own line.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+
+def _send_requests(
+    connection: socket.socket, requests: Iterable[dict[str, Any]]
+) -> None:
+    """Send requests and shut down the sending side of the connection."""
+    with connection.makefile("wb") as stream:
+        for request in requests:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+    connection.shutdown(socket.SHUT_WR)
+
+
+def request_validation(
+    socket_path: str | os.PathLike,
+    paths: Iterable[str | os.PathLike],
+    deep: bool | None = None,
+    algorithms: Iterable[str] | None = None
+) -> Iterator[dict[str, Any]]:
+    """Validate files with a server.
+
+    Requests are sent in a separate thread while the results are received,
+    so any number of paths can be sent over one connection.
+
+    :param socket_path: Path of the socket of the server
+    :param paths: Paths of the files. Relative paths are made absolute,
+        since the server may run in another directory.
+    :param deep: Read through the image data, defaults to the setting of
+        the server
+    :param algorithms: Names of digest algorithms, defaults to the setting
+        of the server
+    :returns: Iterator of result dicts in the order of the paths
+    """
+    options = {}
+    if deep is not None:
+        options["deep"] = deep
+    if algorithms is not None:
+        options["algorithms"] = list(algorithms)
+    requests = (
+        dict(options, path=os.path.abspath(os.fsdecode(path)))
+        for path in paths
+    )
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(os.fspath(socket_path))
+        sender = threading.Thread(
+            target=_send_requests, args=(connection, requests), daemon=True)
+        sender.start()
+        with connection.makefile("rb") as responses:
+            for line in responses:
+                yield json.loads(line)
+        sender.join()
+
+
+def main(arguments=None):
+    """Validate files given as arguments with a server."""
+    parser = argparse.ArgumentParser(
+        prog="dpx-validator-client",
+        description="Validate DPX files with a dpx-validator server."
+    )
+    parser.add_argument("files", nargs="+", metavar="FILENAME")
+    parser.add_argument(
+        "--socket", required=True, metavar="PATH",
+        help="Path of the socket of the server"
+    )
+    parser.add_argument(
+        "--deep", action="store_true", default=None,
+        help="Read through the image data of the files"
+    )
+    parser.add_argument(
+        "--digest", action="append", dest="algorithms", metavar="ALGORITHM",
+        help="Compute a digest of each file, can be given multiple times"
+    )
+    args = parser.parse_args(arguments)
+
+    output = sys.stdout
+    for result in request_validation(
+            args.socket, args.files, args.deep, args.algorithms):
+        output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -22,14 +22,32 @@ call the `validate` function which will run each of the procedures
 """
 
 from __future__ import annotations
+import threading
+from collections import OrderedDict
 from collections.abc import Callable
 from struct import calcsize
-from os import stat, PathLike
+from os import stat, stat_result, PathLike
 from io import BufferedReader
+from time import perf_counter
 from typing import TypedDict
 
-from dpx_validator.messages import InvalidField, MessageType
+from dpx_validator.messages import (
+    InvalidField,
+    Message,
+    MessageCode,
+    MessageType,
+    message)
 from dpx_validator.file_header_reader import FileHeaderReader, FieldSpec
+from dpx_validator.image_data import aligned_line_size, scan_image_data
+from dpx_validator.stats import CountingReader, ValidationObserver
+from dpx_validator.header_layout import (
+    DESCRIPTOR_COMPONENTS,
+    IMAGE_ELEMENTS,
+    UNDEFINED_U8,
+    UNDEFINED_U32,
+    compile_layout,
+    image_element,
+    parse_header)
 
 
 # Dictionary for header fields for validation, from the beginning of file and
@@ -58,6 +76,112 @@ HEADER_POS: HeaderPos = {
     "encryption_key": {"offset": 660, "data_form": "I"},
 }
 
+# Header fields which differ between the frames of a sequence, as
+# (offset, length). These are ignored when results of frame independent
+# procedures are reused with `HeaderMemo`.
+FRAME_FIELDS = (
+    (16, 4),      # File size
+    (36, 100),    # Image file name
+    (136, 24),    # Creation date and time
+    (1668, 12),   # Film edge code: offset in perfs, prefix and count
+    (1712, 4),    # Frame position in sequence
+    (1732, 32),   # Frame identification
+    (1920, 8),    # SMPTE time code and user bits
+)
+
+# Procedures whose outcome depends on the file and not only on the header
+# fields outside `FRAME_FIELDS`
+FRAME_DEPENDENT_PROCEDURES = frozenset({
+    "check_offset_to_image",
+    "check_filesize",
+    "check_industry_header",
+    "check_image_data_size",
+})
+
+# Valid values of the image element fields
+DESCRIPTORS = frozenset({
+    0, 1, 2, 3, 4, 6, 7, 8, 9,          # Single components
+    50, 51, 52,                         # RGB, RGBA and ABGR
+    100, 101, 102, 103,                 # Y'CbCr
+    *range(150, 157),                   # User defined 2 to 8 components
+})
+BIT_SIZES = frozenset({1, 8, 10, 12, 16, 32, 64})
+IMAGE_ELEMENT_VALUES = {
+    "data_sign": frozenset({0, 1}),
+    "descriptor": DESCRIPTORS,
+    "bit_size": BIT_SIZES,
+    "packing": frozenset({0, 1, 2}),
+    "encoding": frozenset({0, 1}),
+}
+INTERLACE_VALUES = frozenset({0, 1, UNDEFINED_U8})
+
+
+class HeaderMemo:
+    """
+    LRU memo of the outcomes of frame independent procedures.
+
+    Frames of a DPX sequence usually have identical headers apart from the
+    `FRAME_FIELDS`. Outcomes of procedures not listed in
+    `FRAME_DEPENDENT_PROCEDURES` are stored by the header block with those
+    fields zeroed, and reused for the following frames. The memo can be
+    shared between threads.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """
+        :param maxsize: Number of distinct headers remembered
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Pickle only the settings, memo is not shared between
+        processes."""
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @staticmethod
+    def key(header: memoryview) -> bytes:
+        """Header block with the frame fields zeroed.
+
+        :param header: Header block read from the file
+        :returns: Key for the memo
+        """
+        masked = bytearray(header)
+        for offset, length in FRAME_FIELDS:
+            masked[offset:offset + length] = bytes(
+                len(masked[offset:offset + length])
+            )
+        return bytes(masked)
+
+    def get(self, key: bytes) -> dict | None:
+        """Get the memoized outcomes of a header.
+
+        :param key: Key from `key`
+        :returns: Dict with the validator state and procedure outcomes, or
+            None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: bytes, entry: dict) -> None:
+        """Memoize the outcomes of a header.
+
+        :param key: Key from `key`
+        :param entry: Dict with the validator state and procedure outcomes
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
 
 class DpxValidator:
     """
@@ -66,20 +190,38 @@ class DpxValidator:
     """
 
     def __init__(
-        self, file_handle: BufferedReader, path: str | PathLike
+        self,
+        file_handle: BufferedReader,
+        path: str | PathLike,
+        file_stat: stat_result | None = None,
+        observer: ValidationObserver | None = None,
+        file_size: int | None = None
     ) -> None:
+        # Procedures are timed and their I/O counted for the observer
+        self.observer = observer
+        self.counter = None
+        if observer is not None:
+            file_handle = CountingReader(file_handle)
+            self.counter = file_handle.counter
+
         self.reader = FileHeaderReader(file_handle)
 
         self.path = path
+        # Stat result of the file can be given to avoid another stat call
+        self.file_stat = file_stat
+        # Size of data which is not in a file, used instead of stat'ing
+        self.file_size = file_size
 
         # Collected during procedures
         self.magic_number = None
         self.file_size_in_bytes = None
         self.file_version = None
+        self.header = None
+        self.image_statistics = None
 
     # ************* Procedures start *****************
 
-    def check_magic_number(self) -> str:
+    def check_magic_number(self) -> Message:
         """Magic number should be integer of 'SDPX' or 'XPDS'.
 
         As this is the first validation procedure, if validation fails
@@ -87,23 +229,20 @@ class DpxValidator:
 
         :raises InvalidField: Field is invalid
 
-        :returns: log string
+        :returns: log message
         """
         field = self.reader.read_field(HEADER_POS["magic_number"])[0]
 
         if field == b"SDPX":
             self.magic_number = "SDPX"
-            return "Byte order is big endian"
+            return message(MessageCode.BIG_ENDIAN)
 
         if field == b"XPDS":
             self.reader.set_littleendian_byteorder()
             self.magic_number = "XPDS"
-            return (
-                "Byte order changed and file validated "
-                "with little endian byte order"
-            )
+            return message(MessageCode.LITTLE_ENDIAN)
 
-        raise InvalidField("Invalid magic number: %s" % field)
+        raise InvalidField(MessageCode.INVALID_MAGIC_NUMBER, field)
 
     def check_offset_to_image(self) -> None:
         """
@@ -116,22 +255,21 @@ class DpxValidator:
         """
         field = self.reader.read_field(HEADER_POS["image"])[0]
 
-        if not self.file_size_in_bytes:
-            self.file_size_in_bytes = stat(self.path).st_size
+        self.file_size_in_bytes = self.stat_file_size()
 
         if field > self.file_size_in_bytes:
             raise InvalidField(
-                "Offset to image (%s) is more than "
-                "file size (%s) " % (field, self.file_size_in_bytes)
+                MessageCode.INVALID_OFFSET_TO_IMAGE,
+                field, self.file_size_in_bytes
             )
 
-    def check_version(self) -> str:
+    def check_version(self) -> Message:
         """
         DPX version should be null terminated 'V2.0' or 'V1.0'.
 
         :raises InvalidField: Field is invalid
 
-        :returns: log string
+        :returns: log message
         """
         field = self.reader.read_field(HEADER_POS["version"])
 
@@ -139,38 +277,35 @@ class DpxValidator:
         version = version.rsplit(b"\0", 4)[0]
 
         if version not in [b"V2.0", b"V1.0"]:
-            raise InvalidField("Invalid header version %s" % version)
+            raise InvalidField(MessageCode.INVALID_VERSION, version)
 
         self.file_version = version.decode('ascii')
 
-        return f"Validated as version: {version.decode('ascii')}"
+        return message(MessageCode.VERSION, self.file_version)
 
-    def check_filesize(self) -> str:
+    def check_filesize(self) -> Message:
         """
         Filesize defined in header should match to that
         what filesystem tells.
 
         :raises InvalidField: filesize differs from header
 
-        :returns: log string
+        :returns: log message
         """
         field = self.reader.read_field(HEADER_POS["filesize"])[0]
 
-        if not self.file_size_in_bytes:
-            self.file_size_in_bytes = stat(self.path).st_size
+        self.file_size_in_bytes = self.stat_file_size()
 
         if field == self.file_size_in_bytes:
-            return "File size in header matches the file size"
+            return message(MessageCode.FILESIZE_MATCHES)
 
         if DpxValidator.check_funny_filesize(field, self.file_size_in_bytes):
-            return "Valid fuzzy filesize: header {}, stat {} bytes".format(
-                field, self.file_size_in_bytes
+            return message(
+                MessageCode.FUZZY_FILESIZE, field, self.file_size_in_bytes
             )
 
         raise InvalidField(
-            "Different file sizes from header ({}) and filesystem ({})".format(
-                field, self.file_size_in_bytes
-            )
+            MessageCode.INVALID_FILESIZE, field, self.file_size_in_bytes
         )
 
     def check_unencrypted(self) -> None:
@@ -182,16 +317,203 @@ class DpxValidator:
         field = self.reader.read_field(HEADER_POS["encryption_key"])[0]
 
         if "fffffff" not in hex(field):
+            raise InvalidField(MessageCode.ENCRYPTED)
+
+    def check_image_information(self) -> Message:
+        """
+        Image orientation, number of image elements and image dimensions
+        should be defined and valid. Other procedures for the generic header
+        skip files shorter than the header and leave the error to this one.
+
+        :raises InvalidField: Field is invalid
+
+        :returns: log message
+        """
+        header = self.read_header()
+
+        if header is None:
+            raise InvalidField(
+                MessageCode.SHORT_HEADER,
+                compile_layout(self.reader.byte_order)[0].size
+            )
+
+        if header["orientation"] > 7:
+            raise InvalidField(
+                MessageCode.INVALID_ORIENTATION, header["orientation"]
+            )
+
+        if not 1 <= header["number_of_elements"] <= IMAGE_ELEMENTS:
+            raise InvalidField(
+                MessageCode.INVALID_NUMBER_OF_ELEMENTS,
+                header["number_of_elements"]
+            )
+
+        for name in ("pixels_per_line", "lines_per_element"):
+            if header[name] in (0, UNDEFINED_U32):
+                raise InvalidField(MessageCode.UNDEFINED_DIMENSION, name)
+
+        return message(
+            MessageCode.IMAGE_INFORMATION,
+            header["number_of_elements"],
+            header["pixels_per_line"],
+            header["lines_per_element"]
+        )
+
+    def check_image_elements(self) -> None:
+        """
+        Data sign, descriptor, bit size, packing and encoding of each image
+        element in use should have a valid value.
+
+        :raises InvalidField: Field is invalid
+
+        :returns: None
+        """
+        header = self.read_header()
+        if header is None:
+            return
+        elements = min(header["number_of_elements"], IMAGE_ELEMENTS)
+
+        invalid = []
+        for element in range(1, elements + 1):
+            fields = image_element(header, element)
+            invalid.extend(
+                (name, fields[name], element)
+                for name, values in IMAGE_ELEMENT_VALUES.items()
+                if fields[name] not in values
+            )
+
+        if invalid:
+            raise InvalidField(MessageCode.INVALID_IMAGE_ELEMENTS, *invalid)
+
+    def check_industry_header(self) -> None:
+        """
+        Time code and interlace fields of the television information header
+        should be valid or undefined, if the file has an industry specific
+        header.
+
+        :raises InvalidField: Field is invalid
+
+        :returns: None
+        """
+        header = self.read_header()
+
+        if header is None or "timecode" not in header or \
+                header["industry_header_size"] in (0, UNDEFINED_U32):
+            return
+
+        if not DpxValidator.check_timecode(header["timecode"]):
+            raise InvalidField(
+                MessageCode.INVALID_TIMECODE, header["timecode"]
+            )
+
+        if header["interlace"] not in INTERLACE_VALUES:
             raise InvalidField(
-                "Encryption key in header not set to NULL or undefined"
+                MessageCode.INVALID_INTERLACE, header["interlace"]
             )
 
+    def check_image_data_size(self) -> None:
+        """
+        Image data of each image element, computed from the image
+        dimensions, descriptor, bit size, packing and padding, should fit
+        between the offset to data of the element and the end of file.
+
+        Elements with run length encoding or unknown number of components
+        are skipped.
+
+        :raises InvalidField: Image data exceeds the file
+
+        :returns: None
+        """
+        header = self.read_header()
+        if header is None:
+            return
+        file_size = self.stat_file_size()
+        elements = min(header["number_of_elements"], IMAGE_ELEMENTS)
+
+        for element in range(1, elements + 1):
+            fields = image_element(header, element)
+            data_size = DpxValidator.image_data_size(
+                fields, header["pixels_per_line"], header["lines_per_element"]
+            )
+            offset = fields["data_offset"]
+            if offset == UNDEFINED_U32 and element == 1:
+                offset = header["image"]
+            if data_size is None or offset == UNDEFINED_U32:
+                continue
+
+            if offset + data_size > file_size:
+                raise InvalidField(
+                    MessageCode.IMAGE_DATA_EXCEEDS_FILE,
+                    element, data_size, offset, file_size
+                )
+
+    # ************* Deep procedures ******************
+
+    def check_image_data(self) -> Message | None:
+        """
+        Padding bits in the image data should not be set. Image data of
+        each image element is read through and statistics of the samples
+        are collected to `image_statistics`.
+
+        :raises InvalidField: Image data is invalid
+
+        :returns: log message
+        """
+        header = self.read_header()
+        if header is None:
+            return None
+
+        self.image_statistics = scan_image_data(
+            self.reader.file_handle, header, self.reader.byte_order
+        )
+
+        return message(MessageCode.IMAGE_DATA, *(
+            None if statistics is None else (
+                statistics["minimum"], statistics["maximum"],
+                statistics["clipped"], statistics["black"]
+            )
+            for statistics in self.image_statistics
+        ))
+
     # ************* Special procedures ****************
 
+    def read_header(self) -> dict | None:
+        """Decode all header fields from the header block. The header is
+        decoded only once, after the byte order is known.
+
+        :returns: Dict of header fields by name, or None if the file is
+            shorter than the generic header
+        """
+        if self.header is None:
+            block = self.reader.read_header_block()
+            generic, _ = compile_layout(self.reader.byte_order)
+            if len(block) < generic.size:
+                return None
+            self.header = parse_header(
+                block, self.reader.byte_order, self.file_version or "V2.0"
+            )
+
+        return self.header
+
+    def stat_file_size(self) -> int:
+        """File size from the filesystem. The file is stat'ed only if stat
+        result or file size was not given to the validator, and only once.
+
+        :returns: File size in bytes
+        """
+        if self.file_size is not None:
+            return self.file_size
+        if self.file_stat is None:
+            self.file_stat = stat(self.path)
+
+        return self.file_stat.st_size
+
     @staticmethod
     def check_truncated(
         path: str | bytes | PathLike,
-        last_field: FieldSpec | None = None
+        last_field: FieldSpec | None = None,
+        file_stat: stat_result | None = None,
+        file_size: int | None = None
     ) -> bool:
         """Check for truncation to appropriately invalidate a partial file.
         Empty files are treated as truncated files.
@@ -201,14 +523,21 @@ class DpxValidator:
         :param path: Path to the file checked
         :param last_field: Field class with highest offset (and data_form size)
             , defaults to encryption_key field from HEADER_POS
+        :param file_stat: Stat result of the file, the file is stat'ed if not
+            given
+        :param file_size: Size of the file, used instead of the stat result
 
         :returns: True for truncation
 
         """
         if last_field is None:
             last_field = HEADER_POS["encryption_key"]
+        if file_size is None:
+            if file_stat is None:
+                file_stat = stat(path)
+            file_size = file_stat.st_size
 
-        return stat(path).st_size < last_field["offset"] + calcsize(
+        return file_size < last_field["offset"] + calcsize(
             last_field["data_form"]
         )
 
@@ -228,10 +557,145 @@ class DpxValidator:
             filesize - field < 8192
         )
 
+    @staticmethod
+    def image_data_size(
+        element: dict, pixels_per_line: int, lines_per_element: int
+    ) -> int | None:
+        """Compute the size of image data of an image element.
+
+        Lines are sized with `dpx_validator.image_data.aligned_line_size`,
+        and end of line and image padding are added.
+
+        :param element: Image element fields from
+            `dpx_validator.header_layout.image_element`
+        :param pixels_per_line: Image width
+        :param lines_per_element: Image height
+        :return: Size of image data in bytes, or None if it cannot be
+            computed from the header
+
+        """
+        components = DESCRIPTOR_COMPONENTS.get(element["descriptor"])
+        bit_size = element["bit_size"]
+        if components is None or element["encoding"] != 0 or \
+                bit_size not in BIT_SIZES:
+            return None
+
+        line_size = aligned_line_size(
+            bit_size, element["packing"], pixels_per_line * components)
+
+        if element["end_of_line_padding"] != UNDEFINED_U32:
+            line_size += element["end_of_line_padding"]
+
+        data_size = line_size * lines_per_element
+        if element["end_of_image_padding"] != UNDEFINED_U32:
+            data_size += element["end_of_image_padding"]
+
+        return data_size
+
+    @staticmethod
+    def check_timecode(timecode: int) -> bool:
+        """SMPTE time code should be undefined or binary coded decimal
+        hours, minutes, seconds and frames.
+
+        :param timecode: Time code field from the television header
+        :return: True if valid time code, otherwise False
+
+        """
+        if timecode == UNDEFINED_U32:
+            return True
+
+        digits = [(timecode >> shift) & 0xF for shift in range(28, -4, -4)]
+        if any(digit > 9 for digit in digits):
+            return False
+
+        hours = digits[0] * 10 + digits[1]
+        minutes = digits[2] * 10 + digits[3]
+        seconds = digits[4] * 10 + digits[5]
+        return hours < 24 and minutes < 60 and seconds < 60
+
     # ************* Procedures end *******************
 
+    @staticmethod
+    def run_procedure(
+        check: Callable[[], None | str | Message]
+    ) -> Message | None:
+        """Run a procedure and convert its outcome to a message.
+
+        :param check: Validation procedure
+        :returns: Error message for an invalid field, informational message
+            or None if the procedure returned nothing
+        """
+        try:
+            info = check()
+        except InvalidField as invalid:
+            return message(invalid.code, *invalid.args[1:])
+
+        if isinstance(info, Message):
+            return info
+        if info:
+            return message(MessageCode.INFO_TEXT, info)
+        return None
+
+    def _report(
+        self,
+        name: str,
+        start: tuple[float, int, int],
+        message: Message | None
+    ) -> None:
+        """Report a procedure to the observer.
+
+        :param name: Name of the procedure
+        :param start: Time and I/O counters from `_snapshot` before the
+            procedure
+        :param message: Message of the procedure
+        """
+        started, bytes_read, calls = start
+        self.observer.procedure(
+            self.path, name, perf_counter() - started,
+            self.counter.bytes_read - bytes_read,
+            self.counter.calls - calls, message
+        )
+
+    def _snapshot(self) -> tuple[float, int, int]:
+        """Current time and I/O counters."""
+        return (perf_counter(), self.counter.bytes_read, self.counter.calls)
+
+    def _run_observed(
+        self, check: Callable[[], None | str]
+    ) -> Message | None:
+        """Run a procedure with `run_procedure` and report it to the
+        observer, if any."""
+        if self.observer is None:
+            return self.run_procedure(check)
+
+        start = self._snapshot()
+        message = self.run_procedure(check)
+        self._report(check.__name__, start, message)
+        return message
+
+    def run_deep_procedures(self) -> tuple[bool, list]:
+        """
+        Run the procedures which read the image data. These are meant to be
+        run after the basic procedures have passed.
+
+        :return: tuple[bool, list] where the bool is validity and list includes
+            messages which were gathered.
+        """
+        deep_procedures: list[Callable[[], None | str]] = [
+            self.check_image_data,
+        ]
+        messages = [
+            message for message in map(self._run_observed, deep_procedures)
+            if message is not None
+        ]
+        validity = all(
+            msg_type != MessageType.ERROR for msg_type, _ in messages
+        )
+
+        return (validity, messages)
+
     def run_basic_procedures(
-        self, cut_on_error: bool = False
+        self, cut_on_error: bool = False, memo: HeaderMemo | None = None
     ) -> tuple[bool, list]:
         """
         Loop through the list of basic procedures inside
@@ -249,6 +713,8 @@ class DpxValidator:
 
         :param cut_on_error: Allows to stop iterating over the checks and
             return early.
+        :param memo: `HeaderMemo` to reuse outcomes of frame independent
+            procedures from files with an identical header
 
         :return: tuple[bool, list] where the bool is validity and list includes
             messages which were gathered.
@@ -259,19 +725,65 @@ class DpxValidator:
             self.check_version,
             self.check_filesize,
             self.check_unencrypted,
+            self.check_image_information,
+            self.check_image_elements,
+            self.check_industry_header,
+            self.check_image_data_size,
         ]
         validity = True
         messages = []
 
+        if self.observer is not None:
+            # Reading the header is reported separately from the checks
+            start = self._snapshot()
+            self.reader.read_header_block()
+            self._report("read_header_block", start, None)
+
+        memo_key = None
+        memoized = None
+        if memo is not None:
+            memo_key = memo.key(self.reader.read_header_block())
+            memoized = memo.get(memo_key)
+        if memoized is not None:
+            self.magic_number = memoized["magic_number"]
+            self.file_version = memoized["file_version"]
+            self.reader.byte_order = memoized["byte_order"]
+        outcomes = {}
+
         for check in basic_procedures:
-            try:
-                info = check()
-                if info:
-                    messages.append((MessageType.INFO, info))
-            except InvalidField as invalid:
-                messages.append((MessageType.ERROR, repr(invalid)))
+            name = check.__name__
+            if memoized is not None and name in memoized["outcomes"]:
+                message = memoized["outcomes"][name]
+                if self.observer is not None:
+                    self.observer.procedure(
+                        self.path, name, 0.0, 0, 0, message, memoized=True
+                    )
+            else:
+                message = self._run_observed(check)
+            outcomes[name] = message
+
+            if message is None:
+                continue
+            messages.append(message)
+            if message[0] == MessageType.ERROR:
                 validity = False
                 if cut_on_error:
                     return (validity, messages)
 
+        if self.observer is not None and self.magic_number is not None:
+            header = self.read_header()
+            if header is not None:
+                self.observer.header(self.path, header)
+
+        if memo is not None and memoized is None:
+            memo.put(memo_key, {
+                "magic_number": self.magic_number,
+                "file_version": self.file_version,
+                "byte_order": self.reader.byte_order,
+                "outcomes": {
+                    name: message for name, message in outcomes.items()
+                    if name not in FRAME_DEPENDENT_PROCEDURES
+                }
+            })
+
         return (validity, messages)
@@ -1,10 +1,18 @@
-from struct import unpack, calcsize
+from __future__ import annotations
+from functools import lru_cache
+from struct import Struct
 from io import BufferedReader
 from typing import TypedDict, Any
 
+from dpx_validator.streams import BufferReader
+
 LITTLEENDIAN_BYTEORDER = "<"
 BIGENDIAN_BYTEORDER = ">"
 
+# Generic (1664 bytes) and industry specific (384 bytes) header sections
+# are read from the file at once
+HEADER_BLOCK_SIZE = 2048
+
 
 class FieldSpec(TypedDict):
     """TypedDict to describe header fields."""
@@ -12,20 +20,66 @@ class FieldSpec(TypedDict):
     data_form: str
 
 
+@lru_cache(maxsize=None)
+def compiled_struct(byte_order: str, data_form: str) -> Struct:
+    """Return a precompiled `struct.Struct` for a byte order and data form.
+
+    :param byte_order: Either `BIGENDIAN_BYTEORDER` or
+        `LITTLEENDIAN_BYTEORDER`
+    :param data_form: Format string used by `struct`
+    :returns: Compiled `Struct` shared between readers
+    """
+    return Struct(byte_order + data_form)
+
+
 class FileHeaderReader:
     """
-    Reads the file
+    Reads the file header
+
+    The header block is read from the beginning of the file with a single
+    read into a buffer on first access, or viewed directly in the buffer of
+    a `dpx_validator.streams.BufferReader`. Fields within the block are
+    unpacked from the buffer, fields beyond it are read from the file.
     """
 
-    def __init__(self, file_handle: BufferedReader):
+    def __init__(
+        self,
+        file_handle: BufferedReader,
+        buffer: bytearray | None = None
+    ):
         # Default byte order for struct.unpack
         self.byte_order = BIGENDIAN_BYTEORDER
         self.file_handle = file_handle
 
+        # Buffer can be given by the caller to reuse it between files
+        if buffer is None:
+            buffer = bytearray(HEADER_BLOCK_SIZE)
+        self._buffer = buffer
+        self._header: memoryview | None = None
+
     def set_littleendian_byteorder(self) -> None:
         """Change byte order interpretation to littleendian"""
         self.byte_order = LITTLEENDIAN_BYTEORDER
 
+    def read_header_block(self) -> memoryview:
+        """Read the header block from the beginning of the file.
+
+        The block is read only once. If the file is shorter than
+        `HEADER_BLOCK_SIZE`, the returned view is shorter as well.
+
+        :returns: View to the bytes read from the beginning of the file
+        """
+        if self._header is None and isinstance(
+                self.file_handle, BufferReader):
+            # Data in memory is decoded without copying it
+            self._header = self.file_handle.getbuffer()[:HEADER_BLOCK_SIZE]
+        if self._header is None:
+            self.file_handle.seek(0)
+            length = self.file_handle.readinto(self._buffer) or 0
+            self._header = memoryview(self._buffer)[:length]
+
+        return self._header
+
     def read_field(
         self, header: FieldSpec
     ) -> tuple[Any, ...]:
@@ -36,9 +90,14 @@ class FileHeaderReader:
         :returns: Tuple containing the unpacked data in the specified format.
         """
 
-        length = calcsize(header["data_form"])
+        field = compiled_struct(self.byte_order, header["data_form"])
+
+        if header["offset"] + field.size <= len(self._buffer):
+            return field.unpack_from(
+                self.read_header_block(), header["offset"]
+            )
 
         self.file_handle.seek(header["offset"])
-        data = self.file_handle.read(length)
+        data = self.file_handle.read(field.size)
 
-        return unpack(self.byte_order + header["data_form"], data)
+        return field.unpack(data)
@@ -0,0 +1,280 @@
+"""Fixity digests computed while a file is validated.
+
+`HashingReader` wraps an open file and feeds every byte read through it to
+the hash functions. Validation reads the header and, in deep validation,
+the image data through the reader; the bytes which validation skips are read
+into a large reused buffer when the digests are requested. Each byte of the
+file is thus read from storage only once.
+
+Expected digests are read from md5sum style manifests (``<digest>  <path>``)
+or from BagIt payload manifests (``manifest-<algorithm>.txt``).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+from io import BufferedReader
+from typing import Any
+
+from dpx_validator.messages import Message, MessageCode, message
+
+# Algorithms which can be selected from the command line
+ALGORITHMS = ("md5", "sha1", "sha256", "sha512")
+
+# Size of the buffer the parts of the file skipped by validation are read
+# into
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Algorithms of md5sum style manifests by the length of the hex digest
+DIGEST_LENGTHS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+BAGIT_MANIFEST = re.compile(r"^(?:tag)?manifest-(\w+)\.txt$")
+# md5sum line of a digest and a path separated by two spaces, or by a space
+# and an asterisk in binary mode. The path is kept as is, including leading
+# whitespace.
+MD5SUM_LINE = re.compile(r"(\S+) [ *](.*)", re.DOTALL)
+
+# Buffer reused between files validated in the same thread
+_local = threading.local()
+
+
+def _thread_buffer() -> bytearray:
+    """Buffer of `DEFAULT_BUFFER_SIZE` bytes shared by the readers of the
+    current thread."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(DEFAULT_BUFFER_SIZE)
+    return buffer
+
+
+class HashingReader:
+    """
+    File wrapper computing digests of the file contents.
+
+    The reader supports the `seek`, `tell`, `read` and `readinto` methods
+    used by `dpx_validator.dpx_validator.DpxValidator`. Bytes are added to
+    the digests in file order: reading past the hashed part of the file
+    first hashes the bytes in between, and reading a part which is already
+    hashed does not hash it again.
+    """
+
+    def __init__(
+        self,
+        file_handle: BufferedReader,
+        algorithms: tuple[str, ...],
+        buffer: bytearray | None = None
+    ) -> None:
+        """
+        :param file_handle: File opened in binary mode at its beginning
+        :param algorithms: Names of `hashlib` algorithms
+        :param buffer: Buffer to read the skipped parts of the file into,
+            defaults to a buffer shared by the readers of the thread
+        :raises ValueError: Algorithm is not supported
+        """
+        self.file_handle = file_handle
+        self.hashes = {name: hashlib.new(name) for name in algorithms}
+        self._buffer = buffer
+        self._position = 0
+        self._hashed = 0
+        # Position of the underlying file. Seeks are made only when data is
+        # read, so that a file which can only be read forward is hashed in
+        # order.
+        self._file_position = 0
+
+    def _update(self, data: memoryview) -> None:
+        """Add data following the hashed part to the digests."""
+        for hash_object in self.hashes.values():
+            hash_object.update(data)
+        self._hashed += len(data)
+
+    def _seek_file(self, position: int) -> None:
+        """Move the underlying file to a position, if it is not there."""
+        if self._file_position != position:
+            self._file_position = self.file_handle.seek(position)
+
+    def _hash_until(self, end: int | None) -> None:
+        """Hash the file up to an offset, or to the end of the file if
+        `end` is None."""
+        if self._buffer is None:
+            self._buffer = _thread_buffer()
+        view = memoryview(self._buffer)
+        self._seek_file(self._hashed)
+        while end is None or self._hashed < end:
+            size = len(view)
+            if end is not None:
+                size = min(size, end - self._hashed)
+            length = self.file_handle.readinto(view[:size])
+            if not length:
+                break
+            self._update(view[:length])
+            self._file_position = self._hashed
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Change the position in the file."""
+        if whence == os.SEEK_CUR:
+            offset, whence = self._position + offset, os.SEEK_SET
+        if whence == os.SEEK_SET:
+            self._position = offset
+        else:
+            self._position = self._file_position = self.file_handle.seek(
+                offset, whence)
+        return self._position
+
+    def tell(self) -> int:
+        """Return the position in the file."""
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        """Read bytes into a buffer and hash the ones not hashed yet."""
+        position = self._position
+        if position > self._hashed:
+            self._hash_until(position)
+        self._seek_file(position)
+
+        length = self.file_handle.readinto(buffer) or 0
+        if position <= self._hashed < position + length:
+            with memoryview(buffer) as view:
+                self._update(view[self._hashed - position:length])
+        self._position = self._file_position = position + length
+        return length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes, or to the end of the file if `size` is
+        negative."""
+        if size is not None and size >= 0:
+            data = bytearray(size)
+            return bytes(data[:self.readinto(data)])
+
+        chunks = []
+        while chunk := self.read(DEFAULT_BUFFER_SIZE):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def hexdigests(self) -> dict[str, str]:
+        """Read the rest of the file and return the digests.
+
+        :returns: Dict of hex digests by algorithm
+        """
+        self._hash_until(None)
+        return {
+            name: hash_object.hexdigest()
+            for name, hash_object in self.hashes.items()
+        }
+
+
+def _normalize(path: str | os.PathLike) -> str:
+    """Absolute path used as the key of the manifest."""
+    return os.path.normpath(os.path.abspath(os.fsdecode(path)))
+
+
+class Manifest:
+    """Expected digests of files read from a manifest."""
+
+    def __init__(self, digests: dict[str, tuple[str, str]]) -> None:
+        """
+        :param digests: Dict of ``(algorithm, hex digest)`` tuples by path
+        """
+        self.digests = {
+            _normalize(path): (algorithm, digest.lower())
+            for path, (algorithm, digest) in digests.items()
+        }
+
+    @property
+    def algorithms(self) -> set[str]:
+        """Algorithms of the digests in the manifest."""
+        return {algorithm for algorithm, _ in self.digests.values()}
+
+    @classmethod
+    def from_file(
+        cls, path: str | os.PathLike, algorithm: str | None = None
+    ) -> Manifest:
+        """Read an md5sum or BagIt style manifest.
+
+        Each line contains a hex digest and a path, separated by two spaces
+        or by a space and an asterisk in md5sum manifests and by whitespace
+        in BagIt manifests. Relative paths are relative to the directory of
+        the manifest, which is the base directory of a bag in BagIt. The
+        algorithm is taken from the name of a BagIt manifest, such as
+        ``manifest-sha256.txt``, or else from the length of the digests.
+
+        :param path: Path to the manifest
+        :param algorithm: Algorithm of the digests, detected if not given
+        :raises ValueError: Manifest contains an invalid line
+        :returns: Manifest of the listed files
+        """
+        path = os.fsdecode(path)
+        directory = os.path.dirname(os.path.abspath(path))
+        bagit = BAGIT_MANIFEST.match(os.path.basename(path))
+        if algorithm is None and bagit:
+            algorithm = bagit.group(1).lower()
+
+        digests = {}
+        with open(path, encoding="utf-8") as manifest:
+            for number, line in enumerate(manifest, start=1):
+                line = line.rstrip("\r\n")
+                if not line.strip():
+                    continue
+
+                escaped = line.startswith("\\") and not bagit
+                if escaped:
+                    line = line[1:]
+                if bagit:
+                    fields = line.split(None, 1)
+                else:
+                    match = MD5SUM_LINE.fullmatch(line)
+                    fields = match.groups() if match else ()
+                if len(fields) != 2:
+                    raise ValueError(
+                        "Invalid line %s in manifest %s" % (number, path)
+                    )
+                digest, name = fields
+
+                if bagit:
+                    # BagIt percent encodes line breaks and percent signs
+                    name = name.replace("%0A", "\n").replace(
+                        "%0D", "\r").replace("%25", "%")
+                else:
+                    # md5sum escapes backslashes and line breaks
+                    if escaped:
+                        name = re.sub(
+                            r"\\(.)",
+                            lambda match: "\n" if match.group(1) == "n"
+                            else match.group(1),
+                            name
+                        )
+
+                line_algorithm = algorithm or DIGEST_LENGTHS.get(len(digest))
+                if line_algorithm is None:
+                    raise ValueError(
+                        "Unknown digest algorithm on line %s in manifest %s"
+                        % (number, path)
+                    )
+                digests[os.path.join(directory, name)] = (
+                    line_algorithm, digest
+                )
+
+        return cls(digests)
+
+    def verify(
+        self, path: str | os.PathLike, digests: dict[str, str]
+    ) -> list[Message]:
+        """Compare the digests of a file with the manifest.
+
+        :param path: Path to the file
+        :param digests: Dict of hex digests by algorithm, as returned by
+            `HashingReader.hexdigests`
+        :returns: Log messages of the verification
+        """
+        expected = self.digests.get(_normalize(path))
+        if expected is None:
+            return [message(MessageCode.NOT_IN_MANIFEST)]
+
+        algorithm, digest = expected
+        actual = digests.get(algorithm)
+        if actual != digest:
+            return [message(
+                MessageCode.DIGEST_MISMATCH, algorithm.upper(), actual, digest
+            )]
+
+        return [message(MessageCode.DIGEST_MATCHES, algorithm.upper())]
@@ -0,0 +1,236 @@
+"""Layout of the DPX file header.
+
+The header fields are defined declaratively in the order they appear in the
+file, following SMPTE ST 268. Each field is a ``(name, data_form)`` tuple
+where the name is None for reserved bytes. The layout is compiled into a
+single `struct.Struct` so that the whole header is decoded with one
+`unpack_from` call.
+
+The generic section (file, image and orientation headers, 1664 bytes) is
+required in every DPX file. The industry specific section (film and
+television headers, 384 bytes) follows it and is decoded only if the file
+is long enough.
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from struct import Struct
+from typing import Any
+
+# Magic numbers of big and little endian DPX files
+MAGIC_NUMBERS = (b"SDPX", b"XPDS")
+
+# Number of image element descriptors in the image information header
+IMAGE_ELEMENTS = 8
+
+# Values of all ones mark an undefined field
+UNDEFINED_U8 = 0xFF
+UNDEFINED_U16 = 0xFFFF
+UNDEFINED_U32 = 0xFFFFFFFF
+
+# Number of components in each pixel by descriptor. User defined descriptor
+# and color difference (CbCr) are not known.
+DESCRIPTOR_COMPONENTS = {
+    1: 1, 2: 1, 3: 1, 4: 1, 6: 1, 8: 1, 9: 1,
+    50: 3, 51: 4, 52: 4,
+    100: 2, 101: 3, 102: 3, 103: 4,
+    **{descriptor: descriptor - 148 for descriptor in range(150, 157)},
+}
+
+IMAGE_ELEMENT_LAYOUT = (
+    ("data_sign", "I"),
+    ("reference_low_data_code", "I"),
+    ("reference_low_quantity", "f"),
+    ("reference_high_data_code", "I"),
+    ("reference_high_quantity", "f"),
+    ("descriptor", "B"),
+    ("transfer", "B"),
+    ("colorimetric", "B"),
+    ("bit_size", "B"),
+    ("packing", "H"),
+    ("encoding", "H"),
+    ("data_offset", "I"),
+    ("end_of_line_padding", "I"),
+    ("end_of_image_padding", "I"),
+    ("description", "32s"),
+)
+
+GENERIC_LAYOUT = (
+    # File information header
+    ("magic_number", "4s"),
+    ("image", "I"),
+    ("version", "8s"),
+    ("filesize", "I"),
+    ("ditto_key", "I"),
+    ("generic_header_size", "I"),
+    ("industry_header_size", "I"),
+    ("user_data_size", "I"),
+    ("file_name", "100s"),
+    ("creation_time", "24s"),
+    ("creator", "100s"),
+    ("project", "200s"),
+    ("copyright", "200s"),
+    ("encryption_key", "I"),
+    (None, "104x"),
+    # Image information header
+    ("orientation", "H"),
+    ("number_of_elements", "H"),
+    ("pixels_per_line", "I"),
+    ("lines_per_element", "I"),
+    *(
+        (f"element_{element}_{name}", data_form)
+        for element in range(1, IMAGE_ELEMENTS + 1)
+        for name, data_form in IMAGE_ELEMENT_LAYOUT
+    ),
+    (None, "52x"),
+    # Image source (orientation) information header
+    ("x_offset", "I"),
+    ("y_offset", "I"),
+    ("x_center", "f"),
+    ("y_center", "f"),
+    ("x_original_size", "I"),
+    ("y_original_size", "I"),
+    ("source_file_name", "100s"),
+    ("source_creation_time", "24s"),
+    ("input_device", "32s"),
+    ("input_serial", "32s"),
+    ("border_left", "H"),
+    ("border_right", "H"),
+    ("border_top", "H"),
+    ("border_bottom", "H"),
+    ("aspect_ratio_horizontal", "I"),
+    ("aspect_ratio_vertical", "I"),
+    (None, "28x"),
+)
+
+INDUSTRY_LAYOUT = (
+    # Motion-picture film information header
+    ("film_manufacturer_id", "2s"),
+    ("film_type", "2s"),
+    ("film_offset", "2s"),
+    ("film_prefix", "6s"),
+    ("film_count", "4s"),
+    ("film_format", "32s"),
+    ("frame_position", "I"),
+    ("sequence_length", "I"),
+    ("held_count", "I"),
+    ("film_frame_rate", "f"),
+    ("shutter_angle", "f"),
+    ("frame_id", "32s"),
+    ("slate_info", "100s"),
+    (None, "56x"),
+    # Television information header
+    ("timecode", "I"),
+    ("user_bits", "I"),
+    ("interlace", "B"),
+    ("field_number", "B"),
+    ("video_signal", "B"),
+    (None, "x"),
+    ("horizontal_sample_rate", "f"),
+    ("vertical_sample_rate", "f"),
+    ("tv_frame_rate", "f"),
+    ("time_offset", "f"),
+    ("gamma", "f"),
+    ("black_level", "f"),
+    ("black_gain", "f"),
+    ("break_point", "f"),
+    ("white_level", "f"),
+    ("integration_times", "f"),
+    (None, "76x"),
+)
+
+# Generic and industry specific sections together
+HEADER_LAYOUT = GENERIC_LAYOUT + INDUSTRY_LAYOUT
+
+# Versions V1.0 and V2.0 share the same field offsets
+LAYOUTS = {
+    "V1.0": (GENERIC_LAYOUT, INDUSTRY_LAYOUT),
+    "V2.0": (GENERIC_LAYOUT, INDUSTRY_LAYOUT),
+}
+
+
+class CompiledLayout:
+    """Header layout compiled into a `struct.Struct`."""
+
+    __slots__ = ("struct", "names")
+
+    def __init__(self, layout: tuple, byte_order: str) -> None:
+        """
+        :param layout: Tuple of ``(name, data_form)`` fields
+        :param byte_order: Either `BIGENDIAN_BYTEORDER` or
+            `LITTLEENDIAN_BYTEORDER`
+        """
+        self.struct = Struct(
+            byte_order + "".join(data_form for _, data_form in layout)
+        )
+        self.names = tuple(name for name, _ in layout if name is not None)
+
+    @property
+    def size(self) -> int:
+        """Size of the layout in bytes."""
+        return self.struct.size
+
+    def unpack_from(self, buffer: Any, offset: int = 0) -> dict[str, Any]:
+        """Decode the fields of the layout from a buffer.
+
+        :param buffer: Buffer containing the header
+        :param offset: Offset of the layout in the buffer
+        :returns: Dict of field values by name
+        """
+        return dict(zip(self.names, self.struct.unpack_from(buffer, offset)))
+
+
+@lru_cache(maxsize=None)
+def compile_layout(
+    byte_order: str, version: str = "V2.0"
+) -> tuple[CompiledLayout, CompiledLayout]:
+    """Compile the generic and industry specific header layouts.
+
+    :param byte_order: Either `BIGENDIAN_BYTEORDER` or
+        `LITTLEENDIAN_BYTEORDER`
+    :param version: DPX version, unknown versions use the V2.0 layout
+    :returns: Tuple of the compiled generic and industry layouts
+    """
+    generic, industry = LAYOUTS.get(version, LAYOUTS["V2.0"])
+    return (
+        CompiledLayout(generic, byte_order),
+        CompiledLayout(industry, byte_order)
+    )
+
+
+def parse_header(
+    buffer: Any, byte_order: str, version: str = "V2.0"
+) -> dict[str, Any]:
+    """Decode the header fields from the beginning of a buffer.
+
+    :param buffer: Buffer beginning with the DPX header
+    :param byte_order: Either `BIGENDIAN_BYTEORDER` or
+        `LITTLEENDIAN_BYTEORDER`
+    :param version: DPX version
+    :raises struct.error: Buffer is shorter than the generic section
+    :returns: Dict of field values by name. Industry specific fields are
+        included only if the buffer contains the industry section.
+    """
+    generic, industry = compile_layout(byte_order, version)
+    header = generic.unpack_from(buffer)
+    if len(buffer) >= generic.size + industry.size:
+        header.update(industry.unpack_from(buffer, generic.size))
+    return header
+
+
+def image_element(header: dict[str, Any], element: int) -> dict[str, Any]:
+    """Fields of an image element descriptor.
+
+    :param header: Header from `parse_header`
+    :param element: Number of the image element, from 1 to 8
+    :returns: Dict of the image element fields without the element prefix
+    """
+    return {
+        name: header[f"element_{element}_{name}"]
+        for name, _ in IMAGE_ELEMENT_LAYOUT
+    }
+
+
+def decode_string(value: bytes) -> str:
+    """Decode a null terminated ASCII string field."""
+    return value.split(b"\0", 1)[0].decode("ascii", errors="replace")
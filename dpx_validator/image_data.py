@@ -0,0 +1,314 @@
+"""Streaming scan of DPX image data.
+
+Image data of each image element is read in chunks of whole lines into a
+reused buffer, so memory use does not depend on the image size. Samples
+are unpacked a line at a time: the line is read as one integer, the samples
+in each position of the 32-bit or 16-bit words are masked out at once and
+converted to an `array.array`, whose minimum, maximum and counts are
+computed in C. Packed 10-bit and 12-bit samples are a stream of bits
+filling 32-bit words from the least significant bit. They are masked out
+of groups of samples ending on a byte boundary in the same way.
+"""
+
+from __future__ import annotations
+import sys
+from array import array
+from functools import lru_cache
+from io import BufferedReader
+
+from dpx_validator.file_header_reader import LITTLEENDIAN_BYTEORDER
+from dpx_validator.header_layout import (
+    DESCRIPTOR_COMPONENTS,
+    IMAGE_ELEMENTS,
+    UNDEFINED_U32,
+    image_element)
+from dpx_validator.messages import InvalidField, MessageCode
+
+# Size of the buffer image data is read into
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Sample formats by bit size and packing as (bytes in a word, bit shifts of
+# the samples in a word, mask of the padding bits). 8-bit and 16-bit samples
+# do not depend on packing. Packed samples are unpacked from groups of
+# bytes instead of words, and their padding is after the last sample.
+SAMPLE_FORMATS = {
+    (10, 0): (5, (0, 10, 20, 30), 0),       # Packed
+    (10, 1): (4, (22, 12, 2), 0x00000003),  # Filled, method A
+    (10, 2): (4, (20, 10, 0), 0xC0000000),  # Filled, method B
+    (12, 0): (3, (0, 12), 0),
+    (12, 1): (2, (4,), 0x000F),
+    (12, 2): (2, (0,), 0xF000),
+    (8, None): (1, (0,), 0),
+    (16, None): (2, (0,), 0),
+}
+TYPECODES = {1: "B", 2: "H", 4: "I"}
+
+
+def aligned_line_size(bit_size: int, packing: int, samples: int) -> int:
+    """Compute the size of a line of image data without end of line
+    padding.
+
+    Lines are stored as 32-bit words. 10-bit samples filled with method A
+    or B take three samples in a word, and filled 12-bit and 16-bit
+    samples two samples in a word. Other samples are packed without gaps.
+
+    :param bit_size: Bit size of the samples
+    :param packing: Packing of the samples
+    :param samples: Number of samples in a line
+    :returns: Size of the line in bytes
+    """
+    if bit_size == 10 and packing in (1, 2):
+        return (samples + 2) // 3 * 4
+    if bit_size == 16 or bit_size == 12 and packing in (1, 2):
+        return (samples + 1) // 2 * 4
+    return (samples * bit_size + 31) // 32 * 4
+
+
+@lru_cache(maxsize=256)
+def _lane_mask(value: int, word_size: int, words: int) -> int:
+    """Integer with `value` repeated in each of `words` words."""
+    return int.from_bytes(value.to_bytes(word_size, "big") * words, "big")
+
+
+class SampleStatistics:
+    """Minimum, maximum and clipped samples of an image element."""
+
+    __slots__ = ("bit_size", "minimum", "maximum", "clipped", "samples")
+
+    def __init__(self, bit_size: int) -> None:
+        self.bit_size = bit_size
+        self.minimum: int | None = None
+        self.maximum: int | None = None
+        self.clipped = 0
+        self.samples = 0
+
+    def update(self, samples: array) -> None:
+        """Add samples to the statistics."""
+        if not samples:
+            return
+        low = min(samples)
+        high = max(samples)
+        if self.minimum is None or low < self.minimum:
+            self.minimum = low
+        if self.maximum is None or high > self.maximum:
+            self.maximum = high
+        self.clipped += samples.count((1 << self.bit_size) - 1)
+        self.samples += len(samples)
+
+    def as_dict(self, black_level: int = 0) -> dict:
+        """Statistics as a dict.
+
+        :param black_level: Code value of reference black. Image is black if
+            no sample exceeds it.
+        """
+        return {
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "clipped": self.clipped,
+            "samples": self.samples,
+            "black": self.maximum is not None and
+            self.maximum <= black_level,
+        }
+
+
+def _scan_line(
+    line: memoryview,
+    samples: int,
+    sample_format: tuple,
+    byte_order: str,
+    statistics: SampleStatistics
+) -> bool:
+    """Unpack the samples of a line into the statistics.
+
+    :returns: False if padding bits are set, otherwise True
+    """
+    word_size, shifts, padding = sample_format
+    order = "little" if byte_order == LITTLEENDIAN_BYTEORDER else "big"
+    full_words, remainder = divmod(samples, len(shifts))
+    data = line[:full_words * word_size]
+    valid = True
+
+    if shifts == (0,) and not padding:
+        # Samples fill whole words
+        values = array(TYPECODES[word_size])
+        values.frombytes(data)
+        if order != sys.byteorder:
+            values.byteswap()
+        statistics.update(values)
+    elif full_words:
+        value = int.from_bytes(data, order)
+        if value & _lane_mask(padding, word_size, full_words):
+            valid = False
+        sample_mask = _lane_mask(
+            (1 << statistics.bit_size) - 1, word_size, full_words)
+        for shift in shifts:
+            values = array(TYPECODES[word_size])
+            values.frombytes(
+                ((value >> shift) & sample_mask).to_bytes(
+                    len(data), sys.byteorder))
+            statistics.update(values)
+
+    if remainder:
+        # Last word of the line is only partially used
+        word = int.from_bytes(
+            line[full_words * word_size:(full_words + 1) * word_size], order)
+        if word & padding:
+            valid = False
+        statistics.update(array("I", [
+            (word >> shift) & ((1 << statistics.bit_size) - 1)
+            for shift in shifts[:remainder]
+        ]))
+
+    return valid
+
+
+def _scan_packed_line(
+    line: memoryview,
+    samples: int,
+    sample_format: tuple,
+    byte_order: str,
+    statistics: SampleStatistics
+) -> bool:
+    """Unpack the packed samples of a line into the statistics.
+
+    :returns: False if bits after the last sample are set, otherwise True
+    """
+    group_size, shifts, _ = sample_format
+    bit_size = statistics.bit_size
+    words = array("I")
+    words.frombytes(line)
+    order = "little" if byte_order == LITTLEENDIAN_BYTEORDER else "big"
+    if order != sys.byteorder:
+        words.byteswap()
+    if sys.byteorder != "little":
+        words.byteswap()
+    # Bits of the line from the least significant bit of the first word
+    stream = words.tobytes()
+
+    groups, remainder = divmod(samples, len(shifts))
+    if groups:
+        sample_mask = _lane_mask((1 << bit_size) - 1, 2, groups)
+        lanes = bytearray(groups * 2)
+        for shift in shifts:
+            start = shift // 8
+            lanes[0::2] = stream[start:groups * group_size:group_size]
+            lanes[1::2] = stream[start + 1:groups * group_size:group_size]
+            values = array("H")
+            values.frombytes(
+                ((int.from_bytes(lanes, "little") >> shift % 8) &
+                 sample_mask).to_bytes(len(lanes), "little"))
+            if sys.byteorder != "little":
+                values.byteswap()
+            statistics.update(values)
+
+    tail = int.from_bytes(stream[groups * group_size:], "little")
+    if remainder:
+        statistics.update(array("I", [
+            (tail >> shift) & ((1 << bit_size) - 1)
+            for shift in shifts[:remainder]
+        ]))
+    return not tail >> remainder * bit_size
+
+
+def scan_element(
+    file_handle: BufferedReader,
+    header: dict,
+    element: int,
+    byte_order: str,
+    buffer: bytearray
+) -> dict | None:
+    """Scan the image data of an image element.
+
+    :param file_handle: DPX file opened in binary mode
+    :param header: Header from `dpx_validator.header_layout.parse_header`
+    :param element: Number of the image element
+    :param byte_order: Byte order of the file
+    :param buffer: Buffer to read image data into
+    :raises InvalidField: Padding bits or end of line padding are set or
+        image data is truncated
+    :returns: Statistics of the samples, or None if the sample format or
+        data offset of the element is not supported
+    """
+    fields = image_element(header, element)
+    components = DESCRIPTOR_COMPONENTS.get(fields["descriptor"])
+    bit_size = fields["bit_size"]
+    packing = None if bit_size in (8, 16) else fields["packing"]
+    sample_format = SAMPLE_FORMATS.get((bit_size, packing))
+    offset = fields["data_offset"]
+    if offset == UNDEFINED_U32 and element == 1:
+        offset = header["image"]
+    if components is None or sample_format is None or \
+            fields["encoding"] != 0 or offset == UNDEFINED_U32:
+        return None
+
+    samples = header["pixels_per_line"] * components
+    word_size, shifts, _ = sample_format
+    line_size = aligned_line_size(bit_size, fields["packing"], samples)
+    if packing == 0:
+        scan_line = _scan_packed_line
+        used_size = line_size
+    else:
+        scan_line = _scan_line
+        used_size = -(-samples // len(shifts)) * word_size
+    stride = line_size
+    if fields["end_of_line_padding"] != UNDEFINED_U32:
+        stride += fields["end_of_line_padding"]
+    # Unused bytes of the last word and end of line padding
+    zeros = bytes(stride - used_size)
+
+    lines = header["lines_per_element"]
+    lines_per_chunk = max(1, len(buffer) // stride)
+    if len(buffer) < stride:
+        buffer.extend(bytes(stride - len(buffer)))
+    view = memoryview(buffer)
+
+    statistics = SampleStatistics(bit_size)
+    padding_valid = True
+    file_handle.seek(offset)
+
+    for first_line in range(0, lines, lines_per_chunk):
+        chunk_lines = min(lines_per_chunk, lines - first_line)
+        chunk_size = chunk_lines * stride
+        read = file_handle.readinto(view[:chunk_size])
+        if read < chunk_size:
+            raise InvalidField(MessageCode.TRUNCATED_IMAGE_DATA, element)
+        for line in range(chunk_lines):
+            start = line * stride
+            padding_valid &= scan_line(
+                view[start:start + used_size], samples, sample_format,
+                byte_order, statistics
+            )
+            if zeros:
+                padding_valid &= \
+                    view[start + used_size:start + stride] == zeros
+
+    if not padding_valid:
+        raise InvalidField(MessageCode.PADDING_BITS_SET, element)
+
+    black_level = fields["reference_low_data_code"]
+    if black_level == UNDEFINED_U32:
+        black_level = 0
+    return statistics.as_dict(black_level)
+
+
+def scan_image_data(
+    file_handle: BufferedReader,
+    header: dict,
+    byte_order: str,
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> list[dict | None]:
+    """Scan the image data of each image element in use.
+
+    :param file_handle: DPX file opened in binary mode
+    :param header: Header from `dpx_validator.header_layout.parse_header`
+    :param byte_order: Byte order of the file
+    :param buffer_size: Size of the buffer image data is read into
+    :raises InvalidField: Image data is invalid
+    :returns: List of sample statistics of each image element in order
+    """
+    buffer = bytearray(buffer_size)
+    elements = min(header["number_of_elements"], IMAGE_ELEMENTS)
+    return [
+        scan_element(file_handle, header, element, byte_order, buffer)
+        for element in range(1, elements + 1)
+    ]
@@ -0,0 +1,125 @@
+"""Page cache hints for the files read by the validator.
+
+An `IOPolicy` gives the kernel hints with `os.posix_fadvise` around the
+reads of each file:
+
+- With `prefetch`, the header blocks of the next queued files are
+  requested with ``POSIX_FADV_WILLNEED`` before they are validated, so that
+  the kernel reads them ahead while earlier files are validated.
+- With `drop`, files read in full for ``--deep`` or digests are marked with
+  ``POSIX_FADV_NOREUSE``, and the pages of each validated file are released
+  with ``POSIX_FADV_DONTNEED``, so that a large sweep does not evict the
+  page cache of other services on the host.
+
+The policies of the ``--io-policy`` option are in `IO_POLICIES`. On
+platforms without `os.posix_fadvise` the hints are not given.
+"""
+
+from __future__ import annotations
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, BinaryIO
+
+from dpx_validator.file_header_reader import HEADER_BLOCK_SIZE
+
+# Number of queued files whose header blocks are prefetched
+PREFETCH_FILES = 8
+
+_fadvise = getattr(os, "posix_fadvise", None)
+
+
+def _advise(fd: int, offset: int, length: int, advice: str) -> None:
+    """Give advice on a range of a file, ignoring filesystems and platforms
+    which do not support it."""
+    if _fadvise is None or not hasattr(os, advice):
+        return
+    try:
+        _fadvise(fd, offset, length, getattr(os, advice))
+    except OSError:
+        pass
+
+
+class IOPolicy:
+    """Hints given to the kernel on the files read by the validator."""
+
+    def __init__(self, prefetch: int = 0, drop: bool = False) -> None:
+        """
+        :param prefetch: Number of queued files whose header blocks are
+            prefetched
+        :param drop: Release the pages of each file after it is validated
+        """
+        if prefetch < 0:
+            raise ValueError("Number of prefetched files must not be negative")
+        self.prefetch = prefetch
+        self.drop = drop
+
+    def __repr__(self) -> str:
+        return "IOPolicy(prefetch=%s, drop=%s)" % (self.prefetch, self.drop)
+
+    def lookahead(
+        self,
+        items: Iterable[Any],
+        key: Callable[[Any], str | os.PathLike] | None = None
+    ) -> Iterator[Any]:
+        """Prefetch the header blocks of the files `prefetch` items ahead of
+        the item yielded.
+
+        :param items: Iterable of paths, or of items with a path
+        :param key: Function returning the path of an item, if the items are
+            not paths
+        :returns: Iterator of the items
+        """
+        if not self.prefetch or _fadvise is None:
+            yield from items
+            return
+
+        queued: deque = deque()
+        for item in items:
+            prefetch_header(item if key is None else key(item))
+            queued.append(item)
+            if len(queued) > self.prefetch:
+                yield queued.popleft()
+        yield from queued
+
+    def opened(self, file_handle: BinaryIO, bulk: bool) -> None:
+        """Give hints on a file opened for validation.
+
+        :param file_handle: File opened for validation
+        :param bulk: The image data of the file will be read
+        """
+        if self.drop and bulk:
+            _advise(file_handle.fileno(), 0, 0, "POSIX_FADV_NOREUSE")
+
+    def release(self, file_handle: BinaryIO) -> None:
+        """Give hints on a file after it is validated.
+
+        :param file_handle: File opened for validation
+        """
+        if self.drop:
+            _advise(file_handle.fileno(), 0, 0, "POSIX_FADV_DONTNEED")
+
+
+def prefetch_header(path: str | os.PathLike) -> None:
+    """Ask the kernel to read the header block of a file ahead.
+
+    :param path: Path to the file. Files which cannot be opened are
+        skipped, the error is reported when they are validated.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        _advise(fd, 0, HEADER_BLOCK_SIZE, "POSIX_FADV_WILLNEED")
+    finally:
+        os.close(fd)
+
+
+# Policies of the --io-policy option
+IO_POLICIES = {
+    "normal": IOPolicy(),
+    "prefetch": IOPolicy(prefetch=PREFETCH_FILES),
+    "nocache": IOPolicy(drop=True),
+    "shared": IOPolicy(prefetch=PREFETCH_FILES, drop=True),
+}
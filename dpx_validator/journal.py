@@ -0,0 +1,205 @@
+"""Checkpoint journal of validation results.
+
+The journal is an append-only file with a JSON object per validated file::
+
+    {"path": "/reel/frame.0001.dpx", "valid": true, "output": {...},
+     "messages": [[12, "V2.0"], ...]}
+
+Messages are stored as their `dpx_validator.messages.MessageCode` and raw
+values, so results read back from the journal are identical to the results
+written. Results are written in batches which are synced to disk with
+`os.fsync`, so an interrupted run loses at most the last batch. A line cut
+short by an interruption is removed when the journal is opened again.
+
+Runs which are split between several nodes select their part of the files
+with `in_shard`.
+"""
+
+from __future__ import annotations
+import json
+import os
+import time
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+from dpx_validator.messages import Message, message, text_message
+from dpx_validator.result import ValidationResult
+
+# Number of results after which the journal is synced to disk
+SYNC_RESULTS = 1000
+# Seconds after which the journal is synced to disk if results are pending
+SYNC_INTERVAL = 5.0
+
+
+def _encode_value(value: Any) -> Any:
+    """Message value as JSON. Bytes, such as an invalid version, are stored
+    as ``{"bytes": <hex>}``."""
+    if isinstance(value, bytes):
+        return {"bytes": value.hex()}
+    if isinstance(value, tuple):
+        return [_encode_value(item) for item in value]
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """Message value from JSON. Lists are converted to tuples, so that the
+    values are hashable."""
+    if isinstance(value, list):
+        return tuple(_decode_value(item) for item in value)
+    if isinstance(value, dict):
+        return bytes.fromhex(value["bytes"])
+    return value
+
+
+def _encode_message(msg: Message | tuple) -> list:
+    """Message as a list of its code and values."""
+    if not isinstance(msg, Message):
+        msg = text_message(*msg)
+    return [msg.code, *map(_encode_value, msg.args)]
+
+
+def read_journal(
+    path: str | os.PathLike
+) -> Iterator[tuple[str, ValidationResult]]:
+    """Read the results recorded in a journal.
+
+    :param path: Path to the journal
+    :returns: Iterator of ``(path, result)`` tuples in the order they were
+        recorded. A line cut short at the end of the journal is skipped.
+    """
+    with open(path, "rb") as journal:
+        for line in journal:
+            if not line.endswith(b"\n"):
+                break
+            record = json.loads(line)
+            result = ValidationResult(
+                record["valid"],
+                tuple(
+                    message(code, *map(_decode_value, args))
+                    for code, *args in record["messages"]
+                ),
+                **record["output"]
+            )
+            yield (record["path"], result)
+
+
+class Journal:
+    """Append-only journal of validation results."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        sync_results: int = SYNC_RESULTS,
+        sync_interval: float = SYNC_INTERVAL
+    ) -> None:
+        """
+        Open a journal, creating it if it does not exist. The paths of the
+        results already recorded are read into `done`.
+
+        :param path: Path to the journal
+        :param sync_results: Number of results after which the journal is
+            synced to disk
+        :param sync_interval: Seconds after which pending results are synced
+            to disk when the next result is recorded
+        """
+        self.path = os.fspath(path)
+        self.sync_results = sync_results
+        self.sync_interval = sync_interval
+        self.done: set[str] = set()
+
+        if os.path.exists(self.path):
+            self._recover()
+        self._file = open(self.path, "ab")
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def _recover(self) -> None:
+        """Read the recorded paths and remove a line cut short."""
+        complete = 0
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                if not line.endswith(b"\n"):
+                    break
+                self.done.add(json.loads(line)["path"])
+                complete += len(line)
+        if complete < os.path.getsize(self.path):
+            os.truncate(self.path, complete)
+
+    def record(
+        self,
+        path: str | os.PathLike,
+        valid: bool,
+        output: dict[str, Any],
+        logs: list[Message]
+    ) -> None:
+        """Append the result of a file to the journal.
+
+        :param path: Path of the file
+        :param valid: Validity of the file
+        :param output: Details of the file
+        :param logs: Messages of the validation
+        """
+        path = os.fsdecode(path)
+        line = json.dumps({
+            "path": path,
+            "valid": valid,
+            "output": {
+                key: value for key, value in output.items()
+                if value is not None
+            },
+            "messages": [_encode_message(msg) for msg in logs],
+        }) + "\n"
+        self._file.write(line.encode("ascii"))
+        self.done.add(path)
+
+        self._pending += 1
+        if self._pending >= self.sync_results or \
+                time.monotonic() - self._synced >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write the pending results to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a shard given as ``i/N``.
+
+    :param shard: Shard number from 1 to N and the number of shards
+    :raises ValueError: Shard is not valid
+    :returns: Tuple of the shard number and the number of shards
+    """
+    number, _, count = shard.partition("/")
+    number, count = int(number), int(count)
+    if not 1 <= number <= count:
+        raise ValueError("Shard must be i/N with 1 <= i <= N")
+    return (number, count)
+
+
+def in_shard(path: str | os.PathLike, number: int, count: int) -> bool:
+    """Check whether a file belongs to a shard. Files are assigned to the
+    shards by a checksum of the path, so that each node selects the same
+    files from the same list without coordination.
+
+    :param path: Path of the file
+    :param number: Shard number from 1 to `count`
+    :param count: Number of shards
+    :returns: True if the file belongs to the shard
+    """
+    return zlib.crc32(os.fsencode(path)) % count == number - 1
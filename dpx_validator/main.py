@@ -1,32 +1,552 @@
 """DPXv: DPX file format validator"""
 
+import argparse
+import os
+import signal
 import sys
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain
 
-from dpx_validator.api import validate_file
-from dpx_validator.messages import create_commandline_messages
+from dpx_validator.adaptive import DEFAULT_MAX_LIMIT, AdaptiveConcurrency
+from dpx_validator.api import (
+    validate_archive,
+    validate_file,
+    validate_files,
+    validate_tree)
+from dpx_validator.cache import DEFAULT_CACHE_PATH, ResultCache
+from dpx_validator.fixity import ALGORITHMS, Manifest
+from dpx_validator.iopolicy import IO_POLICIES
+from dpx_validator.journal import Journal, in_shard, parse_shard, read_journal
+from dpx_validator.output import FORMATS, buffered
+from dpx_validator.result import ValidationResult
+from dpx_validator.scheduling import SCHEDULES
+from dpx_validator.sequence import SequenceCollector, check_sequences
+from dpx_validator.server import ValidationServer
+from dpx_validator.stats import ObserverGroup, StatisticsCollector
+
+# Upper limit for the number of files sent to a worker process at once
+MAX_CHUNKSIZE = 256
+# Number of files sent to a worker process at once when the number of files
+# is not known in advance
+DIRECTORY_CHUNKSIZE = 64
+# Size of the chunks path lists are read in
+READ_CHUNK_SIZE = 64 * 1024
+# Value of --jobs for adaptive concurrency
+AUTO_JOBS = "auto"
+# Value of --schedule for validating files in the order they are given
+NAME_SCHEDULE = "name"
 
 
 class MissingFiles(Exception):
     """Missing file paths to check."""
 
 
+def _jobs(value):
+    """Number of jobs or `AUTO_JOBS` from the command line."""
+    if value == AUTO_JOBS:
+        return value
+    return int(value)
+
+
+def parse_arguments(arguments):
+    """Parse command line arguments.
+
+    :param arguments: List of command line arguments without the program name
+    :returns: `argparse.Namespace` of the parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="dpx-validator",
+        description="Validate the header fields of DPX files."
+    )
+    parser.add_argument("files", nargs="*", metavar="FILENAME")
+    parser.add_argument(
+        "-r", "--recursive", action="append", default=[], metavar="DIR",
+        help="Validate DPX files found recursively from a directory, can be "
+             "given multiple times"
+    )
+    parser.add_argument(
+        "-a", "--archive", action="append", default=[], metavar="PATH",
+        help="Validate DPX files in a tar or zip archive without extracting "
+             "it, can be given multiple times"
+    )
+    parser.add_argument(
+        "--from-file", metavar="PATH",
+        help="Validate files listed in a file, one path per line, or read "
+             "from standard input if PATH is -. Validation starts while the "
+             "list is being read."
+    )
+    parser.add_argument(
+        "-0", "--null", action="store_true",
+        help="Paths in --from-file are separated by NUL characters, as "
+             "written by find -print0"
+    )
+    parser.add_argument(
+        "--journal", metavar="PATH",
+        help="Append the result of each file to a journal and skip the "
+             "files already recorded in it, to resume an interrupted run"
+    )
+    parser.add_argument(
+        "--report-journal", metavar="PATH",
+        help="Write the results recorded in a journal in the output format "
+             "without validating files"
+    )
+    parser.add_argument(
+        "--sequences", action="store_true",
+        help="Group the files into numbered frame sequences and report "
+             "missing and duplicate frames, header fields differing between "
+             "frames and discontinuous time codes after the files"
+    )
+    parser.add_argument(
+        "--shard", metavar="I/N",
+        help="Validate only the I-th of N deterministic parts of the files, "
+             "to split a run between nodes"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=_jobs, default=os.cpu_count() or 1,
+        help="Number of worker processes, defaults to the number of CPUs. "
+             "With auto, files are validated in threads and the number of "
+             "files in flight is adjusted to the latency and throughput of "
+             "the storage."
+    )
+    parser.add_argument(
+        "--schedule", choices=(NAME_SCHEDULE, *SCHEDULES),
+        default=NAME_SCHEDULE,
+        help="Order files are read in. With inode or extent, pending files "
+             "are validated in the order of their inode numbers or physical "
+             "extents to reduce seeking on rotational and tape-backed "
+             "storage. Results are written in the order of the paths in "
+             "any case. Defaults to %(default)s."
+    )
+    parser.add_argument(
+        "--io-policy", choices=tuple(IO_POLICIES), default="normal",
+        help="Page cache hints. prefetch reads the header blocks of the next "
+             "files ahead, nocache releases the pages of validated files to "
+             "keep the page cache of other programs, and shared does both. "
+             "Defaults to %(default)s."
+    )
+    parser.add_argument(
+        "--max-jobs", type=int, default=DEFAULT_MAX_LIMIT, metavar="N",
+        help="Upper limit of files in flight with --jobs auto, defaults to "
+             "%(default)s"
+    )
+    parser.add_argument(
+        "--deep", action="store_true",
+        help="Read through the image data of files with a valid header, "
+             "check padding bits and report statistics of the samples"
+    )
+    parser.add_argument(
+        "--digest", action="append", default=[], choices=ALGORITHMS,
+        dest="algorithms", metavar="ALGORITHM",
+        help="Compute a digest of each file while it is validated, can be "
+             "given multiple times. One of: %(choices)s"
+    )
+    parser.add_argument(
+        "--manifest", metavar="PATH",
+        help="Verify the files against an md5sum or BagIt style manifest"
+    )
+    parser.add_argument(
+        "--invalid-only", action="store_true",
+        help="Report only the invalid files. Without --deep, --digest, "
+             "--manifest, --stats and --cache, the headers of the files "
+             "sent to a worker at once are checked together and only the "
+             "failing files are validated one by one."
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Report latency percentiles and I/O of each procedure and the "
+             "number of failures to standard error at the end"
+    )
+    parser.add_argument(
+        "--format", choices=sorted(FORMATS), default="text",
+        help="Output format: text messages, a JSON object per file (jsonl) "
+             "or a row per message (csv), defaults to %(default)s"
+    )
+    parser.add_argument(
+        "--cache", action=argparse.BooleanOptionalAction, default=False,
+        help="Reuse results of unchanged files from earlier runs"
+    )
+    parser.add_argument(
+        "--cache-file", default=DEFAULT_CACHE_PATH, metavar="PATH",
+        help="Path to the result cache database, defaults to %(default)s"
+    )
+
+    args = parser.parse_args(arguments)
+    if args.jobs != AUTO_JOBS and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.max_jobs < 1:
+        parser.error("--max-jobs must be at least 1")
+    if args.archive and args.manifest:
+        parser.error("--manifest cannot be used with --archive")
+    if args.null and not args.from_file:
+        parser.error("--null requires --from-file")
+    if args.archive and (args.journal or args.shard):
+        parser.error("--journal and --shard cannot be used with --archive")
+    if args.sequences and (args.archive or args.shard):
+        parser.error("--sequences cannot be used with --archive or --shard")
+    if args.invalid_only and (args.journal or args.sequences):
+        parser.error(
+            "--invalid-only cannot be used with --journal or --sequences")
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError:
+            parser.error("--shard must be I/N with 1 <= I <= N")
+
+    return args
+
+
+def _terminate(signum, frame):
+    """Exit on SIGTERM, so that files are closed and state is saved."""
+    raise SystemExit(0)
+
+
+def _selected(path, journal=None, shard=None):
+    """Check that a file is not recorded in the journal and belongs to the
+    shard."""
+    if journal is not None and path in journal.done:
+        return False
+    return shard is None or in_shard(path, *shard)
+
+
+def report_journal(path, output_format="text"):
+    """Write the results recorded in a journal to standard output and
+    standard error.
+
+    :param path: Path to the journal
+    :param output_format: Name of the output format in
+        `dpx_validator.output.FORMATS`
+    """
+    with buffered(sys.stdout) as stdout, buffered(sys.stderr) as stderr:
+        writer = FORMATS[output_format](stdout, stderr)
+        for dpx_file, result in read_journal(path):
+            writer.add(dpx_file, *result)
+        writer.summary()
+
+
+def parse_serve_arguments(arguments):
+    """Parse command line arguments of the ``serve`` command.
+
+    :param arguments: List of command line arguments after ``serve``
+    :returns: `argparse.Namespace` of the parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="dpx-validator serve",
+        description="Validate DPX files requested over a Unix domain socket."
+    )
+    parser.add_argument(
+        "--socket", required=True, metavar="PATH",
+        help="Path of the socket to listen on"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="Number of threads validating files, defaults to the number of "
+             "CPUs plus four (at most 32)"
+    )
+    parser.add_argument(
+        "--deep", action="store_true",
+        help="Read through the image data of files by default"
+    )
+    parser.add_argument(
+        "--digest", action="append", default=[], choices=ALGORITHMS,
+        dest="algorithms", metavar="ALGORITHM",
+        help="Compute a digest of each file by default, can be given "
+             "multiple times. One of: %(choices)s"
+    )
+    parser.add_argument(
+        "--cache", action=argparse.BooleanOptionalAction, default=False,
+        help="Reuse results of unchanged files"
+    )
+    parser.add_argument(
+        "--cache-file", default=DEFAULT_CACHE_PATH, metavar="PATH",
+        help="Path to the result cache database, defaults to %(default)s"
+    )
+
+    args = parser.parse_args(arguments)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    return args
+
+
+def serve(arguments):
+    """Run the validation server until it is interrupted or terminated."""
+    args = parse_serve_arguments(arguments)
+    cache = ResultCache(args.cache_file) if args.cache else None
+
+    signal.signal(signal.SIGTERM, _terminate)
+    server = ValidationServer(
+        args.socket, workers=args.jobs, cache=cache, deep=args.deep,
+        algorithms=args.algorithms
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if cache is not None:
+            cache.prune()
+            cache.close()
+
+
+def read_paths(stream, separator=b"\n"):
+    """Read paths from a binary stream as they arrive.
+
+    :param stream: Binary stream of the paths
+    :param separator: Byte which separates the paths
+    :returns: Iterator of paths, empty paths are skipped
+    """
+    read = getattr(stream, "read1", stream.read)
+    remainder = b""
+    while chunk := read(READ_CHUNK_SIZE):
+        *paths, remainder = (remainder + chunk).split(separator)
+        for path in paths:
+            if path:
+                yield os.fsdecode(path)
+    if remainder:
+        yield os.fsdecode(remainder)
+
+
+def validate_path_list(
+    source, separator=b"\n", jobs=1, select=None, schedule=None, **options
+):
+    """Validate files listed in a file or standard input.
+
+    Paths are read only as fast as files are validated, so memory use does
+    not depend on the length of the list.
+
+    :param source: Path to the list, or "-" for standard input
+    :param separator: Byte which separates the paths
+    :param jobs: Number of worker processes or an adaptive controller, see
+        `validate_paths`
+    :param select: Function returning False for the paths to skip
+    :param schedule: Validate the files in the order of their location on
+        the storage, see `validate_paths`
+    :param options: Keyword arguments to
+        `dpx_validator.api.validate_file`
+    :returns: Iterator of ``(path, valid, output, logs)`` tuples in the order
+        of the list
+    """
+    if source == "-":
+        context = nullcontext(sys.stdin.buffer)
+    else:
+        context = open(source, "rb")
+
+    with context as stream:
+        paths = read_paths(stream, separator)
+        if select is not None:
+            paths = filter(select, paths)
+        yield from _validate_path_iterator(
+            paths, jobs, schedule=schedule, **options)
+
+
+def _pool_options(jobs):
+    """Keyword arguments of `dpx_validator.api.validate_tree` for a number
+    of worker processes or an adaptive controller. The controller limits
+    chunks in flight, so files are sent to the threads one at a time."""
+    if isinstance(jobs, AdaptiveConcurrency):
+        return {"concurrency": jobs, "chunksize": 1}
+    return {
+        "workers": jobs,
+        "processes": jobs > 1,
+        "chunksize": DIRECTORY_CHUNKSIZE
+    }
+
+
+def _prefetched(paths, options):
+    """Paths validated in this process, with the header blocks of the next
+    files prefetched by the I/O policy in `options`."""
+    io_policy = options.get("io_policy")
+    if io_policy is None:
+        return paths
+    return io_policy.lookahead(paths)
+
+
+def _validate_one(path, options):
+    """Validate a file in this process. A file which cannot be read is
+    reported invalid instead of ending the run."""
+    try:
+        return validate_file(path, **options)
+    except OSError as error:
+        result = ValidationResult.from_error(error)
+        return result if options.get("compact") else result.as_tuple()
+
+
+def _validate_path_iterator(paths, jobs, schedule=None, **options):
+    """Validate paths from an iterator of unknown length."""
+    if isinstance(jobs, AdaptiveConcurrency):
+        yield from validate_files(
+            paths, concurrency=jobs, schedule=schedule, **options)
+        return
+    if jobs <= 1 and schedule is None and not options.get("invalid_only"):
+        for path in _prefetched(paths, options):
+            yield (path, *_validate_one(path, options))
+        return
+
+    yield from validate_files(
+        paths, workers=jobs, processes=jobs > 1,
+        chunksize=DIRECTORY_CHUNKSIZE, schedule=schedule, **options
+    )
+
+
+def validate_paths(paths, jobs=1, schedule=None, **options):
+    """Validate files in a single process or with a pool of processes.
+
+    :param paths: List of paths to DPX files
+    :param jobs: Number of worker processes, or a
+        `dpx_validator.adaptive.AdaptiveConcurrency` to validate the files
+        in threads with adaptive concurrency
+    :param schedule: Validate the files in the order of their location on
+        the storage, see `dpx_validator.scheduling`
+    :param options: Keyword arguments to
+        `dpx_validator.api.validate_file`, such as ``cache`` and ``deep``,
+        or ``invalid_only`` of `dpx_validator.api.validate_files`. With
+        ``invalid_only`` the files are always validated in chunks.
+    :returns: Iterator of ``(path, valid, output, logs)`` tuples in the order
+        of `paths`
+    """
+    if isinstance(jobs, AdaptiveConcurrency):
+        yield from validate_files(
+            paths, concurrency=jobs, schedule=schedule, **options)
+        return
+
+    jobs = max(1, min(jobs, len(paths)))
+
+    if jobs <= 1 and schedule is None and not options.get("invalid_only"):
+        for path in _prefetched(paths, options):
+            yield (path, *_validate_one(path, options))
+        return
+
+    # Split the work to a few chunks per process to balance the load without
+    # paying the pickling cost for each file separately
+    chunksize = max(1, min(MAX_CHUNKSIZE, len(paths) // (jobs * 4)))
+
+    yield from validate_files(
+        paths, workers=jobs, processes=jobs > 1, chunksize=chunksize,
+        schedule=schedule, **options
+    )
+
+
 def main(files=None):
     """Validate DPX files in paths given as arguments to the program.
     Informative details are written to standard output stream and errors
     are written to standard error stream."""
 
-    paths = None
-
     if files:
-        paths = list(files)
+        arguments = list(files)
     else:
-        paths = sys.argv[1:]
+        arguments = sys.argv[1:]
+
+    if arguments[:1] == ["serve"]:
+        serve(arguments[1:])
+        return
+
+    args = parse_arguments(arguments)
+    paths = args.files
+
+    if args.report_journal:
+        report_journal(args.report_journal, args.format)
+        return
+
+    if not paths and not args.recursive and not args.archive and \
+            not args.from_file:
+        raise MissingFiles('USAGE: dpx-validator FILENAME ...')
+
+    cache = ResultCache(args.cache_file) if args.cache else None
+    statistics = StatisticsCollector() if args.stats else None
+    # Header fields of the frames are collected during validation
+    collector = SequenceCollector() if args.sequences else None
+    observer = statistics if statistics is not None else collector
+    if statistics is not None and collector is not None:
+        observer = ObserverGroup(statistics, collector)
+    options = {
+        "cache": cache,
+        "deep": args.deep,
+        "algorithms": args.algorithms,
+        "manifest": Manifest.from_file(args.manifest)
+        if args.manifest else None,
+        "observer": observer,
+        "io_policy": IO_POLICIES[args.io_policy],
+        # Message codes are written with --format jsonl and csv
+        "compact": True
+    }
+    if args.invalid_only:
+        options["invalid_only"] = True
+
+    journal = Journal(args.journal) if args.journal else None
+    select = None
+    if journal is not None or args.shard:
+        select = partial(_selected, journal=journal, shard=args.shard)
+        # Interrupting the run syncs the journal
+        signal.signal(signal.SIGTERM, _terminate)
+
+    schedule = None if args.schedule == NAME_SCHEDULE else args.schedule
+    jobs = args.jobs
+    if jobs == AUTO_JOBS:
+        jobs = AdaptiveConcurrency(maximum=args.max_jobs)
+
+    sequence_paths = [] if args.sequences else None
+    results = []
+    if paths:
+        if select is not None:
+            paths = list(filter(select, paths))
+        results.append(validate_paths(
+            paths, jobs, schedule=schedule, **options))
+    if args.from_file:
+        results.append(validate_path_list(
+            args.from_file, b"\0" if args.null else b"\n", jobs,
+            select=select, schedule=schedule, **options
+        ))
+    for directory in args.recursive:
+        results.append(validate_tree(
+            directory,
+            select=select,
+            schedule=schedule,
+            **_pool_options(jobs),
+            **options
+        ))
+    for archive in args.archive:
+        archive_results = validate_archive(
+            archive,
+            deep=args.deep,
+            algorithms=args.algorithms,
+            observer=observer,
+            compact=True
+        )
+        if args.invalid_only:
+            archive_results = (
+                result for result in archive_results if not result[1])
+        results.append(archive_results)
 
-    if not paths:
-        raise MissingFiles('USAGE: dpxv FILENAME ...')
-    for dpx_file in paths:
-        valid, _, logs = validate_file(dpx_file)
-        create_commandline_messages(dpx_file, valid, logs)
+    try:
+        with buffered(sys.stdout) as stdout, \
+                buffered(sys.stderr) as stderr:
+            writer = FORMATS[args.format](stdout, stderr)
+            for dpx_file, valid, output, logs in chain.from_iterable(
+                    results):
+                writer.add(dpx_file, valid, output, logs)
+                if journal is not None:
+                    journal.record(dpx_file, valid, output, logs)
+                if sequence_paths is not None:
+                    sequence_paths.append(dpx_file)
+            if sequence_paths is not None:
+                if journal is not None:
+                    # Frames validated before the run was resumed
+                    sequence_paths = sorted(
+                        journal.done.union(map(os.fsdecode, sequence_paths)))
+                for sequence_result in check_sequences(
+                        sequence_paths, collector):
+                    writer.write_sequence(*sequence_result)
+            writer.summary()
+            if statistics is not None:
+                stderr.write(statistics.report() + "\n")
+    finally:
+        if journal is not None:
+            journal.close()
+        if cache is not None:
+            cache.prune()
+            cache.close()
 
 
 if __name__ == '__main__':
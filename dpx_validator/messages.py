@@ -1,6 +1,7 @@
-import sys
-
-from enum import Enum
+from __future__ import annotations
+from enum import Enum, IntEnum
+from functools import lru_cache
+from typing import Any
 
 
 # Data structures
@@ -9,33 +10,317 @@ class MessageType(str, Enum):
     ERROR = "invalid_field"
 
 
+class MessageCode(IntEnum):
+    """Codes of validation messages. Codes below 100 are informational,
+    codes from 100 to 199 are errors raised as `InvalidField` and codes from
+    200 are other errors. The text of each code is in `MESSAGE_FORMATS`."""
+    INFO_TEXT = 1
+    BIG_ENDIAN = 10
+    LITTLE_ENDIAN = 11
+    VERSION = 12
+    FILESIZE_MATCHES = 13
+    FUZZY_FILESIZE = 14
+    IMAGE_INFORMATION = 15
+    IMAGE_DATA = 16
+    DIGEST = 17
+    DIGEST_MATCHES = 18
+    SEQUENCE = 19
+    TIMECODE_NOT_CHECKED = 20
+
+    FIELD_ERROR_TEXT = 100
+    INVALID_MAGIC_NUMBER = 110
+    INVALID_OFFSET_TO_IMAGE = 111
+    INVALID_VERSION = 112
+    INVALID_FILESIZE = 113
+    ENCRYPTED = 114
+    SHORT_HEADER = 115
+    INVALID_ORIENTATION = 116
+    INVALID_NUMBER_OF_ELEMENTS = 117
+    UNDEFINED_DIMENSION = 118
+    INVALID_IMAGE_ELEMENTS = 119
+    INVALID_TIMECODE = 120
+    INVALID_INTERLACE = 121
+    IMAGE_DATA_EXCEEDS_FILE = 122
+    TRUNCATED_IMAGE_DATA = 123
+    PADDING_BITS_SET = 124
+
+    ERROR_TEXT = 200
+    TRUNCATED_FILE = 210
+    NOT_IN_MANIFEST = 211
+    DIGEST_MISMATCH = 212
+    MISSING_FRAMES = 213
+    DUPLICATE_FRAMES = 214
+    INCONSISTENT_HEADER = 215
+    TIMECODE_DISCONTINUITY = 216
+    UNREADABLE_FILE = 217
+
+
+def _format_image_elements(*invalid: tuple) -> str:
+    """Format ``(name, value, element)`` tuples of invalid image element
+    fields."""
+    return "Invalid " + ", ".join(
+        f"{name} {value} of image element {element}"
+        for name, value, element in invalid
+    )
+
+
+def _format_image_data(*elements: tuple | None) -> str:
+    """Format ``(minimum, maximum, clipped, black)`` sample statistics of
+    each image element, None for elements which were not scanned."""
+    summaries = []
+    for element, statistics in enumerate(elements, 1):
+        if statistics is None:
+            summaries.append(f"element {element} not scanned")
+            continue
+        minimum, maximum, clipped, black = statistics
+        summaries.append(
+            f"element {element}: samples {minimum}-{maximum}, "
+            f"{clipped} clipped" + (", black frame" if black else "")
+        )
+    return "Image data " + "; ".join(summaries)
+
+
+# Codes of messages whose values are usually unique to a file, such as
+# digests and sizes, which are not shared between files
+UNSHARED_CODES = frozenset({
+    MessageCode.FUZZY_FILESIZE,
+    MessageCode.IMAGE_DATA,
+    MessageCode.DIGEST,
+    MessageCode.INVALID_OFFSET_TO_IMAGE,
+    MessageCode.INVALID_FILESIZE,
+    MessageCode.IMAGE_DATA_EXCEEDS_FILE,
+    MessageCode.DIGEST_MISMATCH,
+    MessageCode.MISSING_FRAMES,
+    MessageCode.DUPLICATE_FRAMES,
+    MessageCode.INCONSISTENT_HEADER,
+    MessageCode.TIMECODE_DISCONTINUITY,
+})
+
+# Number of frame ranges and time code jumps listed in sequence messages
+LISTED_ITEMS = 20
+
+
+def _format_listed(items: list[str]) -> str:
+    """Join the first `LISTED_ITEMS` items and count the rest."""
+    text = ", ".join(items[:LISTED_ITEMS])
+    if len(items) > LISTED_ITEMS:
+        text += f" and {len(items) - LISTED_ITEMS} more"
+    return text
+
+
+def _format_ranges(ranges: tuple) -> str:
+    """Format ``(first, last)`` frame ranges."""
+    return _format_listed([
+        str(first) if first == last else f"{first}-{last}"
+        for first, last in ranges
+    ])
+
+
+def _format_missing_frames(*ranges: tuple) -> str:
+    """Format ``(first, last)`` ranges of missing frames."""
+    return "Missing frames " + _format_ranges(ranges)
+
+
+def _format_duplicate_frames(*ranges: tuple) -> str:
+    """Format ``(first, last)`` ranges of frames found more than once."""
+    return "Duplicate frames " + _format_ranges(ranges)
+
+
+def _format_inconsistent_header(
+    name: str, expected: Any, *differing: tuple
+) -> str:
+    """Format the frames whose header field differs from the value of the
+    sequence, given as ``(value, ranges)`` tuples."""
+    return f"Field {name} is {expected} in the sequence but " + "; ".join(
+        f"{value} in frames {_format_ranges(ranges)}"
+        for value, ranges in differing
+    )
+
+
+def _format_timecode_jumps(*jumps: tuple) -> str:
+    """Format ``(previous_frame, previous_timecode, frame, timecode)``
+    tuples of time codes which do not follow the previous frame."""
+    return "Time code is discontinuous at " + _format_listed([
+        f"frame {frame} ({timecode} after {previous_timecode} "
+        f"of frame {previous_frame})"
+        for previous_frame, previous_timecode, frame, timecode in jumps
+    ])
+
+
+# Format strings, or functions for messages with a variable number of
+# arguments, by message code
+MESSAGE_FORMATS = {
+    MessageCode.INFO_TEXT: "{}",
+    MessageCode.BIG_ENDIAN: "Byte order is big endian",
+    MessageCode.LITTLE_ENDIAN:
+        "Byte order changed and file validated with little endian byte "
+        "order",
+    MessageCode.VERSION: "Validated as version: {}",
+    MessageCode.FILESIZE_MATCHES: "File size in header matches the file size",
+    MessageCode.FUZZY_FILESIZE: "Valid fuzzy filesize: header {}, stat {} "
+                                "bytes",
+    MessageCode.IMAGE_INFORMATION: "Image has {} element(s) of {}x{} pixels",
+    MessageCode.IMAGE_DATA: _format_image_data,
+    MessageCode.DIGEST: "{} digest {}",
+    MessageCode.DIGEST_MATCHES: "{} digest matches the manifest",
+    MessageCode.SEQUENCE: "Sequence of {} frames from {} to {}",
+    MessageCode.TIMECODE_NOT_CHECKED:
+        "Time code continuity not checked: {}",
+
+    MessageCode.FIELD_ERROR_TEXT: "{}",
+    MessageCode.INVALID_MAGIC_NUMBER: "Invalid magic number: {}",
+    MessageCode.INVALID_OFFSET_TO_IMAGE:
+        "Offset to image ({}) is more than file size ({}) ",
+    MessageCode.INVALID_VERSION: "Invalid header version {}",
+    MessageCode.INVALID_FILESIZE:
+        "Different file sizes from header ({}) and filesystem ({})",
+    MessageCode.ENCRYPTED:
+        "Encryption key in header not set to NULL or undefined",
+    MessageCode.SHORT_HEADER:
+        "File is shorter than the generic header ({} bytes)",
+    MessageCode.INVALID_ORIENTATION: "Invalid image orientation {}",
+    MessageCode.INVALID_NUMBER_OF_ELEMENTS:
+        "Invalid number of image elements {}",
+    MessageCode.UNDEFINED_DIMENSION: "Image dimension {} is undefined",
+    MessageCode.INVALID_IMAGE_ELEMENTS: _format_image_elements,
+    MessageCode.INVALID_TIMECODE: "Invalid SMPTE time code {:08x}",
+    MessageCode.INVALID_INTERLACE: "Invalid interlace value {}",
+    MessageCode.IMAGE_DATA_EXCEEDS_FILE:
+        "Image element {} data ({} bytes from offset {}) exceeds file size "
+        "({})",
+    MessageCode.TRUNCATED_IMAGE_DATA:
+        "Image data of image element {} is truncated",
+    MessageCode.PADDING_BITS_SET:
+        "Padding bits are set in image data of image element {}",
+
+    MessageCode.ERROR_TEXT: "{}",
+    MessageCode.TRUNCATED_FILE: "Truncated file",
+    MessageCode.NOT_IN_MANIFEST: "File is not listed in the manifest",
+    MessageCode.DIGEST_MISMATCH:
+        "{} digest {} does not match {} in the manifest",
+    MessageCode.MISSING_FRAMES: _format_missing_frames,
+    MessageCode.DUPLICATE_FRAMES: _format_duplicate_frames,
+    MessageCode.INCONSISTENT_HEADER: _format_inconsistent_header,
+    MessageCode.TIMECODE_DISCONTINUITY: _format_timecode_jumps,
+    MessageCode.UNREADABLE_FILE: "File cannot be read: {}",
+}
+
+
+def format_message(code: int, args: tuple) -> str:
+    """Format the text of a message from its code and arguments."""
+    template = MESSAGE_FORMATS[code]
+    if callable(template):
+        return template(*args)
+    return template.format(*args)
+
+
 class UndefinedMessage(Exception):
     """Message type from validation procedures that is not
     defined in `dpx_validator.messages.MSG`"""
 
 
 class InvalidField(ValueError):
-    """Value in the header field is invalid."""
+    """Value in the header field is invalid.
+
+    The exception is raised with a `MessageCode` and the raw values of the
+    message, which are formatted only when the exception is printed. A
+    plain message string is accepted as well.
+    """
+
+    def __init__(self, code: int | str, *args) -> None:
+        if isinstance(code, str):
+            code, args = MessageCode.FIELD_ERROR_TEXT, (code,)
+        super().__init__(code, *args)
+        self.code = code
+
+    def __str__(self) -> str:
+        return format_message(self.code, self.args[1:])
+
+    def __repr__(self) -> str:
+        return "InvalidField(%r)" % str(self)
+
+
+class Message:
+    """
+    Validation message stored as a code and the raw values of the message.
+
+    The message behaves like the ``(MessageType, str)`` tuple used in logs:
+    it can be unpacked, indexed and compared with such tuples. The text is
+    formatted each time it is accessed, so that results kept in memory hold
+    only the code and values. Messages are created with `message`, which
+    shares identical messages between files.
+    """
+
+    __slots__ = ("code", "args")
+
+    def __init__(self, code: int, args: tuple = ()) -> None:
+        self.code = code
+        self.args = args
+
+    @property
+    def type(self) -> MessageType:
+        """Type of the message, derived from the code."""
+        if self.code < MessageCode.FIELD_ERROR_TEXT:
+            return MessageType.INFO
+        return MessageType.ERROR
+
+    @property
+    def text(self) -> str:
+        """Text of the message as written to logs."""
+        if MessageCode.FIELD_ERROR_TEXT <= self.code < MessageCode.ERROR_TEXT:
+            return "InvalidField(%r)" % format_message(self.code, self.args)
+        return format_message(self.code, self.args)
+
+    def __iter__(self):
+        yield self.type
+        yield self.text
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, index):
+        return (self.type, self.text)[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Message, tuple)):
+            return (self.type, self.text) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.type, self.text))
+
+    def __repr__(self) -> str:
+        return "Message(%s, %r)" % (self.type.name, self.text)
+
+    def __reduce__(self):
+        return (message, (self.code, *self.args))
+
 
+def message(code: int, *args) -> Message:
+    """Create a message, reusing an identical earlier message. Messages of
+    `UNSHARED_CODES` are created anew.
 
-# Functions
-def create_commandline_messages(
-    dpx_file: str, valid: bool, logs: list[tuple[MessageType, str]]
-) -> None:
+    :param code: `MessageCode` of the message
+    :param args: Hashable raw values formatted into the message
+    :returns: Shared `Message`
+    """
+    code = int(code)
+    if code in UNSHARED_CODES:
+        return Message(code, args)
+    return _shared_message(code, *args)
 
-    for msg_type, msg in logs:
-        print(f"File {dpx_file} :: {msg}")
 
-        if msg_type == MessageType.INFO and msg:
-            print(f"File {dpx_file} :: {msg}")
+@lru_cache(maxsize=4096)
+def _shared_message(code: int, *args) -> Message:
+    """Cached `Message` constructor."""
+    return Message(code, args)
 
-        elif msg_type == MessageType.ERROR:
-            print(f"File {dpx_file} :: {msg}", file=sys.stderr)
 
-        else:
-            raise UndefinedMessage(f"Undefined message type {msg_type}")
+def text_message(msg_type: MessageType, text: str) -> Message:
+    """Create a message from an already formatted log text."""
+    if msg_type == MessageType.ERROR:
+        return message(MessageCode.ERROR_TEXT, text)
+    if msg_type == MessageType.INFO:
+        return message(MessageCode.INFO_TEXT, text)
+    raise UndefinedMessage(f"Undefined message type {msg_type}")
 
-    if valid:
-        print(f"File {dpx_file} is valid")
-    else:
-        print(f"File {dpx_file} is invalid")
@@ -0,0 +1,244 @@
+"""Output of validation results on the command line.
+
+Results are written with a `ResultWriter` of the format selected with the
+``--format`` option:
+
+- ``text``: messages of each file followed by the verdict, informational
+  messages to standard output and errors to standard error
+- ``jsonl``: one JSON object per file and a summary object at the end
+- ``csv``: one row per message and a summary row at the end
+
+The writers write to streams from `buffered`, which are not flushed after
+each line even when the output is a terminal.
+"""
+
+from __future__ import annotations
+import csv
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Any, Iterator, TextIO
+
+from dpx_validator.messages import (
+    Message,
+    MessageCode,
+    MessageType,
+    UndefinedMessage,
+    text_message,
+)
+
+# Size of the buffer of the output streams
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+CSV_COLUMNS = ("path", "valid", "type", "code", "message")
+
+
+@contextmanager
+def buffered(
+    stream: TextIO, buffer_size: int = OUTPUT_BUFFER_SIZE
+) -> Iterator[TextIO]:
+    """Context manager wrapping a text stream into a stream which is flushed
+    only when its buffer is full and when the context exits.
+
+    `stream` is left open. Streams without a binary buffer, such as
+    `io.StringIO`, are used as is.
+
+    :param stream: Text stream, such as `sys.stdout`
+    :param buffer_size: Size of the buffer in bytes
+    :returns: Buffered text stream
+    """
+    if not hasattr(stream, "buffer"):
+        yield stream
+        return
+
+    stream.flush()
+    wrapper = io.TextIOWrapper(
+        io.BufferedWriter(stream.buffer, buffer_size),
+        encoding=stream.encoding,
+        errors=stream.errors,
+        line_buffering=False
+    )
+    try:
+        yield wrapper
+    finally:
+        wrapper.detach().detach().flush()
+
+
+def _message(log: Message | tuple[MessageType, str]) -> Message:
+    """Message of a log entry, which may be a plain ``(type, text)``
+    tuple."""
+    if isinstance(log, Message):
+        return log
+    return text_message(*log)
+
+
+def result_record(
+    path: str,
+    valid: bool,
+    output: dict[str, Any],
+    logs: list[Message]
+) -> dict[str, Any]:
+    """Result of a file as a dict which can be serialized as JSON.
+
+    :param path: Path of the file
+    :param valid: Validity of the file
+    :param output: Details of the file, included if they are not None
+    :param logs: Messages of the validation
+    :returns: Dict with the path, validity, details and a list of messages
+    """
+    record = {"path": path, "valid": valid}
+    record.update(
+        (key, value) for key, value in output.items() if value is not None
+    )
+    record["messages"] = [
+        {
+            "type": msg.type.value,
+            "code": MessageCode(msg.code).name,
+            "message": msg.text,
+        }
+        for msg in map(_message, logs)
+    ]
+    return record
+
+
+class ResultWriter:
+    """Writer of validation results. Subclasses implement `write` and
+    `summary`."""
+
+    def __init__(self, stream: TextIO, error_stream: TextIO) -> None:
+        """
+        :param stream: Stream of the results
+        :param error_stream: Stream of the errors in text output
+        """
+        self.stream = stream
+        self.error_stream = error_stream
+        self.files = 0
+        self.invalid = 0
+
+    def add(
+        self,
+        path: str | os.PathLike,
+        valid: bool,
+        output: dict[str, Any],
+        logs: list[Message]
+    ) -> None:
+        """Write the result of a file and count it in the summary.
+
+        :param path: Path of the file
+        :param valid: Validity of the file
+        :param output: Details of the file
+        :param logs: Messages of the validation
+        """
+        self.files += 1
+        self.invalid += not valid
+        self.write(os.fsdecode(path), valid, output, logs)
+
+    def write(
+        self,
+        path: str,
+        valid: bool,
+        output: dict[str, Any],
+        logs: list[Message]
+    ) -> None:
+        """Write the result of a file."""
+        raise NotImplementedError
+
+    def write_sequence(
+        self,
+        name: str,
+        valid: bool,
+        output: dict[str, Any],
+        logs: list[Message]
+    ) -> None:
+        """Write the result of a frame sequence from
+        `dpx_validator.sequence.check_sequence`. Sequences are not counted
+        in the summary."""
+        self.write(name, valid, output, logs)
+
+    def summary(self) -> None:
+        """Write the summary after all files."""
+        raise NotImplementedError
+
+
+class TextWriter(ResultWriter):
+    """Writer of human-readable messages and verdicts."""
+
+    def write(self, path, valid, output, logs, label="File") -> None:
+        for msg_type, msg in logs:
+            if msg_type == MessageType.INFO:
+                if msg:
+                    self.stream.write(f"{label} {path} :: {msg}\n")
+            elif msg_type == MessageType.ERROR:
+                self.error_stream.write(f"{label} {path} :: {msg}\n")
+            else:
+                raise UndefinedMessage(f"Undefined message type {msg_type}")
+
+        if valid:
+            self.stream.write(f"{label} {path} is valid\n")
+        else:
+            self.stream.write(f"{label} {path} is invalid\n")
+
+    def write_sequence(self, name, valid, output, logs) -> None:
+        self.write(name, valid, output, logs, label="Sequence")
+
+    def summary(self) -> None:
+        """Text output has no summary, so that its format is unchanged."""
+
+
+class JsonLinesWriter(ResultWriter):
+    """Writer of a JSON object per file."""
+
+    def write(self, path, valid, output, logs) -> None:
+        self.stream.write(
+            json.dumps(result_record(path, valid, output, logs)) + "\n")
+
+    def summary(self) -> None:
+        self.stream.write(json.dumps({"summary": {
+            "files": self.files,
+            "valid": self.files - self.invalid,
+            "invalid": self.invalid,
+        }}) + "\n")
+
+
+class CsvWriter(ResultWriter):
+    """Writer of a row per message with `CSV_COLUMNS`."""
+
+    def __init__(self, stream: TextIO, error_stream: TextIO) -> None:
+        super().__init__(stream, error_stream)
+        self.writer = csv.writer(stream, lineterminator="\n")
+        self.writer.writerow(CSV_COLUMNS)
+
+    def write(self, path, valid, output, logs) -> None:
+        verdict = "true" if valid else "false"
+        if not logs:
+            self.writer.writerow((path, verdict, "", "", ""))
+        self.writer.writerows(
+            (path, verdict, msg.type.value, MessageCode(msg.code).name,
+             msg.text)
+            for msg in map(_message, logs)
+        )
+
+    def summary(self) -> None:
+        self.writer.writerow((
+            "", "", "summary", "",
+            "%s files, %s valid, %s invalid" % (
+                self.files, self.files - self.invalid, self.invalid)
+        ))
+
+
+FORMATS = {
+    "text": TextWriter,
+    "jsonl": JsonLinesWriter,
+    "csv": CsvWriter,
+}
+
+
+def create_commandline_messages(
+    dpx_file: str, valid: bool, logs: list[tuple[MessageType, str]]
+) -> None:
+    """Print the messages of a file and the verdict. Informational
+    messages are printed to standard output and errors to standard error.
+    """
+    TextWriter(sys.stdout, sys.stderr).write(dpx_file, valid, {}, logs)
@@ -0,0 +1,130 @@
+"""Compact validation results.
+
+`ValidationResult` keeps the outcome of validating a file in slots and its
+messages as `dpx_validator.messages.Message` objects, which store message
+codes and raw values instead of formatted text. Results of a large run can
+thus be kept in memory cheaply. The API functions return compact results
+only when called with ``compact=True``, and otherwise convert them with
+`ValidationResult.as_tuple` to the ``(valid, output, logs)`` tuple of
+``(MessageType, str)`` log tuples.
+"""
+
+from __future__ import annotations
+from typing import Any
+
+from dpx_validator.messages import (
+    Message,
+    MessageCode,
+    MessageType,
+    message,
+    text_message)
+
+OUTPUT_KEYS = (
+    "magic_number", "size", "version", "image_statistics", "digests"
+)
+
+
+class ValidationResult:
+    """Outcome of validating a file."""
+
+    __slots__ = ("valid", "messages", *OUTPUT_KEYS)
+
+    def __init__(
+        self,
+        valid: bool = True,
+        messages: tuple[Message, ...] = (),
+        magic_number: str | None = None,
+        size: int | None = None,
+        version: str | None = None,
+        image_statistics: list | None = None,
+        digests: dict[str, str] | None = None
+    ) -> None:
+        """
+        :param valid: Validity of the file
+        :param messages: Messages of the validation in order
+        :param magic_number: Magic number of the file
+        :param size: Size of the file in bytes
+        :param version: DPX version of the file
+        :param image_statistics: Sample statistics of each image element
+            from deep validation
+        :param digests: Hex digests of the file by algorithm
+        """
+        self.valid = valid
+        self.messages = messages
+        self.magic_number = magic_number
+        self.size = size
+        self.version = version
+        self.image_statistics = image_statistics
+        self.digests = digests
+
+    @classmethod
+    def from_tuple(
+        cls,
+        valid: bool,
+        output: dict[str, Any],
+        logs: list[tuple[MessageType, str]]
+    ) -> ValidationResult:
+        """Create a result from a ``(valid, output, logs)`` tuple."""
+        return cls(
+            valid,
+            tuple(
+                log if isinstance(log, Message) else text_message(*log)
+                for log in logs
+            ),
+            **{key: output.get(key) for key in OUTPUT_KEYS}
+        )
+
+    @classmethod
+    def from_error(cls, error: OSError) -> ValidationResult:
+        """Create an invalid result of a file which could not be read."""
+        return cls(False, (message(
+            MessageCode.UNREADABLE_FILE, error.strerror or str(error)),))
+
+    @property
+    def output(self) -> dict[str, Any]:
+        """Details of the file as a dict with `OUTPUT_KEYS`."""
+        return {key: getattr(self, key) for key in OUTPUT_KEYS}
+
+    @property
+    def logs(self) -> list[tuple[MessageType, str]]:
+        """Messages as a list of ``(MessageType, str)`` tuples."""
+        return [(msg.type, msg.text) for msg in self.messages]
+
+    def add_messages(self, messages: list[Message]) -> None:
+        """Append messages to the result. The result becomes invalid if any
+        of the messages is an error."""
+        self.messages += tuple(messages)
+        if any(msg.type is MessageType.ERROR for msg in messages):
+            self.valid = False
+
+    def as_tuple(
+        self
+    ) -> tuple[bool, dict[str, Any], list[tuple[MessageType, str]]]:
+        """Result as the ``(valid, output, logs)`` tuple returned by
+        `dpx_validator.api.validate_file`, where the logs are
+        ``(MessageType, str)`` tuples."""
+        return (self.valid, self.output, self.logs)
+
+    def _compact_tuple(self) -> tuple[bool, dict[str, Any], list[Message]]:
+        """Result as a ``(valid, output, logs)`` tuple of messages."""
+        return (self.valid, self.output, list(self.messages))
+
+    def __iter__(self):
+        return iter(self._compact_tuple())
+
+    def __len__(self) -> int:
+        return 3
+
+    def __getitem__(self, index):
+        return self._compact_tuple()[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ValidationResult, tuple)):
+            return self._compact_tuple() == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return "ValidationResult(valid=%r, messages=%r)" % (
+            self.valid, self.messages)
@@ -0,0 +1,188 @@
+"""Scheduling of files by their location on the storage.
+
+On rotational disks and volumes staged from tape, validating frames in the
+order of their names seeks back and forth between the header blocks. A
+`Scheduler` reorders windows of pending files by their location before they
+are validated, and restores the original order of the results:
+
+- ``"inode"`` orders the files by device and inode number, which follows
+  the allocation order of the files on most filesystems.
+- ``"extent"`` orders the files by device and the physical offset of their
+  first extent, found with the ``FS_IOC_FIEMAP`` ioctl on Linux. Files whose
+  extents cannot be mapped are ordered by inode number.
+
+Grouping by device keeps the files staged on the same volume together.
+"""
+
+from __future__ import annotations
+import os
+import struct
+from collections import deque
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, files are ordered by inode number
+    fcntl = None
+
+# Orders files can be scheduled in
+SCHEDULES = ("inode", "extent")
+# Number of pending files reordered at once
+SCHEDULE_WINDOW = 4096
+
+# _IOWR('f', 11, struct fiemap) from linux/fs.h
+FS_IOC_FIEMAP = 0xC020660B
+# struct fiemap: fm_start, fm_length, fm_flags, fm_mapped_extents,
+# fm_extent_count and fm_reserved
+_FIEMAP = struct.Struct("=QQIIII")
+# struct fiemap_extent: fe_logical, fe_physical, fe_length, two reserved
+# 64-bit fields, fe_flags and three reserved 32-bit fields
+_FIEMAP_EXTENT = struct.Struct("=QQQQQIIII")
+# Length of the mapped range, the header block is in the first extent
+_FIEMAP_LENGTH = 2048
+
+
+def physical_offset(path: str | os.PathLike) -> int | None:
+    """Find the physical offset of the beginning of a file.
+
+    :param path: Path to the file
+    :returns: Offset of the first extent of the file on its device, or None
+        if the extents of the file cannot be mapped
+    """
+    if fcntl is None:
+        return None
+    request = bytearray(_FIEMAP.size + _FIEMAP_EXTENT.size)
+    _FIEMAP.pack_into(request, 0, 0, _FIEMAP_LENGTH, 0, 0, 1, 0)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request)
+    except OSError:
+        # Filesystem does not support FIEMAP
+        return None
+    finally:
+        os.close(fd)
+
+    if not _FIEMAP.unpack_from(request)[3]:
+        # Empty file or data stored inline
+        return None
+    return _FIEMAP_EXTENT.unpack_from(request, _FIEMAP.size)[1]
+
+
+def schedule_key(
+    path: str | os.PathLike,
+    file_stat: os.stat_result | None,
+    schedule: str
+) -> tuple[int, int, int]:
+    """Sort key of a file in a schedule.
+
+    :param path: Path to the file
+    :param file_stat: Stat result of the file, or None if it could not be
+        stat'ed
+    :param schedule: One of `SCHEDULES`
+    :returns: Tuple of the device, physical offset and inode number of the
+        file. The offset is -1 if it is not known, and files which could
+        not be stat'ed are ordered first.
+    """
+    if file_stat is None:
+        return (-1, -1, -1)
+    offset = None
+    if schedule == "extent":
+        offset = physical_offset(path)
+    return (
+        file_stat.st_dev,
+        -1 if offset is None else offset,
+        file_stat.st_ino
+    )
+
+
+class Scheduler:
+    """Reorder files by their location and restore the order of their
+    results.
+
+    The entries from `entries` must be validated in the order they are
+    yielded, and the results passed to `restore` in the same order.
+    """
+
+    def __init__(
+        self,
+        schedule: str,
+        window: int = SCHEDULE_WINDOW,
+        restore_order: bool = True
+    ) -> None:
+        """
+        :param schedule: One of `SCHEDULES`
+        :param window: Number of pending files reordered at once
+        :param restore_order: Record the original order of the entries for
+            `restore`. Without it, the memory used does not grow with the
+            number of entries whose results are not restored.
+        :raises ValueError: Schedule or window is not valid
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError("Unknown schedule: %s" % schedule)
+        if window < 1:
+            raise ValueError("Schedule window must be at least 1")
+        self.schedule = schedule
+        self.window = window
+        self.restore_order = restore_order
+        self._indices: deque[int] = deque()
+
+    def entries(
+        self,
+        entries: Iterable[tuple[str | os.PathLike, os.stat_result | None]]
+    ) -> Iterator[tuple[str | os.PathLike, os.stat_result | None]]:
+        """Reorder ``(path, file_stat)`` entries window by window. Missing
+        stat results are filled in, so that the files are not stat'ed again
+        when they are validated.
+
+        :param entries: Iterable of ``(path, file_stat)`` tuples, where
+            `file_stat` may be None
+        :returns: Iterator of ``(path, file_stat)`` tuples
+        """
+        iterator = iter(entries)
+        index = 0
+        while window := list(islice(iterator, self.window)):
+            keyed = []
+            for offset, (path, file_stat) in enumerate(window):
+                if file_stat is None:
+                    try:
+                        file_stat = os.stat(path)
+                    except OSError:
+                        # Validation reports the error
+                        pass
+                keyed.append((
+                    schedule_key(path, file_stat, self.schedule),
+                    index + offset,
+                    path,
+                    file_stat
+                ))
+            keyed.sort(key=lambda item: item[:2])
+            if self.restore_order:
+                self._indices.extend(item[1] for item in keyed)
+            for _, _, path, file_stat in keyed:
+                yield (path, file_stat)
+            index += len(window)
+
+    def restore(self, results: Iterable[Any]) -> Iterator[Any]:
+        """Yield results in the original order of the entries.
+
+        :param results: Results of the entries in the order `entries`
+            yielded them
+        :raises ValueError: Order of the entries was not recorded
+        :returns: Iterator of the results in the order of the entries
+            given to `entries`
+        """
+        if not self.restore_order:
+            raise ValueError("Order of the entries was not recorded")
+        waiting = {}
+        next_index = 0
+        for result in results:
+            waiting[self._indices.popleft()] = result
+            while next_index in waiting:
+                yield waiting.pop(next_index)
+                next_index += 1
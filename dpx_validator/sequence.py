@@ -0,0 +1,382 @@
+"""Validation of numbered frame sequences.
+
+DPX material is delivered as sequences of files named by frame number, such
+as ``reel/name.0000001.dpx``. `group_sequences` groups paths by the name
+around the last number, and `check_sequence` reports:
+
+- missing and duplicate frame numbers
+- frames whose byte order, version, dimensions, descriptor, bit size or
+  packing differ from the rest of the sequence
+- SMPTE time codes in the television header which do not advance with the
+  frame numbers
+
+The checked header fields are collected into a column per field, and the
+checks are evaluated over the columns in a single pass. A `SequenceCollector`
+given to the validation as an observer keeps the fields of the headers the
+validation decoded, so that only the headers of frames which were not
+validated in the same run are read again, in batches with
+`dpx_validator.batch.read_header_columns`. Validation of the individual
+frames is left to `dpx_validator.api.validate_file`.
+"""
+
+from __future__ import annotations
+import math
+import os
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+from dpx_validator.batch import read_header_columns
+from dpx_validator.header_layout import UNDEFINED_U32, decode_string
+from dpx_validator.messages import (
+    Message,
+    MessageCode,
+    MessageType,
+    message)
+from dpx_validator.stats import ValidationObserver
+
+# Frame number of a file name, the last group of digits before the extension
+FRAME_NAME = re.compile(r"(?P<prefix>.*?)(?P<frame>\d+)(?P<suffix>\D*)")
+
+# Header fields which should have the same value in every frame, and their
+# names in messages
+CONSISTENT_FIELDS = {
+    "magic_number": "magic_number",
+    "version": "version",
+    "number_of_elements": "number_of_elements",
+    "pixels_per_line": "pixels_per_line",
+    "lines_per_element": "lines_per_element",
+    "element_1_descriptor": "descriptor",
+    "element_1_bit_size": "bit_size",
+    "element_1_packing": "packing",
+}
+# Header fields of the time code check
+TIMECODE_FIELDS = (
+    "industry_header_size", "timecode", "tv_frame_rate", "film_frame_rate"
+)
+# Header fields collected for the checks
+SEQUENCE_FIELDS = (*CONSISTENT_FIELDS, *TIMECODE_FIELDS)
+# Frame rates which count time code with drop frames
+DROP_FRAME_RATES = {30: 2, 60: 4}
+
+
+class FrameSequence:
+    """Files of a numbered frame sequence."""
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: Name of the sequence, the path of a frame with the
+            frame number replaced by a ``%d`` style placeholder
+        """
+        self.name = name
+        self.frames: list[int] = []
+        self.paths: list[str] = []
+
+    def add(self, frame: int, path: str) -> None:
+        """Add a frame to the sequence."""
+        self.frames.append(frame)
+        self.paths.append(path)
+
+    def sort(self) -> None:
+        """Sort the frames by frame number, keeping duplicates in the order
+        they were added."""
+        order = sorted(range(len(self.frames)), key=self.frames.__getitem__)
+        self.frames = [self.frames[index] for index in order]
+        self.paths = [self.paths[index] for index in order]
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __repr__(self) -> str:
+        return "FrameSequence(%r, %s frames)" % (self.name, len(self))
+
+
+def group_sequences(
+    paths: Iterable[str | os.PathLike]
+) -> list[FrameSequence]:
+    """Group paths into frame sequences by the name around their frame
+    number. Paths without a number in the file name are not grouped.
+
+    :param paths: Paths of DPX files
+    :returns: List of sequences in the order of their first frames in
+        `paths`, each sorted by frame number
+    """
+    sequences: dict[tuple[str, str, str], FrameSequence] = {}
+    for path in paths:
+        path = os.fsdecode(path)
+        directory, file_name = os.path.split(path)
+        match = FRAME_NAME.fullmatch(file_name)
+        if match is None:
+            continue
+        prefix, digits, suffix = match.group("prefix", "frame", "suffix")
+        key = (directory, prefix, suffix)
+        sequence = sequences.get(key)
+        if sequence is None:
+            placeholder = "%0{}d".format(len(digits)) \
+                if digits.startswith("0") else "%d"
+            sequence = sequences[key] = FrameSequence(
+                os.path.join(directory, prefix + placeholder + suffix))
+        sequence.add(int(digits), path)
+
+    for sequence in sequences.values():
+        sequence.sort()
+    return list(sequences.values())
+
+
+class SequenceCollector(ValidationObserver):
+    """Observer keeping the header fields of the sequence checks from the
+    headers decoded by validation."""
+
+    def __init__(self) -> None:
+        # Fields of each validated file by path, None for files which are
+        # not DPX files
+        self.rows: dict[str, tuple | None] = {}
+
+    def header(self, path, header) -> None:
+        self.rows[os.fsdecode(path)] = tuple(
+            header.get(name) for name in SEQUENCE_FIELDS)
+
+    def file(
+        self, path, seconds, stat_seconds, bytes_read, calls, valid,
+        cached=False
+    ) -> None:
+        # Headers of cached results were not decoded and are read later
+        if not cached:
+            self.rows.setdefault(os.fsdecode(path), None)
+
+    def spawn(self) -> SequenceCollector:
+        return SequenceCollector()
+
+    def merge(self, other: SequenceCollector) -> None:
+        self.rows.update(other.rows)
+
+    def columns(self, paths: Sequence[str | os.PathLike]) -> dict[str, list]:
+        """Header fields of files in a column per field, see
+        `dpx_validator.batch.read_header_columns`. Headers of files which
+        were not validated with the collector are read from the files.
+
+        :param paths: Paths of DPX files
+        :returns: Dict of lists of field values by `SEQUENCE_FIELDS`
+        """
+        paths = [os.fsdecode(path) for path in paths]
+        unread = [path for path in paths if path not in self.rows]
+        read = read_header_columns(unread, SEQUENCE_FIELDS) \
+            if unread else {name: [] for name in SEQUENCE_FIELDS}
+        read_rows = dict(zip(unread, zip(*read.values())))
+
+        columns = {name: [] for name in SEQUENCE_FIELDS}
+        lists = list(columns.values())
+        empty = (None,) * len(SEQUENCE_FIELDS)
+        for path in paths:
+            row = self.rows[path] if path in self.rows else read_rows[path]
+            for column, value in zip(lists, row or empty):
+                column.append(value)
+        return columns
+
+
+def frame_ranges(frames: Iterable[int]) -> tuple[tuple[int, int], ...]:
+    """Collapse sorted frame numbers into ``(first, last)`` ranges of
+    consecutive frames."""
+    ranges = []
+    for frame in frames:
+        if ranges and frame - ranges[-1][1] <= 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return tuple((first, last) for first, last in ranges)
+
+
+def _display(value: Any) -> Any:
+    """Header field value as shown in messages."""
+    if isinstance(value, bytes):
+        return decode_string(value)
+    return value
+
+
+def timecode_text(timecode: int) -> str:
+    """Format a binary coded decimal time code as ``HH:MM:SS:FF``."""
+    digits = "%08x" % timecode
+    return ":".join(digits[index:index + 2] for index in range(0, 8, 2))
+
+
+def timecode_frames(timecode: int, rate: float) -> int | None:
+    """Count the frames from midnight to a time code.
+
+    Time codes of the NTSC rates 29.97 and 59.94 are counted with drop
+    frames.
+
+    :param timecode: Binary coded decimal time code from the television
+        header
+    :param rate: Frame rate
+    :returns: Number of frames, or None if the time code is undefined or
+        not valid
+    """
+    if timecode is None or timecode == UNDEFINED_U32:
+        return None
+    digits = [(timecode >> shift) & 0xF for shift in range(28, -4, -4)]
+    if any(digit > 9 for digit in digits):
+        return None
+    hours, minutes, seconds, frames = (
+        digits[index] * 10 + digits[index + 1] for index in range(0, 8, 2)
+    )
+    nominal = round(rate)
+    if hours >= 24 or minutes >= 60 or seconds >= 60 or frames >= nominal:
+        return None
+
+    total_minutes = hours * 60 + minutes
+    count = (total_minutes * 60 + seconds) * nominal + frames
+    if nominal in DROP_FRAME_RATES and not rate.is_integer():
+        count -= DROP_FRAME_RATES[nominal] * (
+            total_minutes - total_minutes // 10)
+    return count
+
+
+def _frames_per_day(rate: float) -> int:
+    """Number of time code frames in 24 hours."""
+    nominal = round(rate)
+    frames = 24 * 60 * 60 * nominal
+    if nominal in DROP_FRAME_RATES and not rate.is_integer():
+        frames -= DROP_FRAME_RATES[nominal] * 24 * 54
+    return frames
+
+
+def _frame_rate(columns: dict[str, list]) -> float | None:
+    """Most common defined frame rate of the television header, or of the
+    film header if the television header has none."""
+    industry = columns["industry_header_size"]
+    for name in ("tv_frame_rate", "film_frame_rate"):
+        rates = Counter(
+            round(rate, 3) for size, rate in zip(industry, columns[name])
+            if size not in (None, 0, UNDEFINED_U32) and rate is not None
+            and math.isfinite(rate) and rate >= 1
+        )
+        if rates:
+            return rates.most_common(1)[0][0]
+    return None
+
+
+def _check_frame_numbers(frames: list[int]) -> list[Message]:
+    """Report missing and duplicate frames of a sorted sequence."""
+    messages = []
+    pairs = list(zip(frames, frames[1:]))
+    missing = tuple(
+        (previous + 1, frame - 1) for previous, frame in pairs
+        if frame - previous > 1
+    )
+    if missing:
+        messages.append(message(MessageCode.MISSING_FRAMES, *missing))
+    duplicates = frame_ranges(sorted(
+        {frame for previous, frame in pairs if frame == previous}))
+    if duplicates:
+        messages.append(message(MessageCode.DUPLICATE_FRAMES, *duplicates))
+    return messages
+
+
+def _check_consistency(
+    frames: list[int], columns: dict[str, list]
+) -> list[Message]:
+    """Report header fields which differ from the most common value of the
+    sequence."""
+    messages = []
+    for field, name in CONSISTENT_FIELDS.items():
+        column = columns[field]
+        counts = Counter(value for value in column if value is not None)
+        if len(counts) < 2:
+            continue
+        expected = counts.most_common(1)[0][0]
+        differing: dict[Any, list[int]] = {}
+        for frame, value in zip(frames, column):
+            if value is not None and value != expected:
+                differing.setdefault(value, []).append(frame)
+        messages.append(message(
+            MessageCode.INCONSISTENT_HEADER, name, _display(expected),
+            *(
+                (_display(value), frame_ranges(value_frames))
+                for value, value_frames in differing.items()
+            )
+        ))
+    return messages
+
+
+def _check_timecodes(
+    frames: list[int], columns: dict[str, list]
+) -> list[Message]:
+    """Report time codes which do not advance with the frame numbers."""
+    industry = columns["industry_header_size"]
+    timecodes = [
+        None if size in (None, 0, UNDEFINED_U32) else timecode
+        for size, timecode in zip(industry, columns["timecode"])
+    ]
+    if all(timecode in (None, UNDEFINED_U32) for timecode in timecodes):
+        return []
+
+    rate = _frame_rate(columns)
+    if rate is None:
+        return [message(
+            MessageCode.TIMECODE_NOT_CHECKED, "frame rate is undefined")]
+
+    counts = [timecode_frames(timecode, rate) for timecode in timecodes]
+    frames_per_day = _frames_per_day(rate)
+    jumps = tuple(
+        (previous_frame, timecode_text(timecodes[index - 1]),
+         frame, timecode_text(timecodes[index]))
+        for index, (previous_frame, frame, previous_count, count) in
+        enumerate(zip(frames, frames[1:], counts, counts[1:]), 1)
+        if previous_count is not None and count is not None
+        and frame != previous_frame
+        and (count - previous_count) % frames_per_day
+        != (frame - previous_frame) % frames_per_day
+    )
+    if jumps:
+        return [message(MessageCode.TIMECODE_DISCONTINUITY, *jumps)]
+    return []
+
+
+def check_sequence(
+    sequence: FrameSequence, collector: SequenceCollector | None = None
+) -> tuple[bool, dict[str, Any], list[Message]]:
+    """Check the frame numbers and the headers of a sequence.
+
+    :param sequence: `FrameSequence` sorted by frame number
+    :param collector: `SequenceCollector` which observed the validation of
+        the frames. Headers of the frames are read from the files if not
+        given.
+    :returns: Tuple of the validity of the sequence, a dict with the number
+        of frames and the first and last frame, and a list of messages
+    """
+    frames = sequence.frames
+    if collector is None:
+        columns = read_header_columns(sequence.paths, SEQUENCE_FIELDS)
+    else:
+        columns = collector.columns(sequence.paths)
+
+    messages = [message(
+        MessageCode.SEQUENCE, len(frames), frames[0], frames[-1])]
+    messages += _check_frame_numbers(frames)
+    messages += _check_consistency(frames, columns)
+    messages += _check_timecodes(frames, columns)
+
+    output = {
+        "frames": len(frames),
+        "first_frame": frames[0],
+        "last_frame": frames[-1],
+    }
+    valid = all(msg.type is MessageType.INFO for msg in messages)
+    return (valid, output, messages)
+
+
+def check_sequences(
+    paths: Iterable[str | os.PathLike],
+    collector: SequenceCollector | None = None
+) -> Iterator[tuple[str, bool, dict[str, Any], list[Message]]]:
+    """Group files into sequences and check each sequence.
+
+    :param paths: Paths of DPX files
+    :param collector: `SequenceCollector` which observed the validation of
+        the files, see `check_sequence`
+    :returns: Iterator of ``(name, valid, output, logs)`` tuples, see
+        `check_sequence`
+    """
+    for sequence in group_sequences(paths):
+        yield (sequence.name, *check_sequence(sequence, collector))
@@ -0,0 +1,222 @@
+"""Validation daemon serving requests over a Unix domain socket.
+
+The server is started with ``dpx-validator serve --socket PATH``. Clients
+send one request per line: either a path, or a JSON object such as::
+
+    {"path": "/reel/frame.0001.dpx", "deep": true, "algorithms": ["md5"],
+     "id": 1}
+
+where all keys but ``path`` are optional. For each request, a JSON object
+with the result is sent back on its own line in the order of the requests.
+The object has the keys written by ``--format jsonl``, the ``id`` of the
+request if it was given, or an ``error`` key if the file could not be
+validated.
+
+Files are validated in a pool of threads shared by all connections, so the
+number of files read concurrently is bounded regardless of the number of
+clients. `dpx_validator.client` is a thin client for the server.
+"""
+
+from __future__ import annotations
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from dpx_validator.api import validate_file
+from dpx_validator.cache import ResultCache
+from dpx_validator.dpx_validator import HeaderMemo
+from dpx_validator.fixity import ALGORITHMS
+from dpx_validator.output import OUTPUT_BUFFER_SIZE, result_record
+
+# Number of requests of a connection validated or waiting to be sent back
+# at once, per worker thread
+PENDING_PER_WORKER = 2
+
+
+class ServerRunning(Exception):
+    """Another server is listening on the socket."""
+
+
+def parse_request(line: bytes) -> dict[str, Any]:
+    """Parse a request line.
+
+    :param line: Path, or a JSON object with a "path" key, optionally
+        followed by a newline
+    :raises ValueError: Request is not valid
+    :returns: Dict of the request
+    """
+    text = line.rstrip(b"\r\n").decode("utf-8", "surrogateescape")
+    if not text.lstrip().startswith("{"):
+        return {"path": text}
+
+    request = json.loads(text)
+    if not isinstance(request, dict) or \
+            not isinstance(request.get("path"), str):
+        raise ValueError("Request must be an object with a path")
+    if not isinstance(request.get("deep", False), bool):
+        raise ValueError("Deep must be true or false")
+    algorithms = request.get("algorithms", [])
+    if not isinstance(algorithms, list) or \
+            not all(isinstance(name, str) for name in algorithms):
+        raise ValueError("Algorithms must be a list of names")
+    unknown = set(algorithms) - set(ALGORITHMS)
+    if unknown:
+        raise ValueError(
+            "Unsupported algorithms: %s" % ", ".join(sorted(unknown)))
+    return request
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handler of a connection. Requests are read in the handler thread
+    and results are sent from a writer thread in the order of the
+    requests."""
+
+    wbufsize = OUTPUT_BUFFER_SIZE
+
+    def handle(self) -> None:
+        pending: queue.Queue[Future | None] = queue.Queue(
+            maxsize=self.server.workers * PENDING_PER_WORKER)
+        writer = threading.Thread(target=self._send_results, args=(pending,))
+        writer.start()
+        try:
+            for line in self.rfile:
+                if line.strip():
+                    pending.put(self.server.submit(line))
+        finally:
+            pending.put(None)
+            writer.join()
+            if self.server.cache is not None:
+                self.server.cache.flush()
+
+    def _send_results(self, pending: queue.Queue[Future | None]) -> None:
+        """Send results as they are ready, flushing when no results are
+        ready."""
+        try:
+            while (future := pending.get()) is not None:
+                try:
+                    response = json.dumps(future.result()) + "\n"
+                except Exception as error:
+                    response = json.dumps({"error": str(error)}) + "\n"
+                self.wfile.write(response.encode("utf-8"))
+                if pending.empty():
+                    self.wfile.flush()
+        except OSError:
+            # Client disconnected, the remaining results are discarded
+            while pending.get() is not None:
+                pass
+
+
+class ValidationServer(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+    """Server validating files requested over a Unix domain socket."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str | os.PathLike,
+        workers: int | None = None,
+        cache: ResultCache | None = None,
+        memo: HeaderMemo | None = None,
+        deep: bool = False,
+        algorithms: tuple[str, ...] = ()
+    ) -> None:
+        """
+        :param socket_path: Path of the socket. A stale socket left by a
+            server which is not running is replaced.
+        :param workers: Number of threads validating files, defaults to the
+            number of CPUs plus four (at most 32)
+        :param cache: `dpx_validator.cache.ResultCache` for results of
+            unchanged files, flushed after each connection. The cache is not
+            closed with the server.
+        :param memo: `dpx_validator.dpx_validator.HeaderMemo` shared by all
+            requests, a new memo if not given
+        :param deep: Default for requests without "deep"
+        :param algorithms: Default for requests without "algorithms"
+        :raises ServerRunning: Another server listens on the socket
+        """
+        if workers is None:
+            workers = min(32, (os.cpu_count() or 1) + 4)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers)
+        self.cache = cache
+        self.memo = HeaderMemo() if memo is None else memo
+        self.deep = deep
+        self.algorithms = tuple(algorithms)
+
+        socket_path = os.fspath(socket_path)
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def submit(self, line: bytes) -> Future:
+        """Validate a request line in the worker pool.
+
+        :param line: Request line, see `parse_request`
+        :returns: Future of the response dict
+        """
+        return self.executor.submit(self.respond, line)
+
+    def respond(self, line: bytes) -> dict[str, Any]:
+        """Validate a request line.
+
+        :param line: Request line, see `parse_request`
+        :returns: Response dict, with an "error" key if the request is not
+            valid or the file could not be validated
+        """
+        try:
+            request = parse_request(line)
+        except ValueError as error:
+            return {"error": "Invalid request: %s" % error}
+
+        path = request["path"]
+        try:
+            record = result_record(path, *validate_file(
+                path,
+                cache=self.cache,
+                memo=self.memo,
+                deep=request.get("deep", self.deep),
+                algorithms=request.get("algorithms", self.algorithms),
+                compact=True
+            ))
+        except Exception as error:
+            # Any failure is sent back, so that the connection keeps
+            # receiving responses
+            record = {"path": path, "error": str(error)}
+        if "id" in request:
+            record["id"] = request["id"]
+        return record
+
+    def server_close(self) -> None:
+        """Close the socket, remove the socket file and stop the workers."""
+        super().server_close()
+        self.executor.shutdown()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file if no server is listening on it.
+
+    :raises ServerRunning: Another server listens on the socket
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise ServerRunning("Server is already listening on %s" % path)
@@ -0,0 +1,367 @@
+"""Timing and I/O statistics of validation.
+
+A `ValidationObserver` given to `dpx_validator.api.validate_file` or to
+`dpx_validator.dpx_validator.DpxValidator` receives the wall time, the bytes
+read and the number of read and seek calls of each validation procedure, and
+the totals of each file. `StatisticsCollector` aggregates them into latency
+percentiles and a histogram of the failed procedures.
+
+I/O is counted with `CountingReader`, which wraps the file object. Reads of
+a header block or of image data larger than the buffer of the file object
+each make one system call, so the number of calls is close to the number of
+system calls made.
+"""
+
+from __future__ import annotations
+import math
+import os
+import threading
+from collections import Counter
+from io import BufferedReader
+from typing import Any
+
+from dpx_validator.messages import MessageType
+
+# Latencies are counted in buckets growing by 2 % from one microsecond, so
+# that percentiles are accurate to 2 % without keeping each latency
+LATENCY_PRECISION = 0.02
+MIN_LATENCY = 1e-6
+PERCENTILES = (50, 95, 99)
+
+
+class IOCounter:
+    """Number of bytes read and of read and seek calls."""
+
+    __slots__ = ("bytes_read", "calls")
+
+    def __init__(self) -> None:
+        self.bytes_read = 0
+        self.calls = 0
+
+
+class CountingReader:
+    """File wrapper counting the bytes read and the calls made."""
+
+    def __init__(
+        self, file_handle: BufferedReader, counter: IOCounter | None = None
+    ) -> None:
+        """
+        :param file_handle: File opened in binary mode
+        :param counter: Counter to add to, a new counter if not given
+        """
+        self.file_handle = file_handle
+        self.counter = IOCounter() if counter is None else counter
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Change the position in the file."""
+        self.counter.calls += 1
+        return self.file_handle.seek(offset, whence)
+
+    def tell(self) -> int:
+        """Return the position in the file."""
+        return self.file_handle.tell()
+
+    def readinto(self, buffer: Any) -> int:
+        """Read bytes into a buffer."""
+        length = self.file_handle.readinto(buffer) or 0
+        self.counter.calls += 1
+        self.counter.bytes_read += length
+        return length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes."""
+        data = self.file_handle.read(size)
+        self.counter.calls += 1
+        self.counter.bytes_read += len(data)
+        return data
+
+
+class ValidationObserver:
+    """
+    Receiver of validation measurements. The methods do nothing by default
+    and are overridden in subclasses.
+
+    Observers are called from the threads which validate the files. When
+    files are validated in worker processes, each chunk of files is
+    measured with an observer from `spawn`, which is sent back and combined
+    into this observer with `merge`.
+    """
+
+    def procedure(
+        self,
+        path: str | os.PathLike,
+        name: str,
+        seconds: float,
+        bytes_read: int,
+        calls: int,
+        message: tuple[MessageType, str] | None,
+        memoized: bool = False
+    ) -> None:
+        """Called after each validation procedure.
+
+        :param path: Path of the file
+        :param name: Name of the procedure, such as "check_version"
+        :param seconds: Wall time of the procedure
+        :param bytes_read: Bytes read from the file by the procedure
+        :param calls: Read and seek calls made by the procedure
+        :param message: Message of the procedure, or None
+        :param memoized: Outcome of the procedure was reused from
+            `dpx_validator.dpx_validator.HeaderMemo` and it was not run
+        """
+
+    def file(
+        self,
+        path: str | os.PathLike,
+        seconds: float,
+        stat_seconds: float | None,
+        bytes_read: int,
+        calls: int,
+        valid: bool,
+        cached: bool = False
+    ) -> None:
+        """Called after each file validated with `validate_file`.
+
+        :param path: Path of the file
+        :param seconds: Wall time of validating the file
+        :param stat_seconds: Wall time of stat'ing the file, or None if the
+            stat result was given
+        :param bytes_read: Bytes read from the file
+        :param calls: Read and seek calls made on the file
+        :param valid: Validity of the file
+        :param cached: Result was read from the result cache
+        """
+
+    def header(self, path: str | os.PathLike, header: dict[str, Any]) -> None:
+        """Called after the basic procedures of a file beginning with a
+        magic number, with the header decoded by the procedures.
+
+        :param path: Path of the file
+        :param header: Header from
+            `dpx_validator.header_layout.parse_header`
+        """
+
+    def spawn(self) -> ValidationObserver:
+        """Observer for a chunk of files validated in a worker process."""
+        return self
+
+    def merge(self, other: ValidationObserver) -> None:
+        """Combine the measurements of an observer from `spawn`."""
+
+
+class ObserverGroup(ValidationObserver):
+    """Observer passing the measurements on to several observers."""
+
+    def __init__(self, *observers: ValidationObserver) -> None:
+        self.observers = observers
+
+    def procedure(self, *args, **kwargs) -> None:
+        for observer in self.observers:
+            observer.procedure(*args, **kwargs)
+
+    def file(self, *args, **kwargs) -> None:
+        for observer in self.observers:
+            observer.file(*args, **kwargs)
+
+    def header(self, path, header) -> None:
+        for observer in self.observers:
+            observer.header(path, header)
+
+    def spawn(self) -> ObserverGroup:
+        return ObserverGroup(
+            *(observer.spawn() for observer in self.observers))
+
+    def merge(self, other: ObserverGroup) -> None:
+        for observer, chunk_observer in zip(
+                self.observers, other.observers):
+            observer.merge(chunk_observer)
+
+
+class LatencyHistogram:
+    """Latencies counted in logarithmic buckets."""
+
+    __slots__ = ("buckets", "count", "total", "maximum")
+
+    def __init__(self) -> None:
+        self.buckets: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Count a latency."""
+        index = 0
+        if seconds > MIN_LATENCY:
+            index = math.ceil(
+                math.log(seconds / MIN_LATENCY)
+                / math.log1p(LATENCY_PRECISION)
+            )
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        """Add the latencies of another histogram."""
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, percent: float) -> float:
+        """Latency below which the given percentage of latencies fall.
+
+        :param percent: Percentage from 0 to 100
+        :returns: Upper bound of the bucket of the percentile, or zero if no
+            latencies are counted
+        """
+        rank = math.ceil(percent / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(
+                    self.maximum,
+                    MIN_LATENCY * (1 + LATENCY_PRECISION) ** index
+                )
+        return 0.0
+
+
+class ProcedureStatistics:
+    """Aggregated measurements of a procedure or of whole files."""
+
+    __slots__ = ("latency", "bytes_read", "calls", "memoized")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.bytes_read = 0
+        self.calls = 0
+        self.memoized = 0
+
+    def merge(self, other: ProcedureStatistics) -> None:
+        """Add the measurements of another instance."""
+        self.latency.merge(other.latency)
+        self.bytes_read += other.bytes_read
+        self.calls += other.calls
+        self.memoized += other.memoized
+
+
+def _format_seconds(seconds: float) -> str:
+    """Format a latency in milliseconds."""
+    return "%.3f ms" % (seconds * 1000)
+
+
+class StatisticsCollector(ValidationObserver):
+    """Observer aggregating latency percentiles, I/O per call and the
+    number of failures of each procedure."""
+
+    def __init__(self) -> None:
+        self.procedures: dict[str, ProcedureStatistics] = {}
+        self.files = ProcedureStatistics()
+        self.stats = LatencyHistogram()
+        self.invalid = 0
+        self.cached = 0
+        self.errors: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Pickle without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def procedure(
+        self, path, name, seconds, bytes_read, calls, message,
+        memoized=False
+    ) -> None:
+        with self._lock:
+            statistics = self.procedures.get(name)
+            if statistics is None:
+                statistics = self.procedures[name] = ProcedureStatistics()
+            if memoized:
+                statistics.memoized += 1
+            else:
+                statistics.latency.add(seconds)
+                statistics.bytes_read += bytes_read
+                statistics.calls += calls
+            if message is not None and message[0] is MessageType.ERROR:
+                self.errors[name] += 1
+
+    def file(
+        self, path, seconds, stat_seconds, bytes_read, calls, valid,
+        cached=False
+    ) -> None:
+        with self._lock:
+            self.files.latency.add(seconds)
+            self.files.bytes_read += bytes_read
+            self.files.calls += calls
+            if stat_seconds is not None:
+                self.stats.add(stat_seconds)
+            self.invalid += not valid
+            self.cached += cached
+
+    def spawn(self) -> StatisticsCollector:
+        return StatisticsCollector()
+
+    def merge(self, other: StatisticsCollector) -> None:
+        with self._lock:
+            for name, statistics in other.procedures.items():
+                self.procedures.setdefault(
+                    name, ProcedureStatistics()).merge(statistics)
+            self.files.merge(other.files)
+            self.stats.merge(other.stats)
+            self.invalid += other.invalid
+            self.cached += other.cached
+            self.errors.update(other.errors)
+
+    def report(self) -> str:
+        """Format the statistics as a table.
+
+        :returns: Multiline report
+        """
+        columns = "".join("%10s" % ("p%s" % p) for p in PERCENTILES)
+
+        def row(name, statistics):
+            latency = statistics.latency
+            runs = latency.count
+            return "%-24s%8s%s%10s%7s" % (
+                name, runs,
+                "".join(
+                    "%10s" % _format_seconds(latency.percentile(p))
+                    for p in PERCENTILES
+                ),
+                "%.0f" % (statistics.bytes_read / runs) if runs else "-",
+                "%.1f" % (statistics.calls / runs) if runs else "-",
+            )
+
+        lines = [
+            "Files: %s (%s invalid, %s cached)" % (
+                self.files.latency.count, self.invalid, self.cached),
+            "%-24s%8s%s%10s%7s" % ("", "runs", columns, "bytes", "calls"),
+            row("file", self.files),
+        ]
+        if self.stats.count:
+            lines.append("%-24s%8s%s" % (
+                "stat", self.stats.count,
+                "".join(
+                    "%10s" % _format_seconds(self.stats.percentile(p))
+                    for p in PERCENTILES
+                )
+            ))
+        for name, statistics in self.procedures.items():
+            line = row(name, statistics)
+            if statistics.memoized:
+                line += "  (%s memoized)" % statistics.memoized
+            lines.append(line)
+
+        if self.errors:
+            lines.append("Errors:")
+            lines.extend(
+                "  %-30s%8s" % (name, count)
+                for name, count in self.errors.most_common()
+            )
+
+        return "\n".join(lines)
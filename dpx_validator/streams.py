@@ -0,0 +1,143 @@
+"""File-like readers of DPX data which is not in a file.
+
+`BufferReader` reads from a bytes-like object, such as `bytes`,
+`memoryview` or `mmap.mmap`, and lets
+`dpx_validator.file_header_reader.FileHeaderReader` decode the header from
+a view to the buffer without copying it. `ForwardReader` wraps a stream
+which can only be read forward, such as an upload or a pipe, and skips data
+by reading it when seeking forward.
+"""
+
+from __future__ import annotations
+import io
+import os
+from typing import Any, BinaryIO
+
+# Size of the chunks skipped data is read in by `ForwardReader`
+SKIP_CHUNK_SIZE = 64 * 1024
+
+
+class BufferReader:
+    """File-like reader of a bytes-like object."""
+
+    def __init__(self, buffer: Any) -> None:
+        """
+        :param buffer: Bytes-like object supporting the buffer protocol
+        """
+        self.view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def getbuffer(self) -> memoryview:
+        """View to the whole buffer."""
+        return self.view
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Change the position in the buffer."""
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError("Negative seek position %s" % offset)
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        """Return the position in the buffer."""
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        """Copy bytes from the position into a buffer."""
+        with memoryview(buffer) as target:
+            data = self.view[self._position:self._position + len(target)]
+            length = len(data)
+            target[:length] = data
+        self._position += length
+        return length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes, or to the end if `size` is
+        negative."""
+        end = None if size is None or size < 0 else self._position + size
+        data = bytes(self.view[self._position:end])
+        self._position += len(data)
+        return data
+
+
+class ForwardReader:
+    """File-like reader of a stream which cannot seek. Seeking forward
+    reads and discards the data in between, and seeking backward raises
+    `io.UnsupportedOperation`."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """
+        :param stream: Readable binary stream at the beginning of the data
+        """
+        self.stream = stream
+        self._position = 0
+        self._skip_buffer: bytearray | None = None
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Move forward to a position.
+
+        :raises io.UnsupportedOperation: The position is behind the
+            current position or relative to the end
+        """
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("Stream cannot seek from the end")
+        if offset < self._position:
+            raise io.UnsupportedOperation(
+                "Stream cannot seek backward from %s to %s"
+                % (self._position, offset)
+            )
+
+        if self._skip_buffer is None and offset > self._position:
+            self._skip_buffer = bytearray(SKIP_CHUNK_SIZE)
+        while self._position < offset:
+            size = min(SKIP_CHUNK_SIZE, offset - self._position)
+            length = self.readinto(memoryview(self._skip_buffer)[:size])
+            if not length:
+                # Seeking past the end of a file is allowed
+                break
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        """Return the position in the stream."""
+        return self._position
+
+    def _read_some(self, target: memoryview) -> int:
+        """Read at most the size of `target` bytes from the stream into it,
+        also from streams without `readinto`."""
+        readinto = getattr(self.stream, "readinto", None)
+        if readinto is not None:
+            return readinto(target) or 0
+        data = self.stream.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def readinto(self, buffer: Any) -> int:
+        """Read bytes into a buffer, until the buffer is full or the stream
+        ends."""
+        with memoryview(buffer) as target:
+            filled = 0
+            while filled < len(target):
+                length = self._read_some(target[filled:])
+                if not length:
+                    break
+                filled += length
+        self._position += filled
+        return filled
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes, or to the end if `size` is
+        negative."""
+        if size is not None and size >= 0:
+            data = bytearray(size)
+            return bytes(data[:self.readinto(data)])
+
+        data = self.stream.read()
+        self._position += len(data)
+        return data
@@ -5,9 +5,12 @@ from version import get_version
 setup(
     name="dpx-validator",
     version=get_version(),
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     include_package_data=True,
     entry_points={
-        'console_scripts': ["dpx-validator=dpx_validator.main:main"]
+        'console_scripts': [
+            "dpx-validator=dpx_validator.main:main",
+            "dpx-validator-client=dpx_validator.client:main"
+        ]
     }
 )
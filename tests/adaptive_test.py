@@ -0,0 +1,86 @@
+"""Test adaptive concurrency"""
+
+import pytest
+
+from dpx_validator.adaptive import MIN_WINDOW, AdaptiveConcurrency
+from dpx_validator.api import validate_file, validate_files
+
+
+class FakeClock:
+    """Clock advanced by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_window(controller, clock, seconds, latency):
+    """Complete a window of files in `seconds` with a per-file latency."""
+    files = max(MIN_WINDOW, 2 * controller.limit)
+    clock.now += seconds
+    controller.record(latency * files, files)
+
+
+def test_increase_while_throughput_improves():
+    """Test that the limit grows by one per window while throughput
+    improves, up to the maximum."""
+    clock = FakeClock()
+    controller = AdaptiveConcurrency(initial=4, maximum=6, clock=clock)
+
+    for seconds in (1.0, 0.5, 0.25, 0.1, 0.05):
+        run_window(controller, clock, seconds, 0.01)
+    assert controller.limit == 6
+
+
+def test_decrease_on_latency_spike():
+    """Test that the limit is cut when latency spikes without a gain in
+    throughput, and kept when latency is stable."""
+    clock = FakeClock()
+    controller = AdaptiveConcurrency(initial=10, clock=clock)
+
+    run_window(controller, clock, 1.0, 0.01)
+    assert controller.limit == 11
+
+    run_window(controller, clock, 2.0, 0.01)
+    assert controller.limit == 11
+
+    run_window(controller, clock, 4.0, 0.05)
+    assert controller.limit == 7
+
+
+def test_minimum():
+    """Test that the limit is not cut below the minimum."""
+    clock = FakeClock()
+    controller = AdaptiveConcurrency(initial=2, minimum=2, clock=clock)
+
+    run_window(controller, clock, 1.0, 0.01)
+    for _ in range(5):
+        run_window(controller, clock, 10.0, 1.0)
+    assert controller.limit == 2
+
+
+def test_invalid_limits():
+    """Test that inconsistent limits are rejected."""
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(minimum=5, maximum=4)
+
+
+def test_validate_files_adaptive():
+    """Test that adaptive validation yields the results of `validate_file`
+    in order, and records the files in the controller."""
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/corrupted_dpx.dpx',
+        'tests/data/empty_file.dpx',
+    ] * 20
+    controller = AdaptiveConcurrency(maximum=8)
+
+    results = list(validate_files(paths, concurrency=controller))
+
+    assert [result[0] for result in results] == paths
+    for path, valid, output, logs in results:
+        assert (valid, output, logs) == validate_file(path)
+    assert controller.throughput is not None
+    assert 1 <= controller.limit <= 8
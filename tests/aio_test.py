@@ -0,0 +1,77 @@
+"""Test the `dpx_validator.aio` module"""
+
+import asyncio
+import threading
+
+import pytest
+
+from dpx_validator import aio, api
+from dpx_validator.api import validate_file
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/invalid_version.dpx',
+] * 10
+
+
+def test_validate_file():
+    """Test that the result equals the synchronous result."""
+    result = asyncio.run(aio.validate_file(PATHS[0], deep=True))
+
+    assert result == validate_file(PATHS[0], deep=True)
+
+
+@pytest.mark.parametrize("chunksize", [1, 4])
+def test_validate_many_ordered(chunksize):
+    """Test that ordered results are in the order of the paths."""
+    async def collect():
+        return [
+            result async for result in aio.validate_many(
+                PATHS, concurrency=3, chunksize=chunksize, ordered=True)
+        ]
+
+    results = asyncio.run(collect())
+
+    assert results == [(path, *validate_file(path)) for path in PATHS]
+
+
+def test_validate_many_async_paths():
+    """Test taking paths from an async iterator."""
+    async def paths():
+        for path in PATHS:
+            await asyncio.sleep(0)
+            yield path
+
+    async def collect():
+        return [path async for path, *_ in aio.validate_many(paths())]
+
+    assert sorted(asyncio.run(collect())) == sorted(PATHS)
+
+
+def test_concurrency_limit(monkeypatch):
+    """Test that at most `concurrency` files are validated at once, also
+    when calls are shared between coroutines."""
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def slow_validate_file(path, **options):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+        return validate_file(path, **options)
+
+    monkeypatch.setattr(api, "validate_file", slow_validate_file)
+
+    async def run():
+        async with aio.AsyncValidator(concurrency=2) as validator:
+            await asyncio.gather(
+                *(validator.validate_file(path) for path in PATHS),
+                *(validator.validate_file(path) for path in PATHS),
+            )
+
+    asyncio.run(run())
+    assert running[1] == 2
@@ -2,8 +2,17 @@
 
 import pytest
 
+import os
+
+from dpx_validator.fixity import Manifest
 from dpx_validator.messages import MessageType
-from dpx_validator.api import validate_file
+from dpx_validator import api, dpx_validator
+from dpx_validator.api import (
+    scan_tree,
+    validate_batch,
+    validate_file,
+    validate_files,
+    validate_tree)
 
 
 @pytest.mark.parametrize("testfile", [
@@ -85,3 +94,265 @@ def test_invalid_files(testfile):
     # Without logging only bool is returned
     valid, _, _ = validate_file(testfile)
     assert not valid
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_validate_files_ordered(workers):
+    """Test that batch validation yields results in the order of paths."""
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/corrupted_dpx.dpx',
+        'tests/data/empty_file.dpx',
+        'tests/data/välíd_dpx1.dpx',
+        'tests/data/invalid_version.dpx'
+    ] * 5
+
+    results = list(validate_files(iter(paths), workers=workers))
+
+    assert [result[0] for result in results] == paths
+    for path, valid, output, logs in results:
+        assert (valid, output, logs) == validate_file(path)
+
+
+def test_validate_files_processes():
+    """Test that results from worker processes match `validate_file`."""
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/corrupted_dpx.dpx',
+        'tests/data/empty_file.dpx',
+    ] * 3
+
+    results = list(
+        validate_files(paths, workers=2, processes=True, chunksize=2))
+
+    assert [result[0] for result in results] == paths
+    for path, valid, output, logs in results:
+        assert (valid, output, logs) == validate_file(path)
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_validate_files_manifest(processes, monkeypatch):
+    """Test that files are verified against a manifest in threads and in
+    worker processes, which get the manifest once and its key with each
+    chunk."""
+    manifest = Manifest({
+        'tests/data/valid_dpx.dpx':
+            ("md5", "4f33c86639a29725038b3eeacb274c9f"),
+        'tests/data/invalid_version.dpx': ("md5", "0" * 32),
+    })
+    submitted = []
+    validate_chunk = api._validate_chunk
+
+    def record_chunk(entries, worker, options):
+        submitted.append(options["manifest"])
+        return validate_chunk(entries, worker, options)
+
+    monkeypatch.setattr(api, "_validate_chunk", record_chunk)
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/invalid_version.dpx',
+        'tests/data/välíd_dpx1.dpx',
+    ]
+
+    results = list(validate_files(
+        paths, workers=2, processes=processes, manifest=manifest,
+        compact=True
+    ))
+
+    assert [result[3][-1].code.name for result in results] == [
+        "DIGEST_MATCHES", "DIGEST_MISMATCH", "NOT_IN_MANIFEST"]
+    assert submitted == [id(manifest) if processes else manifest] * 3
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_validate_files_unreadable(processes):
+    """Test that a file which cannot be read is reported invalid without
+    ending the run."""
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/missing.dpx',
+        'tests/data',
+        'tests/data/valid_dpx.dpx',
+    ]
+
+    results = list(validate_files(
+        paths, workers=2, processes=processes, compact=True))
+
+    assert [result[1] for result in results] == [True, False, False, True]
+    assert results[1][3][0].text == \
+        "File cannot be read: No such file or directory"
+    assert results[2][3][0].text == "File cannot be read: Is a directory"
+
+
+def _mixed_files(test_file_factory):
+    """Paths to valid, invalid and missing files."""
+    return [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/välíd_dpx1.dpx',
+        'tests/data/corrupted_dpx.dpx',
+        'tests/data/empty_file.dpx',
+        'tests/data/invalid_version.dpx',
+        'tests/data/missing.dpx',
+        test_file_factory.create_file(file_name="valid"),
+        test_file_factory.create_file(
+            file_name="little", magic_number=b"XPDS"),
+        test_file_factory.create_file(file_name="magic", magic_number=b"XXXX"),
+        test_file_factory.create_file(file_name="size", file_size=1000),
+        test_file_factory.create_file(file_name="bits", bit_size=11),
+        test_file_factory.create_file(
+            file_name="data", lines_per_element=1000),
+    ]
+
+
+def _invalid_results(paths):
+    """Results of the invalid files validated one by one."""
+    results = list(validate_files(paths, workers=1))
+    return [result for result in results if not result[1]]
+
+
+def test_validate_batch(test_file_factory):
+    """Test that batch validation reports the same invalid files as
+    validating each file separately."""
+    paths = _mixed_files(test_file_factory)
+
+    assert validate_batch(paths) == _invalid_results(paths)
+    assert validate_batch([]) == []
+
+
+@pytest.mark.parametrize("options", [
+    {"workers": 1},
+    {"workers": 2, "processes": True},
+    {"workers": 2, "schedule": "inode"},
+    {"workers": 2, "deep": True},
+    {"workers": 2, "ordered": False},
+])
+def test_validate_files_invalid_only(test_file_factory, options):
+    """Test that only the results of invalid files are yielded, in the
+    order of the paths unless unordered."""
+    paths = _mixed_files(test_file_factory)
+    expected = _invalid_results(paths)
+
+    results = list(validate_files(
+        paths, chunksize=5, invalid_only=True, **options))
+
+    if options.get("ordered") is False:
+        results.sort(key=lambda result: paths.index(result[0]))
+    assert results == expected
+
+
+def test_validate_files_unordered():
+    """Test that unordered batch validation yields every path once."""
+    paths = ['tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx'] * 10
+
+    results = list(validate_files(paths, workers=3, ordered=False))
+
+    assert sorted(result[0] for result in results) == sorted(paths)
+
+
+def test_validate_files_consumes_lazily():
+    """Test that paths are not consumed far ahead of the results."""
+    consumed = []
+
+    def paths():
+        for _ in range(100):
+            consumed.append(None)
+            yield 'tests/data/valid_dpx.dpx'
+
+    results = validate_files(paths(), workers=2)
+    next(results)
+    assert len(consumed) <= 5
+    results.close()
+
+
+def test_validate_file_reuses_stat(monkeypatch):
+    """Test that a given stat result is used instead of stat'ing again."""
+    path = 'tests/data/valid_dpx.dpx'
+    file_stat = os.stat(path)
+
+    def fail_stat(_path):
+        raise AssertionError("File stat'ed again")
+
+    monkeypatch.setattr(api, "stat", fail_stat)
+    monkeypatch.setattr(dpx_validator, "stat", fail_stat)
+
+    valid, output, _ = validate_file(path, file_stat)
+    assert valid
+    assert output["size"] == file_stat.st_size
+
+
+def test_scan_tree(test_file_factory, tmp_path):
+    """Test that DPX files are found recursively in sorted order."""
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "c").mkdir(parents=True)
+    test_file_factory.create_file(file_name="b/2.dpx")
+    test_file_factory.create_file(file_name="a/c/1.DPX")
+    test_file_factory.create_file(file_name="a/1.dpx")
+    test_file_factory.create_file(file_name="0.dpx")
+    test_file_factory.create_file(file_name="no_extension")
+    (tmp_path / "a" / "notes.txt").write_text("Not a DPX file")
+
+    found = [
+        os.path.relpath(path, tmp_path)
+        for path, _ in scan_tree(tmp_path)
+    ]
+    assert found == ["0.dpx", "a/1.dpx", "a/c/1.DPX", "b/2.dpx"]
+
+    found = [
+        os.path.relpath(path, tmp_path)
+        for path, _ in scan_tree(tmp_path, extensions=None)
+    ]
+    assert found == [
+        "0.dpx", "no_extension", "a/1.dpx", "a/c/1.DPX", "b/2.dpx"
+    ]
+
+
+def test_validate_tree_unreadable(test_file_factory, tmp_path, monkeypatch):
+    """Test that a file which cannot be read while the tree is walked is
+    reported invalid and the walk continues."""
+    test_file_factory.create_file(file_name="a")
+    test_file_factory.create_file(file_name="b")
+    test_file_factory.create_file(file_name="c")
+    unreadable = str(tmp_path / "b")
+
+    def restricted_open(path, *args, **kwargs):
+        if os.fspath(path) == unreadable:
+            raise PermissionError(13, "Permission denied", path)
+        return open(path, *args, **kwargs)
+
+    monkeypatch.setattr(api, "open", restricted_open, raising=False)
+
+    results = [
+        (os.path.basename(path), valid, [msg.text for msg in logs])
+        for path, valid, _, logs in validate_tree(
+            tmp_path, extensions=None, workers=1, compact=True)
+    ]
+
+    assert [result[:2] for result in results] == [
+        ("a", True), ("b", False), ("c", True)
+    ]
+    assert results[1][2] == ["File cannot be read: Permission denied"]
+
+
+def test_validate_tree(test_file_factory, tmp_path):
+    """Test that files found from a directory are validated."""
+    test_file_factory.create_file(file_name="valid.dpx")
+    test_file_factory.create_file(file_name="invalid.dpx", file_size=1000)
+
+    results = {
+        os.path.basename(path): valid
+        for path, valid, _, _ in validate_tree(tmp_path, workers=2)
+    }
+    assert results == {"invalid.dpx": False, "valid.dpx": True}
+
+
+def test_validate_tree_invalid_only(test_file_factory, tmp_path):
+    """Test that only invalid files are reported from a directory."""
+    test_file_factory.create_file(file_name="valid.dpx")
+    test_file_factory.create_file(file_name="invalid.dpx", file_size=1000)
+
+    results = [
+        (os.path.basename(path), valid)
+        for path, valid, _, _ in validate_tree(
+            tmp_path, workers=2, chunksize=2, invalid_only=True)
+    ]
+    assert results == [("invalid.dpx", False)]
@@ -0,0 +1,68 @@
+"""Test validating DPX files in archives"""
+
+import tarfile
+import zipfile
+
+import pytest
+
+from dpx_validator.api import scan_archive, validate_archive, validate_file
+from dpx_validator.main import main
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/invalid_version.dpx',
+]
+
+
+@pytest.fixture(params=["tar", "tar.gz", "zip-stored", "zip-deflated"])
+def archive(request, tmp_path):
+    """Archive of the test files in a ``frames`` directory and a text
+    file."""
+    kind = request.param
+    (tmp_path / "readme.txt").write_text("Not a DPX file\n")
+    members = [(path, "frames/" + path.rsplit("/", 1)[1]) for path in PATHS]
+    members.append((str(tmp_path / "readme.txt"), "readme.txt"))
+
+    if kind.startswith("tar"):
+        path = tmp_path / ("package." + kind)
+        with tarfile.open(path, "w:gz" if kind == "tar.gz" else "w") as tar:
+            for source, name in members:
+                tar.add(source, arcname=name)
+    else:
+        path = tmp_path / "package.zip"
+        compression = zipfile.ZIP_STORED if kind == "zip-stored" \
+            else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(path, "w", compression) as package:
+            for source, name in members:
+                package.write(source, arcname=name)
+    return path
+
+
+@pytest.mark.parametrize("deep", [False, True])
+def test_validate_archive(archive, deep):
+    """Test that members are validated like the extracted files."""
+    results = list(validate_archive(archive, deep=deep, algorithms=["md5"]))
+
+    assert [path for path, *_ in results] == [
+        str(archive / "frames" / path.rsplit("/", 1)[1]) for path in PATHS
+    ]
+    for (_, *result), path in zip(results, PATHS):
+        assert tuple(result) == tuple(
+            validate_file(path, deep=deep, algorithms=["md5"]))
+
+
+def test_scan_archive_magic_number(archive):
+    """Test finding members by their magic number."""
+    names = [name for name, _, _ in scan_archive(archive, extensions=None)]
+
+    assert names == ["frames/valid_dpx.dpx", "frames/invalid_version.dpx"]
+
+
+def test_archive_main(capsys, archive):
+    """Test validating an archive from the command line."""
+    main(['--archive', str(archive)])
+
+    (out, err) = capsys.readouterr()
+    assert f"File {archive / 'frames' / 'valid_dpx.dpx'} is valid" in out
+    assert "Invalid header version" in err
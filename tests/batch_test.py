@@ -0,0 +1,80 @@
+"""Test the `dpx_validator.batch` module"""
+
+from dpx_validator import batch
+from dpx_validator.api import validate_file
+from dpx_validator.batch import (
+    compile_record,
+    failing_files,
+    read_header_columns)
+from dpx_validator.dpx_validator import HEADER_POS
+from dpx_validator.file_header_reader import (
+    BIGENDIAN_BYTEORDER,
+    HEADER_BLOCK_SIZE)
+
+
+def test_compile_record():
+    """Test that the record covers the header block and the fields of
+    `HEADER_POS`."""
+    record = compile_record(BIGENDIAN_BYTEORDER)
+
+    assert record.size == HEADER_BLOCK_SIZE
+    assert set(HEADER_POS) <= set(record.names)
+
+
+def test_read_header_columns(test_file_factory, monkeypatch):
+    """Test that header fields are read into columns in blocks, with None
+    for files which are not DPX files or cannot be read."""
+    monkeypatch.setattr(batch, "HEADER_BLOCK_FILES", 2)
+    paths = [
+        test_file_factory.create_file(file_name="big"),
+        test_file_factory.create_file(
+            file_name="little", magic_number=b"XPDS", pixels_per_line=64),
+        test_file_factory.create_file(file_name="magic", magic_number=b"XXXX"),
+        'tests/data/empty_file.dpx',
+        'tests/data/missing.dpx',
+    ]
+
+    columns = read_header_columns(
+        paths, ("magic_number", "pixels_per_line"))
+
+    assert columns == {
+        "magic_number": [b"SDPX", b"XPDS", None, None, None],
+        "pixels_per_line": [32, 64, None, None, None],
+    }
+
+
+def test_failing_files(test_file_factory):
+    """Test that the batch check fails exactly the files which are invalid
+    when each file is validated separately."""
+    paths = [
+        'tests/data/valid_dpx.dpx',
+        'tests/data/välíd_dpx1.dpx',
+        'tests/data/corrupted_dpx.dpx',
+        'tests/data/empty_file.dpx',
+        'tests/data/invalid_version.dpx',
+        'tests/data/missing.dpx',
+        test_file_factory.create_file(file_name="valid"),
+        test_file_factory.create_file(
+            file_name="little", magic_number=b"XPDS"),
+        test_file_factory.create_file(file_name="magic", magic_number=b"XXXX"),
+        test_file_factory.create_file(file_name="offset", image_offset=50000),
+        test_file_factory.create_file(file_name="size", file_size=1000),
+        test_file_factory.create_file(file_name="crypt", encrypt=True),
+        test_file_factory.create_file(file_name="ver", version=b"V3.0\0   "),
+        test_file_factory.create_file(file_name="width", pixels_per_line=0),
+        test_file_factory.create_file(file_name="bits", bit_size=11),
+        test_file_factory.create_file(file_name="packing", packing=3),
+        test_file_factory.create_file(
+            file_name="data", lines_per_element=1000),
+    ]
+
+    expected = set()
+    for index, path in enumerate(paths):
+        try:
+            valid, _, _ = validate_file(path)
+        except OSError:
+            valid = False
+        if not valid:
+            expected.add(index)
+    assert failing_files(paths) == expected
+    assert failing_files([]) == set()
@@ -0,0 +1,48 @@
+"""Test the benchmark corpus generator and runner"""
+
+import os
+
+from benchmarks.corpus import SPARSE_FILE_SIZE, corpus_paths, generate_corpus
+from benchmarks.run import compare, measure
+from dpx_validator.api import validate_file
+
+
+def test_generate_corpus(tmp_path):
+    """Test that the corpus has the described mix of files."""
+    corpus = generate_corpus(
+        tmp_path, files=200, invalid=0.3, sparse=0.2, seed=1)
+
+    paths = corpus_paths(tmp_path)
+    assert len(paths) == 200
+    assert sum(corpus["kinds"].values()) == 200
+
+    results = [validate_file(path) for path in paths]
+    invalid = sum(not valid for valid, _, _ in results)
+    assert invalid == 200 - corpus["kinds"]["valid"] - corpus["kinds"][
+        "sparse"]
+
+    sparse = [
+        path for path in paths if os.stat(path).st_size == SPARSE_FILE_SIZE
+    ]
+    assert len(sparse) == corpus["kinds"]["sparse"]
+    assert all(validate_file(path)[0] for path in sparse)
+    assert generate_corpus(tmp_path / "again", files=200, invalid=0.3,
+                           sparse=0.2, seed=1) == corpus
+
+
+def test_measure(tmp_path):
+    """Test measuring a benchmark and comparing the results."""
+    generate_corpus(tmp_path, files=20)
+
+    result = measure("validate_file", str(tmp_path))
+
+    assert result["files"] == 20
+    assert result["files_per_second"] > 0
+    assert result["peak_rss_kib"] > 0
+
+    baseline = {"benchmarks": {"validate_file": dict(
+        result, files_per_second=result["files_per_second"] / 2)}}
+    assert compare(baseline, {"benchmarks": {"validate_file": result}}) == [
+        "validate_file: %.0f -> %.0f files/s (+100.0%%)" % (
+            result["files_per_second"] / 2, result["files_per_second"])
+    ]
@@ -0,0 +1,77 @@
+"""Test the `dpx_validator.cache` module"""
+
+import os
+import pickle
+
+from dpx_validator import api
+from dpx_validator.api import validate_file, validate_files
+from dpx_validator.cache import ResultCache
+
+
+def test_cache_roundtrip(tmp_path):
+    """Test that cached results are returned only for unchanged files."""
+    path = 'tests/data/valid_dpx.dpx'
+    file_stat = os.stat(path)
+    result = validate_file(path)
+
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    assert cache.get(file_stat) is None
+
+    cache.put(file_stat, result)
+    cache.flush()
+    assert cache.get(file_stat) == result
+
+    changed = os.stat_result((
+        *file_stat[:6], file_stat.st_size + 1, *file_stat[7:]))
+    assert cache.get(changed) is None
+    cache.close()
+
+    # Results are persisted
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    assert cache.get(file_stat) == result
+    cache.close()
+
+
+def test_cache_skips_validation(tmp_path, monkeypatch):
+    """Test that unchanged files are not validated again."""
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    paths = ['tests/data/valid_dpx.dpx', 'tests/data/invalid_version.dpx']
+    expected = [(path, *validate_file(path)) for path in paths]
+
+    assert list(validate_files(paths, cache=cache)) == expected
+
+    def fail_validate(path, *_):
+        raise AssertionError(f"{path} validated again")
+
+    monkeypatch.setattr(api, "_validate_file", fail_validate)
+    assert list(validate_files(paths, cache=cache)) == expected
+    cache.close()
+
+
+def test_cache_prune(tmp_path):
+    """Test that entries are evicted by age and by count."""
+    cache = ResultCache(tmp_path / "cache.sqlite", max_entries=1)
+    for path in ['tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx']:
+        cache.put(os.stat(path), validate_file(path))
+
+    cache.prune()
+    assert cache.get(os.stat('tests/data/valid_dpx.dpx')) is None
+    assert cache.get(os.stat('tests/data/empty_file.dpx')) is not None
+
+    cache.max_age = -1
+    cache.prune()
+    assert cache.get(os.stat('tests/data/empty_file.dpx')) is None
+    cache.close()
+
+
+def test_cache_pickle(tmp_path):
+    """Test that a pickled cache opens its own connection."""
+    path = 'tests/data/valid_dpx.dpx'
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    cache.put(os.stat(path), validate_file(path))
+    cache.flush()
+
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.get(os.stat(path)) == validate_file(path)
+    cache.close()
+    copy.close()
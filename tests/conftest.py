@@ -21,7 +21,12 @@ class TestFileFactory():
         version: bytes = b'V2.0\0   ',
         image_offset: int = 8193,
         file_size: int = 8192 * 2,
-        encrypt: bool = False
+        encrypt: bool = False,
+        pixels_per_line: int = 32,
+        lines_per_element: int = 32,
+        descriptor: int = 50,
+        bit_size: int = 10,
+        packing: int = 1
     ) -> Path:
         """
         Creates an empty DPX test file (There are multiple optional and some
@@ -38,12 +43,19 @@ class TestFileFactory():
         :param file_size: At minimum larger than Imageoffset, defaults to 8192
         :param encrypt: If ``True`` pretends to be encrypted by filling header
             with 1's
+        :param pixels_per_line: Width of the image
+        :param lines_per_element: Height of the image
+        :param descriptor: Descriptor of the only image element, defaults to
+            RGB
+        :param bit_size: Bit depth of the image element
+        :param packing: Packing of the image element, defaults to filled to
+            32-bit words with method A
 
         :returns: Path to the created file
         """
 
         b_order = BIGENDIAN_BYTEORDER
-        if magic_number == "XPDS":
+        if magic_number == b"XPDS":
             b_order = LITTLEENDIAN_BYTEORDER
 
         # encryption only mocked with something else than FFFFFFFF
@@ -52,7 +64,14 @@ class TestFileFactory():
             encryption_bytes = pack(b_order+"I", 0xFFFFFFFF)
 
         field5_field14_padding = pack(b_order+"160I", *[0] * 160)
-        field16_field75_padding = pack(b_order+"354I", *[0] * 354)
+        field16_padding = pack(b_order+"26I", *[0] * 26)
+        image_information = pack(
+            b_order+"HHII", 0, 1, pixels_per_line, lines_per_element)
+        image_element = pack(
+            b_order+"IIfIfBBBBHHIII32s",
+            0, 0, 0, 0, 0, descriptor, 2, 2, bit_size, packing, 0,
+            image_offset, 0, 0, b"")
+        field29_field75_padding = pack(b_order+"307I", *[0] * 307)
         # User defined data, can go up to 1MB.
         user_defined_data = pack(b_order+"1528I", *[0] * 1528)
         # Some empty image data
@@ -65,7 +84,10 @@ class TestFileFactory():
             pack(b_order+"I", file_size),
             field5_field14_padding,
             encryption_bytes,
-            field16_field75_padding,
+            field16_padding,
+            image_information,
+            image_element,
+            field29_field75_padding,
             user_defined_data,
             empty_image_data
         ])
@@ -8,8 +8,10 @@ from struct import error
 import pytest
 
 from dpx_validator.messages import InvalidField
-from dpx_validator.dpx_validator import DpxValidator
-from dpx_validator.file_header_reader import FileHeaderReader
+from dpx_validator.dpx_validator import DpxValidator, HeaderMemo
+from dpx_validator.file_header_reader import (
+    FileHeaderReader,
+    HEADER_BLOCK_SIZE)
 
 
 @pytest.mark.parametrize("offset,data_form,valid", [
@@ -40,6 +42,31 @@ def test_read_field(test_file, offset, data_form, valid):
             assert reader.read_field(position)[0] == b'q'
 
 
+def test_read_header_block_once(test_file_factory):
+    """Test that header fields are unpacked from a single block read and
+    that fields beyond the block are still read from the file."""
+    test_filepath = test_file_factory.create_file()
+
+    with test_filepath.open("rb") as file:
+        buffer = bytearray(HEADER_BLOCK_SIZE)
+        reader = FileHeaderReader(file, buffer=buffer)
+
+        assert reader.read_field({"offset": 0, "data_form": "4s"}) == \
+            (b"SDPX",)
+        block = reader.read_header_block()
+        assert len(block) == HEADER_BLOCK_SIZE
+        assert block.obj is buffer
+
+        assert reader.read_field({"offset": 16, "data_form": "I"}) == \
+            (8192 * 2,)
+        # Block is not read again
+        assert reader.read_header_block() is block
+
+        # Field beyond the header block
+        assert reader.read_field(
+            {"offset": HEADER_BLOCK_SIZE, "data_form": "I"}) == (0,)
+
+
 @pytest.mark.parametrize(
     "magic_number, valid, output",
     [
@@ -147,3 +174,184 @@ def test_check_unencrypted(test_file_factory, unencrypted):
         else:
             with pytest.raises(InvalidField):
                 validator.check_unencrypted()
+
+
+@pytest.mark.parametrize("parameters, valid", [
+    ({}, True),
+    ({"pixels_per_line": 0}, False),
+    ({"lines_per_element": 0xFFFFFFFF}, False),
+])
+def test_check_image_information(test_file_factory, parameters, valid):
+    """Test that image dimensions should be defined."""
+    test_file = test_file_factory.create_file(**parameters)
+
+    with test_file.open("rb") as file:
+        validator = DpxValidator(file, test_file)
+
+        if valid:
+            assert "32x32 pixels" in validator.check_image_information().text
+        else:
+            with pytest.raises(InvalidField):
+                validator.check_image_information()
+
+
+@pytest.mark.parametrize("parameters, valid", [
+    ({}, True),
+    ({"descriptor": 100, "bit_size": 16, "packing": 0}, True),
+    ({"descriptor": 5}, False),
+    ({"bit_size": 11}, False),
+    ({"packing": 3}, False),
+])
+def test_check_image_elements(test_file_factory, parameters, valid):
+    """Test that image element fields should have valid values."""
+    test_file = test_file_factory.create_file(**parameters)
+
+    with test_file.open("rb") as file:
+        validator = DpxValidator(file, test_file)
+
+        if valid:
+            validator.check_image_elements()
+        else:
+            with pytest.raises(InvalidField):
+                validator.check_image_elements()
+
+
+@pytest.mark.parametrize("descriptor, bit_size, packing, size", [
+    (50, 10, 1, 128 * 32),      # RGB, 32 samples in 32 words
+    (50, 10, 2, 128 * 32),
+    (50, 10, 0, 120 * 32),      # 960 bits packed to 30 words
+    (51, 8, 0, 128 * 32),
+    (6, 8, 0, 32 * 32),
+    (100, 12, 1, 128 * 32),     # 4:2:2, 64 samples in half words
+    (102, 16, 0, 192 * 32),
+    (52, 32, 0, 512 * 32),
+    (6, 1, 0, 4 * 32),
+    (0, 10, 1, None),           # User defined descriptor
+])
+def test_image_data_size(descriptor, bit_size, packing, size):
+    """Test the size of image data computed for 32x32 pixel images."""
+    element = {
+        "descriptor": descriptor,
+        "bit_size": bit_size,
+        "packing": packing,
+        "encoding": 0,
+        "end_of_line_padding": 0,
+        "end_of_image_padding": 0,
+    }
+    assert DpxValidator.image_data_size(element, 32, 32) == size
+
+
+@pytest.mark.parametrize("descriptor, bit_size, packing, size", [
+    (6, 12, 1, 20 * 3),         # 9 samples in 5 words
+    (6, 16, 0, 20 * 3),
+    (6, 8, 0, 12 * 3),
+    (50, 10, 1, 36 * 3),        # 27 samples in 9 words
+    (50, 12, 0, 44 * 3),        # 324 bits packed to 11 words
+])
+def test_image_data_size_odd_width(descriptor, bit_size, packing, size):
+    """Test that lines of 9 pixels wide images are aligned to 32 bits."""
+    element = {
+        "descriptor": descriptor,
+        "bit_size": bit_size,
+        "packing": packing,
+        "encoding": 0,
+        "end_of_line_padding": 0,
+        "end_of_image_padding": 0,
+    }
+    assert DpxValidator.image_data_size(element, 9, 3) == size
+
+
+@pytest.mark.parametrize("parameters, valid", [
+    ({}, True),
+    ({"lines_per_element": 64}, False),
+    ({"bit_size": 32, "packing": 0}, False),
+    ({"image_offset": 12288}, True),
+    ({"image_offset": 12289}, False),
+])
+def test_check_image_data_size(test_file_factory, parameters, valid):
+    """Test that image data should fit in the file."""
+    test_file = test_file_factory.create_file(**parameters)
+
+    with test_file.open("rb") as file:
+        validator = DpxValidator(file, test_file)
+
+        if valid:
+            validator.check_image_data_size()
+        else:
+            with pytest.raises(InvalidField):
+                validator.check_image_data_size()
+
+
+@pytest.mark.parametrize("timecode, valid", [
+    (0x00000000, True),
+    (0x23595929, True),
+    (0xFFFFFFFF, True),
+    (0x24000000, False),
+    (0x00600000, False),
+    (0x0000000A, False),
+])
+def test_check_timecode(timecode, valid):
+    """Test that time code should be valid binary coded decimal."""
+    assert DpxValidator.check_timecode(timecode) is valid
+
+
+def test_short_header(test_file):
+    """Test that a file shorter than the generic header is invalid."""
+    with test_file.open("rb") as file:
+        validator = DpxValidator(file, test_file.strpath)
+        with pytest.raises(InvalidField):
+            validator.check_image_information()
+
+
+def test_header_memo(test_file_factory, monkeypatch):
+    """Test that frame independent procedures are run once for frames with
+    identical headers, and frame dependent procedures for every frame."""
+    calls = []
+    check_version = DpxValidator.check_version
+
+    def counted_check_version(self):
+        calls.append(self.path)
+        return check_version(self)
+
+    counted_check_version.__name__ = "check_version"
+    monkeypatch.setattr(DpxValidator, "check_version", counted_check_version)
+
+    memo = HeaderMemo()
+    frames = [
+        test_file_factory.create_file(file_name="frame1", file_size=16384),
+        test_file_factory.create_file(file_name="frame2", file_size=1000),
+        test_file_factory.create_file(
+            file_name="frame3", magic_number=b"XPDS"),
+    ]
+    results = []
+    for frame in frames:
+        with frame.open("rb") as file:
+            validator = DpxValidator(file, frame)
+            results.append(validator.run_basic_procedures(memo=memo))
+            assert validator.file_version == "V2.0"
+
+    # Header of the second frame differs only in the file size field
+    assert calls == [frames[0], frames[2]]
+    assert results[0][0] is True
+    assert results[1][0] is False
+    assert any(
+        "Different file sizes" in message for _, message in results[1][1])
+    assert "little endian" in results[2][1][0][1]
+
+    # Results with the memo are the same as without it
+    for frame, result in zip(frames, results):
+        with frame.open("rb") as file:
+            assert DpxValidator(file, frame).run_basic_procedures() == result
+
+
+def test_header_memo_eviction():
+    """Test that the least recently used header is evicted."""
+    memo = HeaderMemo(maxsize=2)
+    memo.put(b"1", {})
+    memo.put(b"2", {})
+    assert memo.get(b"1") == {}
+    memo.put(b"3", {})
+
+    assert memo.get(b"2") is None
+    assert memo.get(b"1") == {}
+    assert memo.get(b"3") == {}
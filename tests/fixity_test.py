@@ -0,0 +1,171 @@
+"""Test the `dpx_validator.fixity` module"""
+
+import hashlib
+from io import BytesIO
+
+import pytest
+
+from dpx_validator.api import validate_file
+from dpx_validator.cache import ResultCache
+from dpx_validator.fixity import HashingReader, Manifest
+
+VALID_DPX = 'tests/data/valid_dpx.dpx'
+
+
+def digests_of(path):
+    """Digests of a file computed in one read."""
+    with open(path, "rb") as file_handle:
+        data = file_handle.read()
+    return {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest()
+    }
+
+
+@pytest.mark.parametrize("reads", [
+    [],
+    [(0, 2048)],
+    [(0, 2048), (0, 4), (8192, 100), (9000, 10), (8300, 1000)],
+    [(5000, 100000)],
+])
+def test_hashing_reader(reads):
+    """Test that the digests do not depend on the parts of the file read
+    before them."""
+    data = bytes(range(256)) * 100
+    reader = HashingReader(
+        BytesIO(data), ("md5", "sha256"), buffer=bytearray(1000))
+
+    for offset, size in reads:
+        reader.seek(offset)
+        assert reader.read(size) == data[offset:offset + size]
+
+    assert reader.hexdigests() == {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest()
+    }
+
+
+def test_hashing_reader_read_all():
+    """Test reading the rest of the file through the reader."""
+    data = b"DPX" * 1000
+    reader = HashingReader(BytesIO(data), ("md5",))
+    reader.seek(10)
+
+    assert reader.read() == data[10:]
+    assert reader.tell() == len(data)
+    assert reader.hexdigests()["md5"] == hashlib.md5(data).hexdigest()
+
+
+@pytest.mark.parametrize("deep", [False, True])
+def test_validate_file_digests(deep):
+    """Test that digests are computed while the file is validated."""
+    valid, output, logs = validate_file(
+        VALID_DPX, deep=deep, algorithms=("sha256", "md5"))
+
+    assert valid
+    assert output["digests"] == digests_of(VALID_DPX)
+    assert "SHA256 digest %s" % output["digests"]["sha256"] in [
+        msg for _, msg in logs
+    ]
+
+    _, output, _ = validate_file(VALID_DPX)
+    assert output["digests"] is None
+
+
+def test_validate_file_truncated_digests():
+    """Test that truncated files are digested as well."""
+    path = 'tests/data/empty_file.dpx'
+    valid, output, logs = validate_file(path, algorithms=("md5",))
+
+    assert not valid
+    assert output["digests"] == {"md5": hashlib.md5(b"").hexdigest()}
+    assert logs[0][1] == "Truncated file"
+
+
+def test_cached_digests(tmp_path):
+    """Test that cached results without digests are not used when digests
+    are requested."""
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    validate_file(VALID_DPX, cache=cache)
+    cache.flush()
+
+    _, output, _ = validate_file(VALID_DPX, cache=cache, algorithms=["md5"])
+    assert output["digests"] == {"md5": digests_of(VALID_DPX)["md5"]}
+    cache.close()
+
+
+def test_manifest_md5sum(tmp_path):
+    """Test reading an md5sum style manifest."""
+    manifest_path = tmp_path / "checksums.md5"
+    manifest_path.write_text(
+        "%s  reel/frame 1.dpx\n"
+        "\n"
+        "%s *frame2.dpx\n"
+        "\\%s  back\\\\slash.dpx\n"
+        "%s   leading space.dpx\n" % ("a" * 32, "B" * 32, "c" * 32, "d" * 32)
+    )
+
+    manifest = Manifest.from_file(manifest_path)
+
+    assert manifest.algorithms == {"md5"}
+    assert manifest.digests == {
+        str(tmp_path / "reel" / "frame 1.dpx"): ("md5", "a" * 32),
+        str(tmp_path / "frame2.dpx"): ("md5", "b" * 32),
+        str(tmp_path / "back\\slash.dpx"): ("md5", "c" * 32),
+        str(tmp_path / " leading space.dpx"): ("md5", "d" * 32),
+    }
+
+
+def test_manifest_bagit(tmp_path):
+    """Test reading a BagIt manifest, where the algorithm is in the file
+    name."""
+    manifest_path = tmp_path / "manifest-sha1.txt"
+    manifest_path.write_text("d" * 40 + " data/100%25.dpx\n")
+
+    manifest = Manifest.from_file(manifest_path)
+
+    assert manifest.digests == {
+        str(tmp_path / "data" / "100%.dpx"): ("sha1", "d" * 40)
+    }
+
+
+@pytest.mark.parametrize("content", [
+    "abc\n",
+    "abcdef  frame.dpx\n",
+    "%s\tframe.dpx\n" % ("a" * 32),
+])
+def test_invalid_manifest(tmp_path, content):
+    """Test that invalid lines are reported."""
+    manifest_path = tmp_path / "checksums"
+    manifest_path.write_text(content)
+
+    with pytest.raises(ValueError):
+        Manifest.from_file(manifest_path)
+
+
+@pytest.mark.parametrize("digest, valid, message", [
+    (None, True, "SHA256 digest matches the manifest"),
+    ("0" * 64, False, "SHA256 digest %s does not match %s in the manifest"),
+])
+def test_validate_file_manifest(digest, valid, message):
+    """Test verifying the digest of a file against a manifest."""
+    expected = digests_of(VALID_DPX)["sha256"]
+    manifest = Manifest({VALID_DPX: ("sha256", digest or expected)})
+
+    result = validate_file(VALID_DPX, manifest=manifest)
+
+    assert result[0] is valid
+    assert result[1]["digests"] == {"sha256": expected}
+    if not valid:
+        message = message % (expected, digest)
+    assert result[2][-1][1] == message
+
+
+def test_validate_file_not_in_manifest():
+    """Test that files missing from the manifest are invalid."""
+    manifest = Manifest({"frame.dpx": ("md5", "0" * 32)})
+
+    valid, _, logs = validate_file(VALID_DPX, manifest=manifest)
+
+    assert not valid
+    assert logs[-1][1] == "File is not listed in the manifest"
@@ -0,0 +1,54 @@
+"""Test the `dpx_validator.header_layout` module"""
+
+from struct import error
+
+import pytest
+
+from dpx_validator.file_header_reader import (
+    BIGENDIAN_BYTEORDER,
+    HEADER_BLOCK_SIZE)
+from dpx_validator.header_layout import (
+    compile_layout,
+    decode_string,
+    image_element,
+    parse_header)
+
+
+def test_compile_layout():
+    """Test that the compiled sections match the sizes in the
+    specification."""
+    generic, industry = compile_layout(BIGENDIAN_BYTEORDER)
+
+    assert generic.size == 1664
+    assert generic.size + industry.size == HEADER_BLOCK_SIZE
+    assert compile_layout(BIGENDIAN_BYTEORDER) == (generic, industry)
+
+
+def test_parse_header():
+    """Test decoding the header of a valid file."""
+    with open('tests/data/valid_dpx.dpx', 'rb') as file:
+        header = parse_header(file.read(HEADER_BLOCK_SIZE),
+                              BIGENDIAN_BYTEORDER)
+
+    assert decode_string(header["version"]) == "V2.0"
+    assert header["number_of_elements"] == 1
+    assert (header["pixels_per_line"], header["lines_per_element"]) == \
+        (10, 8)
+    assert header["timecode"] == 0x00001015
+
+    element = image_element(header, 1)
+    assert element["descriptor"] == 50
+    assert element["bit_size"] == 10
+    assert element["packing"] == 1
+    assert element["data_offset"] == 73728
+
+
+def test_parse_partial_header():
+    """Test that the industry section is optional and the generic section
+    is required."""
+    with open('tests/data/valid_dpx.dpx', 'rb') as file:
+        data = file.read(1664)
+
+    assert "timecode" not in parse_header(data, BIGENDIAN_BYTEORDER)
+    with pytest.raises(error):
+        parse_header(data[:-1], BIGENDIAN_BYTEORDER)
@@ -0,0 +1,236 @@
+"""Test the `dpx_validator.image_data` module"""
+
+from struct import pack
+
+import pytest
+
+from dpx_validator.api import validate_file
+from dpx_validator.file_header_reader import (
+    BIGENDIAN_BYTEORDER,
+    HEADER_BLOCK_SIZE,
+    LITTLEENDIAN_BYTEORDER)
+from dpx_validator.header_layout import parse_header
+from dpx_validator.image_data import scan_image_data
+from dpx_validator.messages import InvalidField
+
+IMAGE_OFFSET = 8192
+# Offset of the end of line padding of the first image element
+END_OF_LINE_PADDING = 812
+
+
+def pack_words(samples, shifts, byte_order, padding=0):
+    """Pack samples to 32-bit words with the samples at `shifts`."""
+    words = []
+    for index in range(0, len(samples), len(shifts)):
+        word = padding
+        for shift, sample in zip(shifts, samples[index:index + len(shifts)]):
+            word |= sample << shift
+        words.append(word)
+    return pack(byte_order + "%dI" % len(words), *words)
+
+
+def pack_bits(samples, bit_size, byte_order):
+    """Pack samples to 32-bit words from the least significant bit."""
+    value = 0
+    for index, sample in enumerate(samples):
+        value |= sample << index * bit_size
+    words = -(-len(samples) * bit_size // 32)
+    return pack(byte_order + "%dI" % words, *(
+        (value >> 32 * index) & 0xFFFFFFFF for index in range(words)))
+
+
+def scan(
+    test_file_factory,
+    image_data,
+    buffer_size=4096,
+    end_of_line_padding=0,
+    **parameters
+):
+    """Write a test file with the image data and scan it. The image is
+    32x32 pixels unless other dimensions are given."""
+    byte_order = BIGENDIAN_BYTEORDER
+    if parameters.get("magic_number") == b"XPDS":
+        byte_order = LITTLEENDIAN_BYTEORDER
+
+    path = test_file_factory.create_file(
+        image_offset=IMAGE_OFFSET, **parameters)
+    data = bytearray(path.read_bytes())
+    data[IMAGE_OFFSET:IMAGE_OFFSET + len(image_data)] = image_data
+    data[END_OF_LINE_PADDING:END_OF_LINE_PADDING + 4] = pack(
+        byte_order + "I", end_of_line_padding)
+    path.write_bytes(bytes(data))
+
+    with path.open("rb") as file_handle:
+        header = parse_header(file_handle.read(HEADER_BLOCK_SIZE), byte_order)
+        return scan_image_data(file_handle, header, byte_order, buffer_size)
+
+
+@pytest.mark.parametrize("packing, shifts", [
+    (1, (22, 12, 2)),
+    (2, (20, 10, 0)),
+])
+def test_scan_10_bit(test_file_factory, packing, shifts):
+    """Test unpacking 10-bit samples filled with method A and B."""
+    samples = [(index * 7) % 1000 + 10 for index in range(32 * 32 * 3)]
+    samples[5] = 1023
+    image_data = pack_words(samples, shifts, BIGENDIAN_BYTEORDER)
+
+    statistics = scan(test_file_factory, image_data, packing=packing)
+
+    assert statistics == [{
+        "minimum": 10,
+        "maximum": 1023,
+        "clipped": 1,
+        "samples": 32 * 32 * 3,
+        "black": False
+    }]
+
+
+@pytest.mark.parametrize("packing, shifts, padding", [
+    (1, (22, 12, 2), 0x1),
+    (2, (20, 10, 0), 0x40000000),
+])
+def test_scan_padding_bits(test_file_factory, packing, shifts, padding):
+    """Test that set padding bits are invalid."""
+    image_data = pack_words(
+        [100] * (32 * 32 * 3), shifts, BIGENDIAN_BYTEORDER, padding)
+
+    with pytest.raises(InvalidField):
+        scan(test_file_factory, image_data, packing=packing)
+
+
+def test_scan_partial_words(test_file_factory):
+    """Test lines ending with a partially used word. A line of 32 luma
+    samples takes 11 words, the last one with two samples."""
+    line = [64] * 31 + [940]
+    image_data = b"".join(
+        pack_words(line, (22, 12, 2), BIGENDIAN_BYTEORDER)
+        for _ in range(32)
+    )
+
+    statistics = scan(test_file_factory, image_data, descriptor=6)
+
+    assert statistics[0]["minimum"] == 64
+    assert statistics[0]["maximum"] == 940
+    assert statistics[0]["samples"] == 32 * 32
+
+
+@pytest.mark.parametrize("bit_size, magic_number", [
+    (10, b"SDPX"),
+    (10, b"XPDS"),
+    (12, b"SDPX"),
+    (12, b"XPDS"),
+])
+def test_scan_packed(test_file_factory, bit_size, magic_number):
+    """Test unpacking packed samples of lines 9 pixels wide, which end with
+    a partially used word."""
+    byte_order = "<" if magic_number == b"XPDS" else ">"
+    lines = [
+        [(line * 9 + index) * 5 + 1 for index in range(9)]
+        for line in range(4)
+    ]
+    lines[2][8] = (1 << bit_size) - 1
+    image_data = b"".join(
+        pack_bits(line, bit_size, byte_order) for line in lines)
+
+    statistics = scan(
+        test_file_factory, image_data, magic_number=magic_number,
+        descriptor=6, bit_size=bit_size, packing=0, pixels_per_line=9,
+        lines_per_element=4)
+
+    assert statistics[0]["minimum"] == 1
+    assert statistics[0]["maximum"] == (1 << bit_size) - 1
+    assert statistics[0]["clipped"] == 1
+    assert statistics[0]["samples"] == 9 * 4
+
+
+@pytest.mark.parametrize("bit_size", [10, 12])
+def test_scan_packed_padding_bits(test_file_factory, bit_size):
+    """Test that set bits after the last packed sample are invalid."""
+    image_data = pack_bits([100] * 9 + [1], bit_size, ">")
+
+    with pytest.raises(InvalidField):
+        scan(
+            test_file_factory, image_data, descriptor=6, bit_size=bit_size,
+            packing=0, pixels_per_line=9, lines_per_element=1)
+
+
+@pytest.mark.parametrize("last_half_word, valid", [
+    (0x0000, True),
+    (0x0010, False),
+])
+def test_scan_12_bit_odd_width(test_file_factory, last_half_word, valid):
+    """Test that lines of filled 12-bit samples are aligned to 32-bit words
+    and the unused half word is padding."""
+    line = [sample << 4 for sample in range(100, 109)] + [last_half_word]
+    image_data = pack(">10H", *line) * 2
+    parameters = {
+        "descriptor": 6, "bit_size": 12, "pixels_per_line": 9,
+        "lines_per_element": 2
+    }
+
+    if valid:
+        statistics = scan(test_file_factory, image_data, **parameters)
+        assert statistics[0]["minimum"] == 100
+        assert statistics[0]["maximum"] == 108
+        assert statistics[0]["samples"] == 9 * 2
+    else:
+        with pytest.raises(InvalidField):
+            scan(test_file_factory, image_data, **parameters)
+
+
+@pytest.mark.parametrize("padding, valid", [
+    (b"\0\0\0\0", True),
+    (b"\0\0\1\0", False),
+])
+def test_scan_end_of_line_padding(test_file_factory, padding, valid):
+    """Test that end of line padding is skipped and should be zeros."""
+    line = pack_words([500] * 96, (22, 12, 2), BIGENDIAN_BYTEORDER)
+    image_data = (line + padding) * 32
+
+    if valid:
+        statistics = scan(
+            test_file_factory, image_data, end_of_line_padding=4)
+        assert statistics[0]["minimum"] == 500
+        assert statistics[0]["maximum"] == 500
+    else:
+        with pytest.raises(InvalidField):
+            scan(test_file_factory, image_data, end_of_line_padding=4)
+
+
+def test_scan_16_bit_little_endian(test_file_factory):
+    """Test 16-bit samples in little endian byte order."""
+    samples = [1000 + index for index in range(32 * 32 * 3)]
+    image_data = pack("<%dH" % len(samples), *samples)
+
+    statistics = scan(
+        test_file_factory, image_data, magic_number=b"XPDS", bit_size=16,
+        packing=0, buffer_size=1)
+
+    assert statistics[0]["minimum"] == 1000
+    assert statistics[0]["maximum"] == 1000 + 32 * 32 * 3 - 1
+
+
+def test_scan_black_frame(test_file_factory):
+    """Test that an image of zeros is reported as black."""
+    statistics = scan(test_file_factory, b"", bit_size=8, packing=0)
+
+    assert statistics[0]["black"] is True
+    assert statistics[0]["samples"] == 32 * 32 * 3
+
+
+def test_scan_unsupported(test_file_factory):
+    """Test that unsupported sample formats are not scanned."""
+    assert scan(test_file_factory, b"", bit_size=32, packing=0) == [None]
+
+
+def test_validate_file_deep():
+    """Test that deep validation reports image statistics."""
+    valid, output, logs = validate_file('tests/data/valid_dpx.dpx', deep=True)
+
+    assert valid
+    assert output["image_statistics"][0]["minimum"] == 112
+    assert "Image data element 1" in logs[-1][1]
+
+    _, output, _ = validate_file('tests/data/valid_dpx.dpx')
+    assert output["image_statistics"] is None
@@ -0,0 +1,88 @@
+"""Test page cache hints"""
+
+import os
+
+import pytest
+
+from dpx_validator import iopolicy
+from dpx_validator.api import validate_file, validate_files
+from dpx_validator.iopolicy import IO_POLICIES, IOPolicy
+from dpx_validator.main import main
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/corrupted_dpx.dpx',
+    'tests/data/empty_file.dpx',
+]
+
+
+@pytest.fixture
+def advice(monkeypatch):
+    """Record the advice given with `os.posix_fadvise`."""
+    given = []
+    monkeypatch.setattr(
+        iopolicy, "_fadvise",
+        lambda fd, offset, length, advice: given.append(
+            (offset, length, advice))
+    )
+    return given
+
+
+def test_lookahead(monkeypatch, advice):
+    """Test that header blocks are prefetched the given number of files
+    ahead of the file yielded."""
+    prefetched = []
+    monkeypatch.setattr(iopolicy, "prefetch_header", prefetched.append)
+    items = [(str(number), None) for number in range(5)]
+
+    iterator = IOPolicy(prefetch=2).lookahead(items, key=lambda item: item[0])
+    assert next(iterator) == ("0", None)
+    assert prefetched == ["0", "1", "2"]
+    assert list(iterator) == items[1:]
+    assert prefetched == ["0", "1", "2", "3", "4"]
+
+
+def test_prefetch_header(advice):
+    """Test that the header block of a file is requested, and that missing
+    files are skipped."""
+    iopolicy.prefetch_header('tests/data/valid_dpx.dpx')
+    iopolicy.prefetch_header('tests/data/missing.dpx')
+    assert advice == [(0, 2048, os.POSIX_FADV_WILLNEED)]
+
+
+@pytest.mark.parametrize(
+    ("deep", "expected"),
+    [
+        (False, [os.POSIX_FADV_DONTNEED]),
+        (True, [os.POSIX_FADV_NOREUSE, os.POSIX_FADV_DONTNEED]),
+    ]
+)
+def test_drop(advice, deep, expected):
+    """Test that files read in full are marked as not reused, and that the
+    pages of validated files are released."""
+    result = validate_file(
+        'tests/data/valid_dpx.dpx', deep=deep,
+        io_policy=IO_POLICIES["nocache"]
+    )
+
+    assert result == validate_file('tests/data/valid_dpx.dpx', deep=deep)
+    assert [given for _, _, given in advice] == expected
+
+
+def test_validate_files_shared(advice):
+    """Test that validation results do not depend on the policy."""
+    results = list(validate_files(
+        PATHS * 4, workers=2, io_policy=IO_POLICIES["shared"]))
+
+    for path, valid, output, logs in results:
+        assert (valid, output, logs) == validate_file(path)
+    assert any(given == os.POSIX_FADV_WILLNEED for _, _, given in advice)
+
+
+def test_io_policy_option(capsys):
+    """Test that the output does not depend on the policy."""
+    main(['--jobs', '1', *PATHS])
+    expected = capsys.readouterr()
+
+    main(['--jobs', '1', '--io-policy', 'shared', *PATHS])
+    assert capsys.readouterr() == expected
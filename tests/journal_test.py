@@ -0,0 +1,97 @@
+"""Test the checkpoint journal"""
+
+import pytest
+
+from dpx_validator.api import validate_file
+from dpx_validator.journal import (
+    Journal,
+    in_shard,
+    parse_shard,
+    read_journal,
+)
+from dpx_validator.main import main
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/invalid_version.dpx',
+]
+
+
+def test_journal_roundtrip(tmp_path):
+    """Test that results read from the journal equal the results recorded,
+    also after a line is cut short."""
+    path = tmp_path / "journal.jsonl"
+    with Journal(path, sync_results=2) as journal:
+        for dpx_file in PATHS:
+            journal.record(
+                dpx_file, *validate_file(dpx_file, deep=True, compact=True))
+
+    with open(path, "ab") as journal_file:
+        journal_file.write(b'{"path": "tests/data/')
+
+    journal = Journal(path)
+    assert journal.done == set(PATHS)
+    journal.close()
+    assert path.read_bytes().endswith(b"}\n")
+
+    results = list(read_journal(path))
+    assert [dpx_file for dpx_file, _ in results] == PATHS
+    for (dpx_file, result) in results:
+        expected = validate_file(dpx_file, deep=True, compact=True)
+        assert result == expected
+        assert [(msg.code, msg.args) for msg in result.messages] == [
+            (msg.code, msg.args) for msg in expected.messages
+        ]
+
+
+def test_shard():
+    """Test that each path belongs to exactly one shard."""
+    paths = ["reel/frame.%04d.dpx" % number for number in range(1000)]
+    shards = [
+        [path for path in paths if in_shard(path, number, 4)]
+        for number in range(1, 5)
+    ]
+
+    assert sorted(sum(shards, [])) == paths
+    assert all(200 < len(shard) < 300 for shard in shards)
+    assert parse_shard("2/4") == (2, 4)
+    with pytest.raises(ValueError):
+        parse_shard("0/4")
+
+
+def test_resume(capsys, tmp_path):
+    """Test that a second run skips the files in the journal and that the
+    report from the journal covers both runs."""
+    journal = str(tmp_path / "journal.jsonl")
+
+    main(['--journal', journal, *PATHS[:2]])
+    first = capsys.readouterr()
+    main(['--journal', journal, *PATHS])
+    second = capsys.readouterr()
+    assert "valid_dpx.dpx" not in second.out
+    assert second.out.endswith(
+        "File tests/data/invalid_version.dpx is invalid\n")
+
+    main(['--report-journal', journal])
+    report = capsys.readouterr()
+    assert report.out == first.out + second.out
+    assert report.err == first.err + second.err
+
+
+def test_shard_main(capsys, tmp_path):
+    """Test that shards split the files given on the command line."""
+    (tmp_path / "frames").mkdir()
+    for number in range(10):
+        (tmp_path / "frames" / ("frame.%04d.dpx" % number)).write_bytes(
+            open(PATHS[0], "rb").read())
+
+    verdicts = []
+    for shard in ("1/3", "2/3", "3/3"):
+        main(['--format', 'csv', '--shard', shard, '-r', str(tmp_path)])
+        verdicts += [
+            line for line in capsys.readouterr().out.splitlines()
+            if line.startswith(str(tmp_path))
+        ]
+
+    assert len({line.split(",")[0] for line in verdicts}) == 10
@@ -1,9 +1,14 @@
 """Tests by invoking the program."""
 
+import csv
+import io
+import json
+import os
 from subprocess import STDOUT, call, check_output
 
 import pytest
 
+from dpx_validator import main as main_module
 from dpx_validator.main import main
 
 
@@ -87,3 +92,207 @@ def test_filelists_run_main(capsys):
 
     assert out
     assert "Invalid header version" in err
+
+
+@pytest.mark.parametrize("jobs", ["1", "2", "auto"])
+def test_jobs_output_order(capsys, jobs):
+    """Test that output is in the order of the paths with any number of
+    worker processes."""
+    expected = [
+        ('tests/data/valid_dpx.dpx', 'valid'),
+        ('tests/data/invalid_version.dpx', 'invalid'),
+        ('tests/data/empty_file.dpx', 'invalid'),
+        ('tests/data/välíd_dpx1.dpx', 'valid'),
+    ] * 3
+
+    main(['--jobs', jobs, *[path for path, _ in expected]])
+
+    (out, _) = capsys.readouterr()
+    verdicts = [
+        line for line in out.splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == [
+        f"File {path} is {verdict}" for path, verdict in expected
+    ]
+
+
+@pytest.mark.parametrize("jobs", [[], ["--jobs", "auto", "--max-jobs", "2"]])
+def test_recursive(capsys, test_file_factory, tmp_path, jobs):
+    """Test that files are found recursively from a directory."""
+    (tmp_path / "reel").mkdir()
+    test_file_factory.create_file(file_name="reel/frame.0001.dpx")
+    test_file_factory.create_file(
+        file_name="reel/frame.0002.dpx", file_size=1000)
+
+    main([*jobs, '--recursive', str(tmp_path), 'tests/data/valid_dpx.dpx'])
+
+    (out, err) = capsys.readouterr()
+    verdicts = [
+        line for line in out.splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == [
+        "File tests/data/valid_dpx.dpx is valid",
+        f"File {tmp_path / 'reel' / 'frame.0001.dpx'} is valid",
+        f"File {tmp_path / 'reel' / 'frame.0002.dpx'} is invalid",
+    ]
+    assert "Different file sizes" in err
+
+
+def test_cache(capsys, tmp_path):
+    """Test that results are the same when they are read from the cache."""
+    cache_file = tmp_path / "cache.sqlite"
+    paths = ['tests/data/valid_dpx.dpx', 'tests/data/invalid_version.dpx']
+
+    main(['--cache', '--cache-file', str(cache_file), *paths])
+    first = capsys.readouterr()
+    assert cache_file.exists()
+
+    main(['--cache', '--cache-file', str(cache_file), *paths])
+    assert capsys.readouterr() == first
+
+
+def test_digest_manifest(capsys, tmp_path):
+    """Test computing digests and verifying them against a manifest."""
+    (tmp_path / "valid_dpx.dpx").write_bytes(
+        open('tests/data/valid_dpx.dpx', 'rb').read())
+    (tmp_path / "manifest-md5.txt").write_text(
+        "4f33c86639a29725038b3eeacb274c9f valid_dpx.dpx\n")
+
+    main([
+        '--digest', 'sha1', '--manifest', str(tmp_path / "manifest-md5.txt"),
+        str(tmp_path / "valid_dpx.dpx")
+    ])
+
+    (out, err) = capsys.readouterr()
+    assert not err
+    assert "SHA1 digest " in out
+    assert "MD5 digest matches the manifest" in out
+    assert out.endswith("is valid\n")
+
+
+def test_stats(capsys):
+    """Test that statistics are reported at the end."""
+    main(['--stats', 'tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx'])
+
+    (_, err) = capsys.readouterr()
+    assert "Files: 2 (1 invalid, 0 cached)" in err
+    assert err.rstrip().endswith("check_truncated                      1")
+
+
+def test_format_jsonl(capsys):
+    """Test that JSON Lines output has a record per file and a summary."""
+    main(['--format', 'jsonl', 'tests/data/valid_dpx.dpx',
+          'tests/data/empty_file.dpx'])
+
+    (out, err) = capsys.readouterr()
+    assert not err
+    records = [json.loads(line) for line in out.splitlines()]
+    assert [record.get("path") for record in records] == [
+        'tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx', None]
+    assert records[0]["valid"]
+    assert records[0]["version"] == "V2.0"
+    assert records[1]["messages"] == [{
+        "type": "invalid_field",
+        "code": "TRUNCATED_FILE",
+        "message": "Truncated file",
+    }]
+    assert records[2] == {"summary": {"files": 2, "valid": 1, "invalid": 1}}
+
+
+@pytest.mark.parametrize("jobs", ["1", "2", "auto"])
+def test_invalid_only(capsys, test_file_factory, tmp_path, jobs):
+    """Test that only invalid files are reported with --invalid-only."""
+    test_file_factory.create_file(file_name="frame.0001.dpx")
+    test_file_factory.create_file(file_name="frame.0002.dpx", file_size=1000)
+
+    main([
+        '--invalid-only', '--jobs', jobs, '--format', 'jsonl',
+        '--recursive', str(tmp_path),
+        'tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx'
+    ])
+
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record.get("path") for record in records] == [
+        'tests/data/empty_file.dpx', str(tmp_path / 'frame.0002.dpx'), None]
+    assert records[-1] == {"summary": {"files": 2, "valid": 0, "invalid": 2}}
+
+
+def test_format_csv(capsys):
+    """Test that CSV output has a row per message and a summary row."""
+    main(['--format', 'csv', 'tests/data/empty_file.dpx'])
+
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows == [
+        ["path", "valid", "type", "code", "message"],
+        ["tests/data/empty_file.dpx", "false", "invalid_field",
+         "TRUNCATED_FILE", "Truncated file"],
+        ["", "", "summary", "", "1 files, 0 valid, 1 invalid"],
+    ]
+
+
+def test_read_paths(monkeypatch):
+    """Test splitting paths which cross the chunks read."""
+    monkeypatch.setattr(main_module, "READ_CHUNK_SIZE", 3)
+    stream = io.BytesIO(b"first.dpx\0\0s\xe4cond.dpx\0third.dpx")
+
+    assert list(main_module.read_paths(stream, b"\0")) == [
+        "first.dpx", os.fsdecode(b"s\xe4cond.dpx"), "third.dpx"
+    ]
+
+
+@pytest.mark.parametrize("jobs", ["1", "2", "auto"])
+def test_from_file(capsys, tmp_path, jobs):
+    """Test validating files listed in a file."""
+    paths = ['tests/data/valid_dpx.dpx', 'tests/data/empty_file.dpx'] * 3
+    (tmp_path / "paths.txt").write_text("\n".join(paths) + "\n")
+
+    main(['--jobs', jobs, '--from-file', str(tmp_path / "paths.txt")])
+
+    verdicts = [
+        line for line in capsys.readouterr().out.splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == [
+        "File tests/data/valid_dpx.dpx is valid",
+        "File tests/data/empty_file.dpx is invalid",
+    ] * 3
+
+
+@pytest.mark.parametrize("jobs", ["1", "2", "auto"])
+def test_missing_file(capsys, jobs):
+    """Test that a missing file is reported invalid and the other files
+    are validated."""
+    main(['--jobs', jobs, 'tests/data/missing.dpx',
+          'tests/data/valid_dpx.dpx'])
+
+    (out, err) = capsys.readouterr()
+    verdicts = [
+        line for line in out.splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == [
+        "File tests/data/missing.dpx is invalid",
+        "File tests/data/valid_dpx.dpx is valid",
+    ]
+    assert "File cannot be read: No such file or directory" in err
+
+
+def test_from_stdin_null():
+    """Test reading NUL separated paths from standard input."""
+    output = check_output(
+        ['python3', '-m', 'dpx_validator.main', '--from-file', '-', '-0'],
+        input=b"tests/data/valid_dpx.dpx\0tests/data/v\xc3\xa4l\xc3\xadd_dpx1"
+              b".dpx\0",
+        env={'PYTHONPATH': '.'})
+
+    verdicts = [
+        line for line in str(output, "utf-8").splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == [
+        "File tests/data/valid_dpx.dpx is valid",
+        "File tests/data/välíd_dpx1.dpx is valid",
+    ]
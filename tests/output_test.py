@@ -0,0 +1,76 @@
+"""Tests for output of validation results."""
+
+import io
+
+from dpx_validator.messages import MessageCode, MessageType, message
+from dpx_validator.output import (
+    JsonLinesWriter,
+    TextWriter,
+    buffered,
+    create_commandline_messages,
+)
+
+LOGS = [
+    message(MessageCode.VERSION, "V2.0"),
+    message(MessageCode.INVALID_FILESIZE, 100, 200),
+]
+
+
+def test_text_writer():
+    """Test that informational messages are written once to the output and
+    errors only to the error stream."""
+    stream, error_stream = io.StringIO(), io.StringIO()
+    writer = TextWriter(stream, error_stream)
+    writer.add("frame.dpx", False, {}, LOGS)
+    writer.summary()
+
+    assert stream.getvalue() == (
+        "File frame.dpx :: Validated as version: V2.0\n"
+        "File frame.dpx is invalid\n"
+    )
+    assert error_stream.getvalue() == (
+        "File frame.dpx :: InvalidField('Different file sizes from header "
+        "(100) and filesystem (200)')\n"
+    )
+
+
+def test_commandline_messages(capsys):
+    """Test that each message is printed once."""
+    create_commandline_messages(
+        "frame.dpx", True, [(MessageType.INFO, "Byte order is big endian")])
+
+    (out, err) = capsys.readouterr()
+    assert out == (
+        "File frame.dpx :: Byte order is big endian\n"
+        "File frame.dpx is valid\n"
+    )
+    assert not err
+
+
+def test_json_lines_plain_logs():
+    """Test that plain ``(type, text)`` logs are written with text codes."""
+    stream = io.StringIO()
+    JsonLinesWriter(stream, io.StringIO()).add(
+        "frame.dpx", True, {"size": None},
+        [(MessageType.INFO, "Some details")])
+
+    assert stream.getvalue() == (
+        '{"path": "frame.dpx", "valid": true, "messages": [{"type": '
+        '"informational", "code": "INFO_TEXT", "message": "Some details"}]}\n'
+    )
+
+
+def test_buffered():
+    """Test that the buffered stream is flushed only when the context
+    exits and that the stream is left open."""
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8", line_buffering=True)
+
+    with buffered(stream) as output:
+        output.write("first line\n")
+        assert raw.getvalue() == b""
+
+    assert raw.getvalue() == b"first line\n"
+    assert not stream.closed
+    stream.write("second line\n")
+    assert raw.getvalue() == b"first line\nsecond line\n"
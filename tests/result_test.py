@@ -0,0 +1,108 @@
+"""Test the `dpx_validator.result` and message classes"""
+
+import json
+import os
+import pickle
+
+from dpx_validator.api import validate_file
+from dpx_validator.messages import (
+    InvalidField,
+    MessageCode,
+    MessageType,
+    message)
+from dpx_validator.result import ValidationResult
+
+
+def test_message():
+    """Test that messages behave like ``(MessageType, str)`` tuples."""
+    info = message(MessageCode.IMAGE_INFORMATION, 1, 32, 16)
+
+    msg_type, msg = info
+    assert msg_type is MessageType.INFO
+    assert msg == "Image has 1 element(s) of 32x16 pixels"
+    assert info[0] is MessageType.INFO
+    assert info == (MessageType.INFO, msg)
+    assert info is message(MessageCode.IMAGE_INFORMATION, 1, 32, 16)
+    assert info.args == (1, 32, 16)
+
+
+def test_unshared_message():
+    """Test that messages with values unique to a file are not cached."""
+    digest = message(MessageCode.DIGEST, "MD5", "00")
+
+    assert digest == message(MessageCode.DIGEST, "MD5", "00")
+    assert digest is not message(MessageCode.DIGEST, "MD5", "00")
+
+
+def test_field_error_message():
+    """Test that field errors are formatted as before."""
+    error = message(MessageCode.INVALID_VERSION, b"V3.0")
+
+    assert tuple(error) == (
+        MessageType.ERROR, "InvalidField(\"Invalid header version b'V3.0'\")"
+    )
+    assert tuple(message(MessageCode.TRUNCATED_FILE)) == (
+        MessageType.ERROR, "Truncated file"
+    )
+
+
+def test_invalid_field():
+    """Test raising InvalidField with a code or a plain message."""
+    invalid = InvalidField(MessageCode.INVALID_TIMECODE, 0x25000000)
+    assert str(invalid) == "Invalid SMPTE time code 25000000"
+    assert repr(invalid) == "InvalidField('Invalid SMPTE time code 25000000')"
+    assert pickle.loads(pickle.dumps(invalid)).code == invalid.code
+
+    assert repr(InvalidField("Other")) == "InvalidField('Other')"
+
+
+def test_validation_result_compatibility():
+    """Test that results unpack and compare like the tuple API."""
+    result = validate_file('tests/data/invalid_version.dpx')
+
+    valid, output, logs = result
+    assert result[0] is valid is False
+    assert output["version"] is None
+    assert output["size"] == os.stat('tests/data/invalid_version.dpx').st_size
+    assert ("InvalidField(\"Invalid header version b'V3.0'\")"
+            in [msg for _, msg in logs])
+    assert result == (valid, output, [tuple(log) for log in logs])
+    assert result == ValidationResult.from_tuple(valid, output, [
+        tuple(log) for log in logs])
+
+
+def test_validate_file_tuple():
+    """Test that `validate_file` returns the tuple API with JSON
+    serializable logs, and the compact result only on request."""
+    result = validate_file('tests/data/corrupted_dpx.dpx')
+
+    assert isinstance(result, tuple)
+    assert all(type(log) is tuple for log in result[2])
+    assert json.loads(json.dumps(result[2])) == [
+        [msg_type.value, msg] for msg_type, msg in result[2]
+    ]
+
+    compact = validate_file('tests/data/corrupted_dpx.dpx', compact=True)
+    assert isinstance(compact, ValidationResult)
+    assert compact.as_tuple() == result
+
+
+def test_validation_result_pickle():
+    """Test that pickled results share their messages."""
+    result = validate_file('tests/data/valid_dpx.dpx', compact=True)
+
+    copy = pickle.loads(pickle.dumps(result))
+
+    assert copy == result
+    assert copy.messages[0] is result.messages[0]
+
+
+def test_add_messages():
+    """Test that adding an error invalidates the result."""
+    result = ValidationResult()
+    result.add_messages([message(MessageCode.DIGEST, "MD5", "00")])
+    assert result.valid
+
+    result.add_messages([message(MessageCode.NOT_IN_MANIFEST)])
+    assert not result.valid
+    assert len(result.logs) == 2
@@ -0,0 +1,125 @@
+"""Test scheduling of files by their location"""
+
+import os
+
+import pytest
+
+from dpx_validator.api import validate_file, validate_files, validate_tree
+from dpx_validator.main import main
+from dpx_validator.scheduling import Scheduler, physical_offset
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/corrupted_dpx.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/invalid_version.dpx',
+]
+
+
+def fake_stat(device, inode):
+    """Stat result with a device and an inode number."""
+    return os.stat_result((0o100644, inode, device, 1, 0, 0, 0, 0, 0, 0))
+
+
+def test_scheduler_order():
+    """Test that entries are ordered by device and inode number within each
+    window, and that the results are restored to the original order."""
+    entries = [
+        ("a", fake_stat(2, 5)),
+        ("b", fake_stat(1, 9)),
+        ("c", fake_stat(1, 3)),
+        ("d", fake_stat(1, 1)),
+        ("e", fake_stat(1, 2)),
+    ]
+    scheduler = Scheduler("inode", window=4)
+
+    scheduled = [path for path, _ in scheduler.entries(entries)]
+    assert scheduled == ["d", "c", "b", "a", "e"]
+
+    restored = list(scheduler.restore(path.upper() for path in scheduled))
+    assert restored == ["A", "B", "C", "D", "E"]
+
+
+def test_scheduler_unordered():
+    """Test that the order of the entries is not recorded when results are
+    not restored."""
+    entries = [("b", fake_stat(1, 2)), ("a", fake_stat(1, 1))]
+    scheduler = Scheduler("inode", restore_order=False)
+
+    scheduled = [path for path, _ in scheduler.entries(entries)]
+
+    assert scheduled == ["a", "b"]
+    assert not scheduler._indices
+    with pytest.raises(ValueError):
+        list(scheduler.restore(scheduled))
+
+
+def test_scheduler_stats_missing():
+    """Test that entries without a stat result are stat'ed, and that files
+    which cannot be stat'ed are passed on for validation to report."""
+    scheduler = Scheduler("inode")
+    entries = list(scheduler.entries(
+        [("tests/data/valid_dpx.dpx", None), ("tests/data/missing", None)]
+    ))
+
+    assert entries[0] == ("tests/data/missing", None)
+    assert entries[1][1] == os.stat("tests/data/valid_dpx.dpx")
+
+
+def test_invalid_schedule():
+    """Test that unknown schedules are rejected."""
+    with pytest.raises(ValueError):
+        Scheduler("name")
+
+
+def test_physical_offset(tmp_path):
+    """Test that the offset of a file is found or left unknown, and that an
+    empty file has no offset."""
+    offset = physical_offset('tests/data/valid_dpx.dpx')
+    assert offset is None or offset >= 0
+
+    (tmp_path / "empty.dpx").touch()
+    assert physical_offset(tmp_path / "empty.dpx") is None
+    assert physical_offset(tmp_path / "missing.dpx") is None
+
+
+@pytest.mark.parametrize("schedule", ["inode", "extent"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_validate_files_scheduled(schedule, workers):
+    """Test that scheduled validation yields the results of `validate_file`
+    in the order of the paths."""
+    paths = PATHS * 3
+
+    results = list(validate_files(paths, workers=workers, schedule=schedule))
+
+    assert [result[0] for result in results] == paths
+    for path, valid, output, logs in results:
+        assert (valid, output, logs) == validate_file(path)
+
+
+def test_validate_tree_scheduled(test_file_factory, tmp_path):
+    """Test that scheduled tree validation yields the files in the order of
+    the directory scan."""
+    for number in range(5):
+        test_file_factory.create_file(file_name=f"frame.{number:04}.dpx")
+
+    results = list(validate_tree(tmp_path, schedule="inode", ordered=False))
+    assert len(results) == 5
+
+    results = list(validate_tree(tmp_path, schedule="extent"))
+    assert [os.path.basename(result[0]) for result in results] == [
+        f"frame.{number:04}.dpx" for number in range(5)
+    ]
+
+
+def test_schedule_option(capsys):
+    """Test that the output of a scheduled run is in the order of the
+    paths."""
+    main(['--jobs', '1', '--schedule', 'extent', *PATHS])
+
+    (out, _) = capsys.readouterr()
+    verdicts = [
+        line.split()[1] for line in out.splitlines()
+        if line.endswith(("is valid", "is invalid"))
+    ]
+    assert verdicts == PATHS
@@ -0,0 +1,252 @@
+"""Test validation of frame sequences"""
+
+import json
+import struct
+
+import pytest
+
+from dpx_validator import sequence as sequence_module
+from dpx_validator.api import validate_files
+from dpx_validator.header_layout import HEADER_LAYOUT
+from dpx_validator.main import main
+from dpx_validator.messages import LISTED_ITEMS, MessageCode, message
+from dpx_validator.sequence import (
+    SequenceCollector,
+    check_sequence,
+    frame_ranges,
+    group_sequences,
+    timecode_frames,
+)
+
+
+def field_offset(name):
+    """Offset of a header field."""
+    forms = []
+    for field, data_form in HEADER_LAYOUT:
+        if field == name:
+            return struct.calcsize(">" + "".join(forms))
+        forms.append(data_form)
+    raise KeyError(name)
+
+
+def set_fields(path, **fields):
+    """Write big endian header fields of a file."""
+    data = bytearray(path.read_bytes())
+    for name, value in fields.items():
+        data_form = dict(HEADER_LAYOUT)[name]
+        struct.pack_into(">" + data_form, data, field_offset(name), value)
+    path.write_bytes(bytes(data))
+
+
+def create_sequence(test_file_factory, frames, name="reel.{:04}.dpx",
+                    **options):
+    """Create frames of a sequence."""
+    return [
+        test_file_factory.create_file(
+            file_name=name.format(frame), **options)
+        for frame in frames
+    ]
+
+
+def codes(logs):
+    """Codes of the messages."""
+    return [msg.code for msg in logs]
+
+
+def test_group_sequences():
+    """Test that paths are grouped by the name around the last number and
+    sorted by frame number."""
+    sequences = group_sequences([
+        "a/reel.0002.dpx",
+        "a/reel.0001.dpx",
+        "b/reel.0001.dpx",
+        "a/take2.10.dpx",
+        "a/take2.9.dpx",
+        "a/poster.dpx",
+    ])
+
+    assert [sequence.name for sequence in sequences] == [
+        "a/reel.%04d.dpx", "b/reel.%04d.dpx", "a/take2.%d.dpx"
+    ]
+    assert sequences[0].paths == ["a/reel.0001.dpx", "a/reel.0002.dpx"]
+    assert sequences[2].frames == [9, 10]
+
+
+def test_frame_ranges():
+    """Test that consecutive frames are collapsed into ranges."""
+    assert frame_ranges([1, 2, 3, 5, 7, 8]) == ((1, 3), (5, 5), (7, 8))
+
+
+def test_missing_and_duplicate_frames(test_file_factory, tmp_path):
+    """Test that gaps and frames found twice make the sequence invalid."""
+    create_sequence(test_file_factory, [1, 2, 5, 6, 9])
+    test_file_factory.create_file(file_name="reel.06.dpx")
+    (sequence,) = group_sequences(sorted(map(str, tmp_path.iterdir())))
+
+    valid, output, logs = check_sequence(sequence)
+
+    assert not valid
+    assert output == {"frames": 6, "first_frame": 1, "last_frame": 9}
+    assert logs[1] == message(MessageCode.MISSING_FRAMES, (3, 4), (7, 8))
+    assert logs[1].text == "Missing frames 3-4, 7-8"
+    assert logs[2].text == "Duplicate frames 6"
+
+
+def test_inconsistent_headers(test_file_factory, tmp_path):
+    """Test that frames whose header differs from the sequence are
+    reported by field."""
+    create_sequence(test_file_factory, [1, 2, 3, 4])
+    create_sequence(test_file_factory, [5], bit_size=16)
+    create_sequence(test_file_factory, [6], magic_number=b"XPDS")
+    create_sequence(test_file_factory, [7, 8], pixels_per_line=64)
+    (sequence,) = group_sequences(sorted(map(str, tmp_path.iterdir())))
+
+    valid, _, logs = check_sequence(sequence)
+
+    assert not valid
+    assert [msg.text for msg in logs[1:]] == [
+        "Field magic_number is SDPX in the sequence but XPDS in frames 6",
+        "Field pixels_per_line is 32 in the sequence but 64 in frames 7-8",
+        "Field bit_size is 10 in the sequence but 16 in frames 5",
+    ]
+
+
+def test_consistent_sequence(test_file_factory, tmp_path):
+    """Test that a complete sequence of identical headers is valid."""
+    create_sequence(test_file_factory, range(1, 11))
+    (sequence,) = group_sequences(sorted(map(str, tmp_path.iterdir())))
+
+    valid, _, logs = check_sequence(sequence)
+
+    assert valid
+    assert codes(logs) == [MessageCode.SEQUENCE]
+
+
+@pytest.mark.parametrize(
+    ("timecodes", "jumps"),
+    [
+        ([0x01000000, 0x01000001, 0x01000002, 0x01000003], []),
+        ([0x00595923, 0x01000000, 0x01000001, 0x01000002], []),
+        ([0x01000000, 0x01000001, 0x01000005, 0x01000006], [3]),
+    ]
+)
+def test_timecode_continuity(test_file_factory, tmp_path, timecodes, jumps):
+    """Test that time codes are checked against the frame numbers."""
+    paths = create_sequence(test_file_factory, range(1, 5))
+    for path, timecode in zip(paths, timecodes):
+        set_fields(path, industry_header_size=384, timecode=timecode,
+                   tv_frame_rate=24.0)
+    (sequence,) = group_sequences(map(str, paths))
+
+    valid, _, logs = check_sequence(sequence)
+
+    assert valid == (not jumps)
+    discontinuities = [
+        msg for msg in logs
+        if msg.code == MessageCode.TIMECODE_DISCONTINUITY
+    ]
+    assert [frame for _, _, frame, _ in
+            (discontinuities[0].args if discontinuities else ())] == jumps
+
+
+def test_timecode_without_frame_rate(test_file_factory, tmp_path):
+    """Test that time codes are not checked without a frame rate."""
+    paths = create_sequence(test_file_factory, range(1, 3))
+    for path in paths:
+        set_fields(path, industry_header_size=384, timecode=0x01000000,
+                   tv_frame_rate=0.0, film_frame_rate=0.0)
+    (sequence,) = group_sequences(map(str, paths))
+
+    valid, _, logs = check_sequence(sequence)
+
+    assert valid
+    assert codes(logs)[-1] == MessageCode.TIMECODE_NOT_CHECKED
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_collected_headers(
+    test_file_factory, tmp_path, monkeypatch, processes
+):
+    """Test that headers decoded by validation are used, and only frames
+    which were not validated are read again."""
+    paths = create_sequence(test_file_factory, range(1, 5))
+    collector = SequenceCollector()
+    list(validate_files(
+        map(str, paths[:3]), workers=2, processes=processes,
+        observer=collector))
+    # Changes after validation are seen only in the frame read again
+    set_fields(paths[1], element_1_bit_size=16)
+    set_fields(paths[3], element_1_bit_size=12)
+    read = []
+
+    def read_header_columns(paths, names):
+        read.extend(paths)
+        return original(paths, names)
+
+    original = sequence_module.read_header_columns
+    monkeypatch.setattr(
+        sequence_module, "read_header_columns", read_header_columns)
+    (sequence,) = group_sequences(map(str, paths))
+
+    valid, _, logs = check_sequence(sequence, collector)
+
+    assert read == [str(paths[3])]
+    assert not valid
+    assert logs[1].text == \
+        "Field bit_size is 10 in the sequence but 12 in frames 4"
+
+
+def test_timecode_frames():
+    """Test that time codes are counted in frames, with drop frames at the
+    NTSC rates."""
+    assert timecode_frames(0x00000110, 25.0) == 35
+    assert timecode_frames(0x01000000, 29.97) == 107892
+    assert timecode_frames(0x00010002, 29.97) == 1800
+    assert timecode_frames(0x00000030, 25.0) is None
+    assert timecode_frames(0xFFFFFFFF, 25.0) is None
+
+
+def test_listed_ranges():
+    """Test that long lists of ranges are shortened in the text."""
+    ranges = [(frame, frame) for frame in range(0, 100, 2)]
+    text = message(MessageCode.MISSING_FRAMES, *ranges).text
+    assert text.endswith(f" and {len(ranges) - LISTED_ITEMS} more")
+
+
+def test_sequences_option(capsys, test_file_factory, tmp_path):
+    """Test that sequences are reported after the files."""
+    create_sequence(test_file_factory, [1, 2, 4])
+
+    main(['--jobs', '1', '--sequences', '--recursive', str(tmp_path)])
+
+    (out, err) = capsys.readouterr()
+    name = tmp_path / "reel.%04d.dpx"
+    assert out.splitlines()[-1] == f"Sequence {name} is invalid"
+    assert f"Sequence {name} :: Missing frames 3" in err
+
+
+def test_sequences_with_stats(capsys, test_file_factory, tmp_path):
+    """Test that sequences and statistics are collected from the same
+    validation."""
+    create_sequence(test_file_factory, [1, 2, 3])
+
+    main(['--stats', '--sequences', '--recursive', str(tmp_path)])
+
+    (out, err) = capsys.readouterr()
+    name = tmp_path / "reel.%04d.dpx"
+    assert out.splitlines()[-1] == f"Sequence {name} is valid"
+    assert "Files: 3 (0 invalid, 0 cached)" in err
+
+
+def test_sequences_jsonl(capsys, test_file_factory, tmp_path):
+    """Test that sequences are written as records which are not counted in
+    the summary."""
+    create_sequence(test_file_factory, [1, 2, 3])
+
+    main(['--format', 'jsonl', '--sequences', '--recursive', str(tmp_path)])
+
+    (out, _) = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert records[-2]["frames"] == 3
+    assert records[-2]["valid"] is True
+    assert records[-1] == {"summary": {"files": 3, "valid": 3, "invalid": 0}}
@@ -0,0 +1,135 @@
+"""Test the validation server and client"""
+
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import pytest
+
+from dpx_validator.api import validate_file
+from dpx_validator.client import main as client_main
+from dpx_validator.client import request_validation
+from dpx_validator.output import result_record
+from dpx_validator.server import ServerRunning, ValidationServer
+
+VALID_DPX = os.path.abspath('tests/data/valid_dpx.dpx')
+INVALID_DPX = os.path.abspath('tests/data/invalid_version.dpx')
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Server running in a thread."""
+    server = ValidationServer(tmp_path / "dpx.sock", workers=2)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_request_validation(server):
+    """Test that results are returned in the order of the paths."""
+    paths = [VALID_DPX, INVALID_DPX] * 20
+
+    results = list(request_validation(server.server_address, paths))
+
+    assert results == [
+        result_record(path, *validate_file(path, compact=True))
+        for path in paths
+    ]
+
+
+def test_requests(server):
+    """Test plain, JSON, invalid and failing requests."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(server.server_address)
+        connection.sendall(b"".join([
+            VALID_DPX.encode() + b"\n",
+            b'{"path": "%s", "algorithms": ["md5"], "id": 7}\n'
+            % VALID_DPX.encode(),
+            b'{"path": 1}\n',
+            b"/missing.dpx\n",
+            b'{"path": "%s", "algorithms": 5}\n' % VALID_DPX.encode(),
+            b'{"path": "%s", "deep": "yes"}\n' % VALID_DPX.encode(),
+            VALID_DPX.encode() + b"\n",
+        ]))
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("rb") as responses:
+            results = [json.loads(line) for line in responses]
+
+    assert results[0]["valid"]
+    assert "digests" not in results[0]
+    assert results[1]["id"] == 7
+    assert results[1]["digests"] == {
+        "md5": "4f33c86639a29725038b3eeacb274c9f"}
+    assert results[2] == {
+        "error": "Invalid request: Request must be an object with a path"}
+    assert results[3]["path"] == "/missing.dpx"
+    assert "No such file" in results[3]["error"]
+    assert results[4] == {
+        "error": "Invalid request: Algorithms must be a list of names"}
+    assert results[5] == {
+        "error": "Invalid request: Deep must be true or false"}
+    assert results[6]["valid"]
+
+
+def test_failing_request(server, monkeypatch):
+    """Test that an unexpected failure is sent back as an error and the
+    connection keeps responding."""
+    def fail(path, **options):
+        raise TypeError("unexpected")
+
+    monkeypatch.setattr("dpx_validator.server.validate_file", fail)
+    results = list(request_validation(
+        server.server_address, [VALID_DPX, VALID_DPX]))
+
+    assert results == [{"path": VALID_DPX, "error": "unexpected"}] * 2
+
+
+def test_client_main(server, capsys):
+    """Test the command line client."""
+    client_main(['--socket', server.server_address, '--deep',
+                 'tests/data/valid_dpx.dpx'])
+
+    (result,) = [json.loads(line) for line in
+                 capsys.readouterr().out.splitlines()]
+    assert result["path"] == VALID_DPX
+    assert result["image_statistics"]
+
+
+def test_socket_in_use(server, tmp_path):
+    """Test that a running server is not replaced but a stale socket is."""
+    with pytest.raises(ServerRunning):
+        ValidationServer(server.server_address)
+
+    stale = tmp_path / "stale.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(str(stale))
+    ValidationServer(stale).server_close()
+    assert not stale.exists()
+
+
+def test_serve_command(tmp_path):
+    """Test starting the server from the command line and terminating it."""
+    socket_path = tmp_path / "serve.sock"
+    process = subprocess.Popen(
+        ['python3', '-m', 'dpx_validator.main', 'serve',
+         '--socket', str(socket_path)],
+        env={'PYTHONPATH': '.'})
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.05)
+
+        (result,) = request_validation(socket_path, [VALID_DPX])
+        assert result["valid"]
+    finally:
+        process.terminate()
+        assert process.wait(timeout=10) == 0
+
+    assert not socket_path.exists()
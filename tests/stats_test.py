@@ -0,0 +1,160 @@
+"""Test the `dpx_validator.stats` module"""
+
+import os
+from io import BytesIO
+
+import pytest
+
+from dpx_validator.api import validate_file, validate_files
+from dpx_validator.dpx_validator import DpxValidator, HeaderMemo
+from dpx_validator.stats import (
+    CountingReader,
+    LatencyHistogram,
+    ObserverGroup,
+    StatisticsCollector,
+    ValidationObserver)
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/invalid_version.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/corrupted_dpx.dpx',
+]
+
+
+class RecordingObserver(ValidationObserver):
+    """Observer which keeps each measurement."""
+
+    def __init__(self):
+        self.procedures = []
+        self.files = []
+        self.headers = []
+
+    def procedure(self, path, name, seconds, bytes_read, calls, message,
+                  memoized=False):
+        self.procedures.append((name, bytes_read, calls, message, memoized))
+
+    def file(self, path, seconds, stat_seconds, bytes_read, calls, valid,
+             cached=False):
+        self.files.append((path, stat_seconds, bytes_read, calls, valid))
+
+    def header(self, path, header):
+        self.headers.append((path, header))
+
+
+def test_latency_histogram():
+    """Test that percentiles are accurate to the bucket precision."""
+    histogram = LatencyHistogram()
+    for millisecond in range(1, 101):
+        histogram.add(millisecond / 1000)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.02)
+    assert histogram.percentile(99) == pytest.approx(0.099, rel=0.02)
+    assert histogram.percentile(100) == 0.1
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_counting_reader():
+    """Test counting bytes and calls."""
+    reader = CountingReader(BytesIO(b"0123456789"))
+    reader.seek(2)
+    assert reader.read(3) == b"234"
+    assert reader.readinto(bytearray(10)) == 5
+
+    assert (reader.counter.bytes_read, reader.counter.calls) == (8, 3)
+
+
+def test_procedure_measurements():
+    """Test that each procedure is reported with its I/O."""
+    observer = RecordingObserver()
+    with open(PATHS[0], "rb") as file_handle:
+        validator = DpxValidator(file_handle, PATHS[0], observer=observer)
+        validator.run_basic_procedures()
+
+    names = [name for name, *_ in observer.procedures]
+    assert names[:3] == [
+        "read_header_block", "check_magic_number", "check_offset_to_image"]
+    # The header is read once and the checks read from the buffer
+    assert observer.procedures[0][1:3] == (2048, 2)
+    assert all(calls == 0 for _, _, calls, _, _ in observer.procedures[1:])
+
+
+def test_memoized_procedures(test_file_factory):
+    """Test that memoized procedures are reported without running."""
+    paths = [
+        test_file_factory.create_file(file_name=f"frame{index}.dpx")
+        for index in range(2)
+    ]
+    memo = HeaderMemo()
+    observer = RecordingObserver()
+    for path in paths:
+        validate_file(path, memo=memo, observer=observer)
+
+    memoized = [name for name, *_, memoized in observer.procedures
+                if memoized]
+    assert "check_version" in memoized
+    assert "check_filesize" not in memoized
+
+
+def test_file_totals():
+    """Test that file totals include the stat call and all reads."""
+    observer = RecordingObserver()
+    validate_file(PATHS[0], observer=observer, algorithms=("md5",))
+    validate_file(PATHS[2], observer=observer)
+
+    (path, stat_seconds, bytes_read, _, valid), truncated = observer.files
+    assert path == PATHS[0]
+    assert stat_seconds is not None
+    assert bytes_read == os.stat(PATHS[0]).st_size
+    assert valid
+    assert truncated[-1] is False
+    assert ("check_truncated", 0, 0) == observer.procedures[-1][:3]
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_statistics_collector(processes):
+    """Test collecting statistics from threads and worker processes."""
+    collector = StatisticsCollector()
+
+    results = list(validate_files(
+        PATHS * 2, workers=2, processes=processes, observer=collector))
+
+    assert len(results) == 8
+    assert collector.files.latency.count == 8
+    assert collector.invalid == 6
+    assert collector.errors["check_version"] == 2
+    assert collector.errors["check_truncated"] == 2
+    assert collector.procedures["read_header_block"].latency.count == 6
+
+    report = collector.report()
+    assert report.startswith("Files: 8 (6 invalid, 0 cached)")
+    assert "check_filesize" in report
+    assert max(len(line) for line in report.splitlines()) < 80
+
+
+def test_decoded_headers(test_file_factory):
+    """Test that headers decoded by validation are passed to the observer,
+    only for files beginning with a magic number."""
+    observer = RecordingObserver()
+    invalid_magic = test_file_factory.create_file(magic_number=b"DPX\0")
+
+    for path in PATHS + [invalid_magic]:
+        validate_file(path, observer=observer)
+
+    assert [path for path, _ in observer.headers] == PATHS[:2]
+    assert observer.headers[0][1]["magic_number"] == b"SDPX"
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_observer_group(processes):
+    """Test passing measurements to a group of observers."""
+    collectors = (StatisticsCollector(), StatisticsCollector())
+
+    list(validate_files(
+        PATHS, workers=2, processes=processes,
+        observer=ObserverGroup(*collectors)))
+
+    assert [collector.files.latency.count for collector in collectors] == \
+        [4, 4]
+    assert [collector.invalid for collector in collectors] == [3, 3]
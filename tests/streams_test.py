@@ -0,0 +1,120 @@
+"""Test validating data in memory and streams"""
+
+import io
+import mmap
+
+import pytest
+
+from dpx_validator.api import validate_buffer, validate_file, validate_stream
+from dpx_validator.streams import BufferReader, ForwardReader
+
+PATHS = [
+    'tests/data/valid_dpx.dpx',
+    'tests/data/corrupted_dpx.dpx',
+    'tests/data/empty_file.dpx',
+    'tests/data/invalid_version.dpx',
+]
+
+
+class UploadStream(io.RawIOBase):
+    """Stream which cannot seek and returns short reads."""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(1000, len(buffer))
+        chunk = self.data[self.position:self.position + size]
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+
+def read(path):
+    """Contents of a file."""
+    with open(path, "rb") as file_handle:
+        return file_handle.read()
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("deep", [False, True])
+def test_validate_buffer(path, deep):
+    """Test that data in memory is validated like the file."""
+    data = read(path)
+
+    assert validate_buffer(data, deep=deep, algorithms=("md5",)) == \
+        validate_file(path, deep=deep, algorithms=("md5",))
+    assert validate_buffer(memoryview(bytearray(data)), deep=deep) == \
+        validate_file(path, deep=deep)
+
+
+def test_validate_buffer_mmap():
+    """Test validating a memory map, which can be closed afterwards."""
+    path = PATHS[0]
+    with open(path, "rb") as file_handle:
+        mapped = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    assert validate_buffer(mapped) == validate_file(path)
+    mapped.close()
+
+
+def test_validate_buffer_header_only(test_file_factory):
+    """Test validating the header of a file not yet received in full."""
+    path = test_file_factory.create_file()
+    data = read(path)
+
+    assert validate_buffer(data[:2048], total_size=len(data)) == \
+        validate_file(path)
+
+    (valid, _, logs) = validate_buffer(
+        data[:2048], total_size=len(data) - 100)
+    assert not valid
+    assert any("Different file sizes" in msg for _, msg in logs)
+
+    with pytest.raises(ValueError):
+        validate_buffer(data[:1000], total_size=len(data))
+    with pytest.raises(ValueError):
+        validate_buffer(data[:2048], total_size=len(data), deep=True)
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("deep", [False, True])
+def test_validate_stream(path, deep):
+    """Test validating seekable and forward-only streams."""
+    data = read(path)
+    expected = validate_file(path, deep=deep, algorithms=("sha1",))
+
+    assert validate_stream(
+        io.BytesIO(data), len(data), deep=deep, algorithms=("sha1",)
+    ) == expected
+    assert validate_stream(
+        UploadStream(data), len(data), deep=deep, algorithms=("sha1",)
+    ) == expected
+
+
+def test_forward_reader():
+    """Test that the reader skips forward and cannot seek backward."""
+    reader = ForwardReader(UploadStream(bytes(range(256)) * 100))
+    reader.seek(5000)
+
+    assert reader.read(3) == bytes([5000 % 256, 5001 % 256, 5002 % 256])
+    assert reader.tell() == 5003
+    with pytest.raises(io.UnsupportedOperation):
+        reader.seek(0)
+
+
+def test_buffer_reader():
+    """Test reading a buffer like a file."""
+    reader = BufferReader(b"0123456789")
+    reader.seek(-3, io.SEEK_END)
+    target = bytearray(5)
+
+    assert reader.readinto(target) == 3
+    assert target[:3] == b"789"
+    reader.seek(2)
+    assert reader.read(2) == b"23"
+    assert reader.read() == b"456789"